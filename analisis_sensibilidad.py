@@ -4,98 +4,58 @@ Análisis exhaustivo de sensibilidad con precios sombra, rangos de optimalidad y
 """
 
 from pulp import *
-import copy
+import numpy as np
 
-def solve_with_costs(costs_dict):
+from barrido_paralelo import solve_many
+from red_transbordo import ORIGINAL_COSTS, FlowSolution, default_network
+from cache_soluciones import SolveCache
+from resolutores import solve_lp
+from sensibilidad_analitica import cost_ranging, parametric_rhs, rhs_ranging
+
+# Red de referencia compartida por todas las resoluciones del análisis
+NETWORK = default_network()
+
+def solve_with_costs(costs_dict, backend='cbc', presolve=False):
     """
     Resuelve el problema de transbordo con costos personalizados
 
     Args:
         costs_dict: Diccionario con los costos de transporte
+        backend: Resolutor a usar ('cbc' o 'simplex_red')
+        presolve: Si es True, el resolutor recibe la red reducida por
+            preproceso_red.presolve
 
     Returns:
         prob: Problema resuelto
         variables: Diccionario de variables
         objective_value: Valor de la función objetivo
     """
-    prob = LpProblem("Transbordo_Sensibilidad", LpMinimize)
-
-    # Variables de decisión
-    S1H1 = LpVariable("S1H1", lowBound=0)
-    S1H2 = LpVariable("S1H2", lowBound=0)
-    S1H3 = LpVariable("S1H3", lowBound=0)
-    S2H1 = LpVariable("S2H1", lowBound=0)
-    S2H2 = LpVariable("S2H2", lowBound=0)
-    S2H3 = LpVariable("S2H3", lowBound=0)
-
-    H1D1 = LpVariable("H1D1", lowBound=0)
-    H1D2 = LpVariable("H1D2", lowBound=0)
-    H1D3 = LpVariable("H1D3", lowBound=0)
-    H1D4 = LpVariable("H1D4", lowBound=0)
-
-    H2D1 = LpVariable("H2D1", lowBound=0)
-    H2D2 = LpVariable("H2D2", lowBound=0)
-    H2D3 = LpVariable("H2D3", lowBound=0)
-    H2D4 = LpVariable("H2D4", lowBound=0)
-    H2D5 = LpVariable("H2D5", lowBound=0)
-
-    H3D2 = LpVariable("H3D2", lowBound=0)
-    H3D3 = LpVariable("H3D3", lowBound=0)
-    H3D4 = LpVariable("H3D4", lowBound=0)
-    H3D5 = LpVariable("H3D5", lowBound=0)
-
-    variables = {
-        'S1H1': S1H1, 'S1H2': S1H2, 'S1H3': S1H3,
-        'S2H1': S2H1, 'S2H2': S2H2, 'S2H3': S2H3,
-        'H1D1': H1D1, 'H1D2': H1D2, 'H1D3': H1D3, 'H1D4': H1D4,
-        'H2D1': H2D1, 'H2D2': H2D2, 'H2D3': H2D3, 'H2D4': H2D4, 'H2D5': H2D5,
-        'H3D2': H3D2, 'H3D3': H3D3, 'H3D4': H3D4, 'H3D5': H3D5
-    }
-
-    # Función Objetivo con costos personalizados
-    prob += (costs_dict['S1H1']*S1H1 + costs_dict['S1H2']*S1H2 + costs_dict['S1H3']*S1H3 +
-             costs_dict['S2H1']*S2H1 + costs_dict['S2H2']*S2H2 + costs_dict['S2H3']*S2H3 +
-             costs_dict['H1D1']*H1D1 + costs_dict['H1D2']*H1D2 + costs_dict['H1D3']*H1D3 + costs_dict['H1D4']*H1D4 +
-             costs_dict['H2D1']*H2D1 + costs_dict['H2D2']*H2D2 + costs_dict['H2D3']*H2D3 + costs_dict['H2D4']*H2D4 + costs_dict['H2D5']*H2D5 +
-             costs_dict['H3D2']*H3D2 + costs_dict['H3D3']*H3D3 + costs_dict['H3D4']*H3D4 + costs_dict['H3D5']*H3D5), "Costo_Total"
-
-    # Restricciones
-    prob += S1H1 + S1H2 + S1H3 == 900, "Oferta_S1"
-    prob += S2H1 + S2H2 + S2H3 == 700, "Oferta_S2"
-    prob += S1H1 + S2H1 == H1D1 + H1D2 + H1D3 + H1D4, "Balance_H1"
-    prob += S1H2 + S2H2 == H2D1 + H2D2 + H2D3 + H2D4 + H2D5, "Balance_H2"
-    prob += S1H3 + S2H3 == H3D2 + H3D3 + H3D4 + H3D5, "Balance_H3"
-    prob += H1D1 + H2D1 == 300, "Demanda_D1"
-    prob += H1D2 + H2D2 + H3D2 == 250, "Demanda_D2"
-    prob += H1D3 + H2D3 + H3D3 == 350, "Demanda_D3"
-    prob += H1D4 + H2D4 + H3D4 == 400, "Demanda_D4"
-    prob += H2D5 + H3D5 == 300, "Demanda_D5"
-
-    prob.solve(PULP_CBC_CMD(msg=0))
+    prob, arc_vars = solve_lp(NETWORK, NETWORK.costs_from_dict(costs_dict), backend,
+                              "Transbordo_Sensibilidad", presolve)
+    variables = dict(zip(NETWORK.arc_names, arc_vars))
 
     return prob, variables, value(prob.objective)
 
 
-def analyze_sensitivity():
+def analyze_sensitivity(backend='cbc', presolve=False):
     """
     Realiza un análisis completo de sensibilidad del problema de transbordo
+
+    Args:
+        backend: Resolutor a usar en todas las resoluciones ('cbc' o 'simplex_red')
+        presolve: Si es True, todas las resoluciones usan la red reducida por
+            preproceso_red.presolve
     """
     print("="*80)
     print("ANÁLISIS DE SENSIBILIDAD - PROBLEMA DE TRANSBORDO")
     print("="*80)
 
     # Costos originales
-    original_costs = {
-        'S1H1': 4, 'S1H2': 6, 'S1H3': 5,
-        'S2H1': 3, 'S2H2': 4, 'S2H3': 6,
-        'H1D1': 8, 'H1D2': 6, 'H1D3': 7, 'H1D4': 9,
-        'H2D1': 7, 'H2D2': 5, 'H2D3': 6, 'H2D4': 4, 'H2D5': 5,
-        'H3D2': 8, 'H3D3': 5, 'H3D4': 7, 'H3D5': 6
-    }
+    original_costs = dict(ORIGINAL_COSTS)
 
     # Resolver problema original
     print("\n📊 RESOLVIENDO PROBLEMA ORIGINAL...")
-    prob_original, vars_original, cost_original = solve_with_costs(original_costs)
+    prob_original, vars_original, cost_original = solve_with_costs(original_costs, backend, presolve)
 
     print(f"\n{'='*80}")
     print("SOLUCIÓN ÓPTIMA ORIGINAL")
@@ -155,19 +115,37 @@ def analyze_sensitivity():
 
     sensitivity_results = []
 
-    for var_name in original_costs.keys():
+    # Todas las perturbaciones y los escenarios se resuelven en un único lote
+    # que comparte el modelo: las filas 2k y 2k+1 son el -10% y el +10% del
+    # arco k, y las últimas filas son los escenarios. La caché parte con la
+    # solución base, de modo que los escenarios que solo escalan los costos
+    # no vuelven a resolverse
+    scenarios = {
+        'Optimista': 0.9,  # Reducción del 10% en todos los costos
+        'Pesimista': 1.1,  # Aumento del 10% en todos los costos
+        'Inflación': 1.15  # Aumento del 15% en todos los costos
+    }
+    cache = SolveCache()
+    base_costs = NETWORK.costs_from_dict(original_costs)
+    cache.put(NETWORK, base_costs,
+              FlowSolution.from_lp(NETWORK, prob_original, list(vars_original.values())))
+    arcs = np.arange(NETWORK.n_arcs)
+    perturbed = np.repeat(base_costs[np.newaxis, :], 2 * len(arcs), axis=0)
+    perturbed[2 * arcs, arcs] *= 0.9
+    perturbed[2 * arcs + 1, arcs] *= 1.1
+    factors = np.array(list(scenarios.values()))
+    objectives = solve_many(NETWORK, np.vstack([perturbed, factors[:, np.newaxis] * base_costs]),
+                            backend, workers=1, cache=cache, presolve=presolve)
+
+    for k, var_name in enumerate(NETWORK.arc_names):
         base_cost = original_costs[var_name]
 
         # Probar con -10%
-        costs_minus = copy.deepcopy(original_costs)
-        costs_minus[var_name] = base_cost * 0.9
-        _, _, cost_minus = solve_with_costs(costs_minus)
+        cost_minus = objectives[2 * k]
         change_minus = cost_minus - cost_original
 
         # Probar con +10%
-        costs_plus = copy.deepcopy(original_costs)
-        costs_plus[var_name] = base_cost * 1.1
-        _, _, cost_plus = solve_with_costs(costs_plus)
+        cost_plus = objectives[2 * k + 1]
         change_plus = cost_plus - cost_original
 
         # Determinar sensibilidad
@@ -202,19 +180,12 @@ def analyze_sensitivity():
     print("SIMULACIÓN DE ESCENARIOS")
     print(f"{'='*80}")
 
-    scenarios = {
-        'Optimista': 0.9,  # Reducción del 10% en todos los costos
-        'Pesimista': 1.1,  # Aumento del 10% en todos los costos
-        'Inflación': 1.15  # Aumento del 15% en todos los costos
-    }
-
     print("\nEscenario       | Factor | Costo Total | Cambio vs Base | Cambio %")
     print("-" * 80)
     print(f"{'Base':15} | {1.0:6.2f} | {cost_original:11.2f} | {0:14.2f} | {0:8.2f}%")
 
-    for scenario_name, factor in scenarios.items():
-        scenario_costs = {k: v * factor for k, v in original_costs.items()}
-        _, _, scenario_cost = solve_with_costs(scenario_costs)
+    for (scenario_name, factor), scenario_cost in zip(scenarios.items(),
+                                                      objectives[2 * len(arcs):]):
         change = scenario_cost - cost_original
         change_pct = (change / cost_original) * 100
 
@@ -225,39 +196,37 @@ def analyze_sensitivity():
     print(f"\n{'='*80}")
     print("ANÁLISIS DE RANGOS DE OPTIMALIDAD")
     print(f"{'='*80}")
-    print("\nProbando rangos donde la solución óptima se mantiene...\n")
+    print("\nRangos exactos calculados a partir de la base óptima y los costos reducidos")
+    print("(sin resolver de nuevo el problema)...\n")
 
-    print("Variable | Valor Óptimo | Rango Inferior | Rango Superior | Amplitud")
-    print("-" * 80)
+    solution = FlowSolution.from_lp(NETWORK, prob_original, list(vars_original.values()))
+    cost_lower, cost_upper = cost_ranging(NETWORK, solution.flows, solution.reduced_costs)
 
-    for var_name, var_obj in vars_original.items():
-        var_value = value(var_obj)
-        base_cost = original_costs[var_name]
+    print("Variable | Valor Óptimo | Costo Reducido | Rango Inferior | Rango Superior | Amplitud")
+    print("-" * 90)
+
+    for k, var_name in enumerate(NETWORK.arc_names):
+        range_width = cost_upper[k] - cost_lower[k]
+        print(f"{var_name:8} | {solution.flows[k]:12.2f} | {solution.reduced_costs[k]:14.2f} | "
+              f"{cost_lower[k]:14.2f} | {cost_upper[k]:14.2f} | {range_width:8.2f}")
 
-        # Buscar rango donde la solución no cambia
-        lower_bound = base_cost
-        upper_bound = base_cost
-
-        # Buscar límite inferior
-        for test_cost in [base_cost * 0.5, base_cost * 0.7, base_cost * 0.9]:
-            test_costs = copy.deepcopy(original_costs)
-            test_costs[var_name] = test_cost
-            _, test_vars, _ = solve_with_costs(test_costs)
-            if abs(value(test_vars[var_name]) - var_value) < 0.01:
-                lower_bound = test_cost
-                break
-
-        # Buscar límite superior
-        for test_cost in [base_cost * 1.5, base_cost * 1.3, base_cost * 1.1]:
-            test_costs = copy.deepcopy(original_costs)
-            test_costs[var_name] = test_cost
-            _, test_vars, _ = solve_with_costs(test_costs)
-            if abs(value(test_vars[var_name]) - var_value) < 0.01:
-                upper_bound = test_cost
-                break
-
-        range_width = upper_bound - lower_bound
-        print(f"{var_name:8} | {var_value:12.2f} | {lower_bound:14.2f} | {upper_bound:14.2f} | {range_width:8.2f}")
+    print("\nRangos del lado derecho (oferta y demanda):")
+    print("(el cambio se compensa en el primer nodo con precio sombra cero)")
+    print("Restricción  | Valor Actual | Precio Sombra | Mínimo     | Máximo")
+    print("-" * 80)
+    for con_name, rhs, dual, rhs_min, rhs_max in rhs_ranging(NETWORK, solution.flows,
+                                                             solution.reduced_costs, solution.duals):
+        print(f"{con_name:12} | {rhs:12.2f} | {dual:13.2f} | {rhs_min:10.2f} | {rhs_max:10.2f}")
+
+    print("\nCosto total en función de la oferta o demanda (tramos lineales entre")
+    print("los puntos de quiebre donde cambia la base; misma compensación):")
+    print("Restricción  |      Desde |      Hasta | Pendiente | Costo en 'Desde'")
+    print("-" * 80)
+    for curve in parametric_rhs(NETWORK, solution.flows, solution.reduced_costs, solution.duals):
+        for i, slope in enumerate(curve.slopes):
+            start, end = curve.breakpoints[i], curve.breakpoints[i + 1]
+            print(f"{curve.constraint if i == 0 else '':12} | {start:10.2f} | {end:10.2f} | "
+                  f"{slope:9.2f} | {curve.cost_at(start):16.2f}")
 
     # Recomendaciones Gerenciales
     print(f"\n{'='*80}")
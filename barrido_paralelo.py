@@ -0,0 +1,211 @@
+"""
+BARRIDO PARALELO - ESCENARIOS Y PERTURBACIONES EN VARIOS NÚCLEOS
+Reparte resoluciones independientes en un pool de procesos y devuelve los
+resultados en el mismo orden en que se pidieron
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import os
+import time
+
+import numpy as np
+from pulp import LpStatusOptimal
+
+from cache_soluciones import rescale_solution
+from metricas import SolveStats, publish, set_exporter
+from red_transbordo import FlowSolution
+from resolutores import PersistentModel
+
+# Modelo persistente de cada proceso del pool (se crea una vez por proceso)
+_WORKER_MODEL = None
+
+
+def _init_worker(network, backend, presolve=False):
+    global _WORKER_MODEL
+    # Las estadísticas vuelven con cada solución y las publica el proceso principal
+    set_exporter(None)
+    _WORKER_MODEL = PersistentModel(network, backend, presolve=presolve)
+
+
+def _solve_chunk(model, start, costs_chunk, time_limit, return_flows):
+    """
+    Resuelve un bloque de vectores de costos con el mismo modelo
+
+    Cada bloque arranca en frío y luego encadena arranques en caliente, de modo
+    que el resultado depende solo de cómo se parte la lista en bloques y no de
+    cuántos procesos hay ni del orden en que terminan.
+    """
+    model.reset()
+    results = []
+    for costs in costs_chunk:
+        solution = model.solve(costs, time_limit)
+        if not return_flows:
+            solution.flows = solution.duals = solution.reduced_costs = None
+        results.append(solution)
+    return start, results
+
+
+def _solve_chunk_in_worker(start, costs_chunk, time_limit, return_flows):
+    return _solve_chunk(_WORKER_MODEL, start, costs_chunk, time_limit, return_flows)
+
+
+class ParallelSweep:
+    """
+    Ejecutor de barridos de costos sobre una misma red
+
+    Los vectores de costos se agrupan en bloques de tamaño fijo; cada proceso
+    del pool mantiene un modelo persistente y resuelve bloques completos, lo
+    que amortiza la comunicación entre procesos y aprovecha el arranque en
+    caliente dentro de cada bloque.
+    """
+
+    def __init__(self, network, backend='cbc', workers=None, chunk_size=32, time_limit=None,
+                 cache=None, presolve=False):
+        """
+        Args:
+            network: TransshipmentNetwork sobre la que se hace el barrido
+            backend: Resolutor a usar en cada proceso ('cbc' o 'simplex_red')
+            workers: Número de procesos (por defecto os.cpu_count(); 1 = sin pool)
+            chunk_size: Vectores de costos por tarea enviada al pool
+            time_limit: Segundos máximos por resolución; las que se pasan quedan
+                con estado LpStatusNotSolved
+            cache: SolveCache opcional; los aciertos no se envían al pool y
+                las soluciones nuevas se guardan en ella
+            presolve: Si es True, cada resolución pasa por preproceso_red.presolve
+                (ver PersistentModel)
+        """
+        self.network = network
+        self.backend = backend
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = max(1, int(chunk_size))
+        self.time_limit = time_limit
+        self.cache = cache
+        self.presolve = presolve
+
+    def run(self, cost_vectors, return_flows=False):
+        """
+        Resuelve todos los vectores de costos
+
+        Args:
+            cost_vectors: Matriz K x arcos (o lista de vectores de costos)
+            return_flows: Si es False, solo se devuelven estado, objetivo e
+                iteraciones (evita copiar los arreglos entre procesos)
+
+        Returns:
+            Lista de K FlowSolution en el mismo orden que cost_vectors
+        """
+        cost_vectors = np.asarray(cost_vectors, dtype=float)
+        if self.cache is None:
+            return self._solve(cost_vectors, return_flows)
+
+        results = []
+        for costs in cost_vectors:
+            start = time.perf_counter()
+            solution = self.cache.get(self.network, costs)
+            if solution is not None:
+                self._record_hit(solution, time.perf_counter() - start)
+            results.append(solution)
+
+        # Los vectores repetidos (o proporcionales) dentro del barrido se
+        # resuelven una sola vez
+        pending = {}
+        for i, solution in enumerate(results):
+            if solution is None:
+                pending.setdefault(self.cache.key(self.network, cost_vectors[i])[0], []).append(i)
+        first = [group[0] for group in pending.values()]
+        # Con caché se piden siempre los arreglos completos para poder guardarlos
+        for group, solution in zip(pending.values(), self._solve(cost_vectors[first], True)):
+            self.cache.put(self.network, cost_vectors[group[0]], solution)
+            results[group[0]] = solution
+            scale = self.cache.key(self.network, cost_vectors[group[0]])[1]
+            for i in group[1:]:
+                start = time.perf_counter()
+                results[i] = rescale_solution(solution, self.cache.key(self.network, cost_vectors[i])[1] / scale)
+                self._record_hit(results[i], time.perf_counter() - start)
+        if not return_flows:
+            # Copias livianas: las soluciones guardadas en la caché no se tocan
+            results = [FlowSolution(s.status, s.objective, None, None, None, s.iterations, s.stats)
+                       for s in results]
+        return results
+
+    def _record_hit(self, solution, seconds):
+        """Registra como acierto de caché una solución que no se resolvió"""
+        stats = SolveStats.for_network(self.network, self.backend, cache_hit=True)
+        stats.add_time('lookup', seconds)
+        solution.stats = stats.finish(solution.status, solution.objective)
+
+    def _solve(self, cost_vectors, return_flows):
+        """Resuelve los vectores de costos en bloques, en proceso o en el pool"""
+        chunks = [(start, cost_vectors[start:start + self.chunk_size])
+                  for start in range(0, len(cost_vectors), self.chunk_size)]
+        results = [None] * len(cost_vectors)
+
+        if self.workers == 1 or len(chunks) <= 1:
+            model = PersistentModel(self.network, self.backend, presolve=self.presolve)
+            for start, chunk in chunks:
+                _, solutions = _solve_chunk(model, start, chunk, self.time_limit, return_flows)
+                results[start:start + len(solutions)] = solutions
+            return results
+
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(chunks)),
+                                 initializer=_init_worker,
+                                 initargs=(self.network, self.backend, self.presolve)) as pool:
+            futures = [pool.submit(_solve_chunk_in_worker, start, chunk, self.time_limit, return_flows)
+                       for start, chunk in chunks]
+            for future in futures:
+                start, solutions = future.result()
+                for solution in solutions:
+                    publish(solution.stats)
+                results[start:start + len(solutions)] = solutions
+        return results
+
+
+def solve_many(network, cost_matrix, backend='cbc', workers=None, return_flows=False,
+               chunk_size=32, time_limit=None, cache=None, presolve=False):
+    """
+    Resuelve K vectores de costos sobre la misma red en una sola llamada
+
+    Todo el lote comparte los modelos persistentes, el arranque en caliente
+    dentro de cada bloque y el pool de procesos (ver ParallelSweep).
+
+    Args:
+        network: TransshipmentNetwork sobre la que se resuelve
+        cost_matrix: Matriz K x arcos de costos
+        backend: Resolutor a usar ('cbc', 'simplex_red' o 'highs')
+        workers: Número de procesos (por defecto os.cpu_count(); 1 = sin pool)
+        return_flows: Si es True, también se devuelven los flujos como matriz
+            dispersa K x arcos (requiere scipy)
+        chunk_size: Vectores de costos por tarea enviada al pool
+        time_limit: Segundos máximos por resolución
+        cache: SolveCache opcional
+        presolve: Si es True, cada resolución se hace sobre la red reducida por
+            preproceso_red.presolve
+
+    Returns:
+        objectives: Vector de K costos totales (NaN si la resolución no es óptima)
+        flows: scipy.sparse.csr_matrix K x arcos, solo si return_flows es True
+    """
+    cost_matrix = np.atleast_2d(np.asarray(cost_matrix, dtype=float))
+    if cost_matrix.shape[1] != network.n_arcs:
+        raise ValueError(f"La matriz de costos tiene {cost_matrix.shape[1]} columnas y la red "
+                         f"{network.n_arcs} arcos")
+    if return_flows:
+        try:
+            from scipy.sparse import csr_matrix
+        except ImportError:
+            raise ImportError("La matriz de flujos requiere scipy: pip install scipy") from None
+
+    sweep = ParallelSweep(network, backend, workers, chunk_size, time_limit, cache, presolve)
+    solutions = sweep.run(cost_matrix, return_flows)
+    objectives = np.array([s.objective if s.status == LpStatusOptimal else np.nan
+                           for s in solutions], dtype=float)
+    if not return_flows:
+        return objectives
+
+    # Solo se guardan los arcos con flujo: la mayoría de los arcos quedan en cero
+    indices = [np.flatnonzero(s.flows) for s in solutions]
+    data = np.concatenate([s.flows[idx] for s, idx in zip(solutions, indices)] or [np.zeros(0)])
+    indptr = np.concatenate([[0], np.cumsum([len(idx) for idx in indices])])
+    flows = csr_matrix((data, np.concatenate(indices or [np.zeros(0, dtype=np.int64)]), indptr),
+                       shape=(len(solutions), network.n_arcs))
+    return objectives, flows
@@ -0,0 +1,307 @@
+"""
+BENCHMARK - TIEMPOS DE CONSTRUCCIÓN, RESOLUCIÓN Y SENSIBILIDAD
+Genera redes de transbordo factibles de distintos tamaños y mide cada fase
+con cada backend; los resultados se guardan en JSON para compararlos entre
+versiones
+"""
+
+import argparse
+from datetime import datetime, timezone
+import json
+import platform
+import subprocess
+import time
+
+import numpy as np
+import pulp
+from pulp import LpStatus
+
+from red_transbordo import FlowSolution, TransshipmentNetwork
+from resolutores import BACKENDS, HighsModel, solve_lp
+from sensibilidad_analitica import cost_ranging, rhs_ranging
+from simplex_red import NetworkSimplex
+
+SIZES = (100, 1_000, 10_000, 100_000)
+
+
+def generate_network(n_arcs, n_hubs=None, tightness=None, seed=None):
+    """
+    Genera una red de transbordo aleatoria y factible con unos n_arcs arcos
+
+    La red tiene tres capas (fuentes, transbordos y destinos) y algunos arcos
+    entre transbordos. Primero se arma un flujo factible (cada transbordo
+    reparte lo que recibe entre sus arcos de salida) y las ofertas y demandas
+    se toman de ese flujo, de modo que la instancia siempre es factible.
+
+    Args:
+        n_arcs: Número aproximado de arcos
+        n_hubs: Número de transbordos (por defecto ~sqrt(n_arcs) / 4)
+        tightness: None para una red sin capacidades, o un valor en (0, 1]: las
+            capacidades son flujo_factible / tightness (1 = sin holgura)
+        seed: Semilla del generador aleatorio
+
+    Returns:
+        TransshipmentNetwork
+    """
+    if tightness is not None and not 0 < tightness <= 1:
+        raise ValueError("tightness debe estar en (0, 1]")
+    rng = np.random.default_rng(seed)
+    n_hubs = n_hubs or max(3, int(round(np.sqrt(n_arcs) / 4)))
+    n_sources = max(2, n_hubs // 2)
+    n_dests = max(5, 2 * n_hubs)
+
+    sources = np.arange(n_sources)
+    hubs = n_sources + np.arange(n_hubs)
+    dests = n_sources + n_hubs + np.arange(n_dests)
+
+    # Arcos obligatorios: cada fuente y cada destino conectados, cada
+    # transbordo con al menos una entrada y una salida
+    tail = [sources, rng.choice(sources, n_hubs), hubs, rng.choice(hubs, n_dests)]
+    head = [rng.choice(hubs, n_sources), hubs, rng.choice(dests, n_hubs), dests]
+
+    # El resto: 30% fuente-transbordo, 60% transbordo-destino, 10% entre transbordos
+    extra = max(0, n_arcs - sum(len(t) for t in tail))
+    n_sh, n_hh = int(0.3 * extra), int(0.1 * extra)
+    n_hd = extra - n_sh - n_hh
+    tail += [rng.choice(sources, n_sh), rng.choice(hubs, n_hd), rng.choice(hubs, n_hh)]
+    head += [rng.choice(hubs, n_sh), rng.choice(dests, n_hd), rng.choice(hubs, n_hh)]
+    tail, head = np.concatenate(tail), np.concatenate(head)
+    keep = tail != head
+    tail, head = tail[keep], head[keep]
+    m = len(tail)
+
+    is_source_arc = tail < n_sources
+    is_dest_arc = head >= n_sources + n_hubs
+    cost = rng.integers(1, 21, m).astype(float)
+    cost[~is_source_arc & ~is_dest_arc] = rng.integers(1, 6, int(np.sum(~is_source_arc & ~is_dest_arc)))
+
+    # Flujo factible: entradas enteras a los transbordos y reparto aleatorio de salida
+    n_nodes = n_sources + n_hubs + n_dests
+    flow = np.zeros(m)
+    flow[is_source_arc] = rng.integers(1, 101, int(is_source_arc.sum()))
+    inflow = np.bincount(head, weights=flow, minlength=n_nodes)
+    weights = np.where(is_dest_arc, rng.random(m), 0.0)
+    out_weight = np.bincount(tail, weights=weights, minlength=n_nodes)
+    flow[is_dest_arc] = inflow[tail[is_dest_arc]] * weights[is_dest_arc] / out_weight[tail[is_dest_arc]]
+
+    supply = np.bincount(tail, weights=np.where(is_source_arc, flow, 0.0), minlength=n_nodes)
+    demand = np.bincount(head, weights=np.where(is_dest_arc, flow, 0.0), minlength=n_nodes)
+    # Se ajusta el último destino para que el balance sea exacto en punto flotante
+    demand[dests[-1]] += supply.sum() - demand.sum()
+
+    capacity = None
+    if tightness is not None:
+        spare = max(1.0, float(flow.sum() / max(1, np.count_nonzero(flow))))
+        capacity = np.where(flow > 0, flow, spare) / tightness
+
+    names = ([f"S{i + 1}" for i in range(n_sources)] + [f"H{i + 1}" for i in range(n_hubs)] +
+             [f"D{i + 1}" for i in range(n_dests)])
+    return TransshipmentNetwork(names, tail, head, cost, supply, demand, capacity=capacity)
+
+
+def _timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def benchmark_backend(network, backend, sensitivity=True):
+    """
+    Mide construcción, resolución, extracción de duales y sensibilidad
+
+    Con los backends en proceso los precios sombra y costos reducidos salen
+    de la misma resolución, por lo que la fase de duales se informa como None.
+    Con 'cbc' se resuelve con solve_lp y además se guardan sus fases
+    (SolveStats) en 'phases'.
+
+    Returns:
+        Diccionario con los tiempos (segundos) y el resultado de la resolución
+    """
+    times = {}
+    phases = None
+    if backend == 'cbc':
+        # El mismo camino que usa el proyecto: solve_lp con TimedCBC; la
+        # resolución incluye escribir el MPS, CBC y leer la solución
+        prob, arc_vars = solve_lp(network, backend='cbc')
+        phases = dict(prob.stats.phases)
+        times['build'] = phases.get('build', 0.0)
+        times['solve'] = sum(seconds for phase, seconds in phases.items() if phase != 'build')
+        solution, times['duals'] = _timed(FlowSolution.from_lp, network, prob, arc_vars)
+        solution.iterations = prob.stats.iterations or 0
+    else:
+        model_class = NetworkSimplex if backend == 'simplex_red' else HighsModel
+        model, times['build'] = _timed(model_class, network)
+        solution, times['solve'] = _timed(model.solve)
+        times['duals'] = None
+
+    times['sensitivity'] = None
+    if sensitivity and solution.status == pulp.LpStatusOptimal:
+        start = time.perf_counter()
+        cost_ranging(network, solution.flows, solution.reduced_costs)
+        rhs_ranging(network, solution.flows, solution.reduced_costs, solution.duals)
+        times['sensitivity'] = time.perf_counter() - start
+
+    return {
+        'status': LpStatus[solution.status],
+        'objective': solution.objective,
+        'iterations': solution.iterations,
+        'times': times,
+        'phases': phases,
+    }
+
+
+def run_benchmark(sizes=SIZES, backends=('cbc', 'simplex_red'), tightness=(None, 0.7),
+                  n_hubs=None, repeat=1, seed=0, sensitivity_max_arcs=100_000, verbose=True):
+    """
+    Ejecuta el benchmark completo
+
+    Args:
+        sizes: Tamaños de red (número aproximado de arcos)
+        backends: Backends a medir (ver resolutores.BACKENDS)
+        tightness: Valores de holgura de capacidad (None = sin capacidades)
+        n_hubs: Número de transbordos (por defecto depende del tamaño)
+        repeat: Repeticiones por combinación; se guarda el mejor tiempo de cada fase
+        seed: Semilla base para generar las redes
+        sensitivity_max_arcs: Redes más grandes que esto no miden sensibilidad
+        verbose: Mostrar una línea por resultado
+
+    Returns:
+        Lista de diccionarios, uno por (tamaño, holgura, backend)
+    """
+    results = []
+    if verbose:
+        print(f"{'Arcos':>9} | {'Nodos':>7} | {'Holgura':>7} | {'Backend':11} | {'Construir':>9} | "
+              f"{'Resolver':>9} | {'Duales':>8} | {'Sensib.':>8} | Estado")
+        print("-" * 100)
+
+    for k, size in enumerate(sizes):
+        for tight in tightness:
+            network = generate_network(size, n_hubs, tight, seed + k)
+            for backend in backends:
+                record = {'n_arcs': network.n_arcs, 'n_nodes': network.n_nodes,
+                          'n_hubs': int(np.sum(network.net_supply == 0)),
+                          'tightness': tight, 'backend': backend, 'seed': seed + k}
+                try:
+                    runs = [benchmark_backend(network, backend, network.n_arcs <= sensitivity_max_arcs)
+                            for _ in range(repeat)]
+                except ImportError as error:
+                    record['error'] = str(error)
+                    results.append(record)
+                    if verbose:
+                        print(f"{network.n_arcs:9d} | {network.n_nodes:7d} | {str(tight):>7} | "
+                              f"{backend:11} | {error}")
+                    continue
+
+                record.update(runs[0])
+                record['times'] = {phase: (None if runs[0]['times'][phase] is None else
+                                           min(r['times'][phase] for r in runs))
+                                   for phase in runs[0]['times']}
+                results.append(record)
+                if verbose:
+                    t = {p: ('-' if v is None else f"{v:.4f}") for p, v in record['times'].items()}
+                    print(f"{network.n_arcs:9d} | {network.n_nodes:7d} | {str(tight):>7} | "
+                          f"{backend:11} | {t['build']:>9} | {t['solve']:>9} | {t['duals']:>8} | "
+                          f"{t['sensitivity']:>8} | {record['status']}")
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(results, path):
+    """Guarda los resultados en JSON junto con el entorno en que se midieron"""
+    report = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'pulp': pulp.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'results': results,
+    }
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+
+def compare_results(baseline_path, results, threshold=1.25, min_seconds=1e-3):
+    """
+    Compara los tiempos con un archivo de resultados anterior
+
+    Args:
+        baseline_path: JSON generado por save_results en una versión anterior
+        results: Resultados actuales de run_benchmark
+        threshold: Razón nuevo/anterior a partir de la cual se marca regresión
+        min_seconds: Las fases más rápidas que esto se ignoran (ruido de medición)
+
+    Returns:
+        Lista de (arcos, holgura, backend, fase, anterior, nuevo) con regresiones
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)['results']
+
+    def key(r):
+        return (r['n_arcs'], r['tightness'], r['backend'], r['seed'])
+
+    previous = {key(r): r for r in baseline if 'times' in r}
+    regressions = []
+    for record in results:
+        old = previous.get(key(record))
+        if old is None or 'times' not in record:
+            continue
+        for phase, new_time in record['times'].items():
+            old_time = old['times'].get(phase)
+            if (new_time is not None and old_time and new_time >= min_seconds and
+                    new_time / old_time > threshold):
+                regressions.append((record['n_arcs'], record['tightness'], record['backend'],
+                                    phase, old_time, new_time))
+    return regressions
+
+
+def main():
+    """Función principal del benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark de los backends del problema de transbordo")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES),
+                        help="Número aproximado de arcos de cada red (p. ej. 100 1000 1000000)")
+    parser.add_argument('--backends', nargs='+', default=['cbc', 'simplex_red'], choices=BACKENDS)
+    parser.add_argument('--tightness', type=float, nargs='*', default=[0.7],
+                        help="Holguras de capacidad en (0, 1]; siempre se incluye la red sin capacidades")
+    parser.add_argument('--hubs', type=int, default=None, help="Número de transbordos")
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--sensitivity-max-arcs', type=int, default=100_000)
+    parser.add_argument('--output', default='benchmark_resultados.json')
+    parser.add_argument('--baseline', default=None,
+                        help="JSON de una ejecución anterior para detectar regresiones")
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help="Razón de tiempos nuevo/anterior que se considera regresión")
+    args = parser.parse_args()
+
+    print("="*80)
+    print("BENCHMARK DEL PROBLEMA DE TRANSBORDO")
+    print("="*80 + "\n")
+    results = run_benchmark(args.sizes, args.backends, [None] + args.tightness, args.hubs,
+                            args.repeat, args.seed, args.sensitivity_max_arcs)
+    save_results(results, args.output)
+    print(f"\nResultados guardados en {args.output}")
+
+    if args.baseline:
+        regressions = compare_results(args.baseline, results, args.threshold)
+        print(f"\n{'='*80}")
+        print(f"COMPARACIÓN CON {args.baseline}")
+        print(f"{'='*80}")
+        if not regressions:
+            print("\n✅ Sin regresiones de tiempo")
+        for n_arcs, tight, backend, phase, old_time, new_time in regressions:
+            print(f"⚠️  {n_arcs} arcos, holgura {tight}, {backend}, {phase}: "
+                  f"{old_time:.4f}s -> {new_time:.4f}s ({new_time / old_time:.2f}x)")
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+CACHÉ DE SOLUCIONES - REUTILIZACIÓN DE RESOLUCIONES REPETIDAS
+Caché LRU de soluciones indexada por un hash canónico de la instancia, que
+reconoce los vectores de costos escalados por un factor positivo
+"""
+
+from collections import OrderedDict
+import hashlib
+import os
+import pickle
+import weakref
+
+from pulp import LpStatusNotSolved
+import numpy as np
+
+from red_transbordo import FlowSolution
+
+
+def rescale_solution(solution, factor):
+    """
+    Solución de la misma red con todos los costos multiplicados por factor > 0
+
+    Los flujos no cambian; el objetivo, los precios sombra y los costos
+    reducidos se multiplican por el factor.
+    """
+    objective = None if solution.objective is None else solution.objective * factor
+    return FlowSolution(solution.status, objective,
+                        solution.flows.copy(), solution.duals * factor,
+                        solution.reduced_costs * factor, solution.iterations)
+
+
+class SolveCache:
+    """
+    Caché LRU acotada de soluciones de una red
+
+    La clave combina la estructura de la red (arcos, ofertas, demandas, cotas
+    y capacidades) con el vector de costos normalizado por su mayor valor
+    absoluto. Multiplicar todos los costos por un factor positivo no cambia
+    los flujos óptimos, así que esas consultas se responden reescalando el
+    objetivo, los precios sombra y los costos reducidos guardados.
+    """
+
+    def __init__(self, maxsize=256, path=None, decimals=12):
+        """
+        Args:
+            maxsize: Número máximo de soluciones guardadas
+            path: Archivo para persistir la caché entre ejecuciones (None = solo memoria)
+            decimals: Decimales con que se redondean los costos normalizados
+        """
+        self.maxsize = maxsize
+        self.path = path
+        self.decimals = decimals
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        # Hash de la estructura de cada red consultada; las referencias débiles
+        # dejan que las redes que ya nadie usa (ventanas, variantes) se liberen
+        self._structures = weakref.WeakKeyDictionary()
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _structure_digest(self, network):
+        """Hash de todo lo que define la red salvo los costos"""
+        cached = self._structures.get(network)
+        if cached is not None:
+            return cached
+        digest = hashlib.sha1()
+        for array in (network.tail, network.head, network.supply, network.demand,
+                      network.capacity, network.lower):
+            digest.update(np.ascontiguousarray(array).tobytes())
+            digest.update(b'|')
+        self._structures[network] = digest.digest()
+        return digest.digest()
+
+    def key(self, network, costs=None):
+        """
+        Clave canónica de la instancia y escala de sus costos
+
+        Returns:
+            key: Cadena hexadecimal que identifica la instancia salvo escala
+            scale: Factor positivo tal que costos = scale * costos_normalizados
+        """
+        costs = network.cost if costs is None else np.asarray(costs, dtype=float)
+        scale = float(np.abs(costs).max(initial=0.0)) or 1.0
+        normalized = np.round(costs / scale, self.decimals) + 0.0
+        digest = hashlib.sha1(self._structure_digest(network))
+        digest.update(normalized.tobytes())
+        return digest.hexdigest(), scale
+
+    def get(self, network, costs=None):
+        """
+        Busca la solución de la instancia (o de una con costos proporcionales)
+
+        Returns:
+            FlowSolution reescalada a los costos pedidos, o None si no está
+        """
+        key, scale = self.key(network, costs)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+
+        cached_scale, solution = entry
+        return rescale_solution(solution, scale / cached_scale)
+
+    def put(self, network, costs, solution):
+        """
+        Guarda una solución completa (con flujos, precios sombra y costos reducidos)
+
+        Las resoluciones interrumpidas por límite de tiempo no se guardan. Se
+        guarda una copia, de modo que modificar después los arreglos de la
+        solución no altera los aciertos futuros.
+        """
+        if solution.status == LpStatusNotSolved or solution.flows is None:
+            return
+        key, scale = self.key(network, costs)
+        stored = rescale_solution(solution, 1.0)
+        stored.stats = solution.stats
+        self._entries[key] = (scale, stored)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Vacía la caché y reinicia los contadores"""
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+    def save(self, path=None):
+        """Escribe las soluciones guardadas en disco"""
+        path = path or self.path
+        entries = [(key, scale, (s.status, s.objective, s.flows, s.duals, s.reduced_costs,
+                                 s.iterations))
+                   for key, (scale, s) in self._entries.items()]
+        with open(path, 'wb') as f:
+            pickle.dump(entries, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def load(self, path=None):
+        """Agrega a la caché las soluciones guardadas en disco"""
+        path = path or self.path
+        with open(path, 'rb') as f:
+            entries = pickle.load(f)
+        for key, scale, fields in entries[-self.maxsize:]:
+            self._entries[key] = (scale, FlowSolution(*fields))
+            self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
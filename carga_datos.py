@@ -0,0 +1,230 @@
+"""
+CARGA DE DATOS - TABLAS DE ARCOS, OFERTAS Y DEMANDAS
+Lectura por bloques de archivos CSV y de un formato columnar binario (un
+archivo .npy por columna, leído con mapeo en memoria) hacia arreglos contiguos
+"""
+
+import csv
+from itertools import islice
+import json
+import os
+
+import numpy as np
+
+from red_transbordo import TransshipmentNetwork
+
+# Columnas esperadas en los CSV (se pueden renombrar con arc_columns y node_columns)
+ARC_COLUMNS = {'tail': 'origen', 'head': 'destino', 'cost': 'costo',
+               'capacity': 'capacidad', 'lower': 'minimo', 'name': 'nombre'}
+NODE_COLUMNS = {'node': 'nodo', 'supply': 'oferta', 'demand': 'demanda'}
+
+# Columnas del formato binario y su tipo en disco
+_COLUMNAR_ARRAYS = {'tail': np.int64, 'head': np.int64, 'cost': np.float64,
+                    'capacity': np.float64, 'lower': np.float64,
+                    'supply': np.float64, 'demand': np.float64}
+
+
+class NodeInterner:
+    """
+    Asigna un id entero a cada nombre de nodo
+
+    Los nombres de cada bloque se deduplican con np.unique, de modo que el
+    diccionario solo se consulta una vez por nombre distinto del bloque y no
+    una vez por fila.
+    """
+
+    def __init__(self, names=()):
+        self.names = []
+        self.ids = {}
+        for name in names:
+            self.add(name)
+
+    def add(self, name):
+        node = self.ids.get(name)
+        if node is None:
+            node = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return node
+
+    def intern(self, names):
+        """Convierte un arreglo de nombres en un arreglo de ids"""
+        unique, inverse = np.unique(np.asarray(names), return_inverse=True)
+        ids = np.fromiter((self.add(name) for name in unique.tolist()), dtype=np.int64,
+                          count=len(unique))
+        return ids[inverse.ravel()]
+
+
+def _read_chunks(path, chunk_size, delimiter):
+    """
+    Recorre el CSV en bloques de filas
+
+    Cada bloque se separa en columnas con np.loadtxt (implementado en C), sin
+    crear una lista de Python por fila.
+
+    Returns:
+        header: Nombres de las columnas
+        chunks: Iterador de listas de columnas (arreglos de texto)
+    """
+    f = open(path, newline='')
+    header = [h.strip().strip('"') for h in next(csv.reader([f.readline()], delimiter=delimiter))]
+
+    def chunks():
+        with f:
+            while True:
+                lines = list(islice(f, chunk_size))
+                if not lines:
+                    return
+                table = np.loadtxt(lines, delimiter=delimiter, dtype=str, quotechar='"',
+                                   ndmin=2, comments=None)
+                yield [np.char.strip(table[:, j]) for j in range(table.shape[1])]
+
+    return header, chunks()
+
+
+def _numeric(column, empty):
+    """Convierte una columna de texto a float; las celdas vacías toman el valor empty"""
+    return np.where(column == '', empty, column).astype(float)
+
+
+def _column_index(header, columns, key, required=True):
+    name = columns[key]
+    if name in header:
+        return header.index(name)
+    if required:
+        raise ValueError(f"Falta la columna {name!r} (encabezado: {', '.join(header)})")
+    return None
+
+
+def load_network_csv(arcs_path, nodes_path=None, chunk_size=500_000, delimiter=',',
+                     arc_columns=None, node_columns=None):
+    """
+    Carga una red desde CSV leyendo por bloques
+
+    El archivo de arcos tiene columnas origen, destino y costo, y
+    opcionalmente capacidad (vacía = sin límite), minimo y nombre. El de
+    nodos tiene nodo, oferta y demanda; los nodos que solo aparecen en los
+    arcos quedan con oferta y demanda cero. Cada bloque se convierte a
+    arreglos de NumPy y al final se concatenan en arreglos contiguos.
+
+    Args:
+        arcs_path: CSV de arcos
+        nodes_path: CSV de nodos (ofertas y demandas)
+        chunk_size: Filas leídas por bloque
+        delimiter: Separador de columnas
+        arc_columns: Nombres alternativos de columnas de arcos (ver ARC_COLUMNS)
+        node_columns: Nombres alternativos de columnas de nodos (ver NODE_COLUMNS)
+
+    Returns:
+        TransshipmentNetwork
+    """
+    arc_columns = {**ARC_COLUMNS, **(arc_columns or {})}
+    node_columns = {**NODE_COLUMNS, **(node_columns or {})}
+    interner = NodeInterner()
+
+    # Ofertas y demandas primero, para que los ids sigan el orden del archivo de nodos
+    supply_parts, demand_parts, node_parts = [], [], []
+    if nodes_path is not None:
+        header, chunks = _read_chunks(nodes_path, chunk_size, delimiter)
+        i_node = _column_index(header, node_columns, 'node')
+        i_supply = _column_index(header, node_columns, 'supply')
+        i_demand = _column_index(header, node_columns, 'demand')
+        for cols in chunks:
+            node_parts.append(np.fromiter((interner.add(name) for name in cols[i_node].tolist()),
+                                          dtype=np.int64, count=len(cols[i_node])))
+            supply_parts.append(_numeric(cols[i_supply], '0'))
+            demand_parts.append(_numeric(cols[i_demand], '0'))
+
+    header, chunks = _read_chunks(arcs_path, chunk_size, delimiter)
+    i_tail = _column_index(header, arc_columns, 'tail')
+    i_head = _column_index(header, arc_columns, 'head')
+    i_cost = _column_index(header, arc_columns, 'cost')
+    i_capacity = _column_index(header, arc_columns, 'capacity', required=False)
+    i_lower = _column_index(header, arc_columns, 'lower', required=False)
+    i_name = _column_index(header, arc_columns, 'name', required=False)
+
+    parts = {'tail': [], 'head': [], 'cost': [], 'capacity': [], 'lower': []}
+    arc_names = [] if i_name is not None else None
+    for cols in chunks:
+        parts['tail'].append(interner.intern(cols[i_tail]))
+        parts['head'].append(interner.intern(cols[i_head]))
+        parts['cost'].append(_numeric(cols[i_cost], 'nan'))
+        if i_capacity is not None:
+            parts['capacity'].append(_numeric(cols[i_capacity], 'inf'))
+        if i_lower is not None:
+            parts['lower'].append(_numeric(cols[i_lower], '0'))
+        if arc_names is not None:
+            arc_names.extend(cols[i_name].tolist())
+
+    arrays = {key: np.concatenate(values) if values else None for key, values in parts.items()}
+    if arrays['tail'] is None:
+        arrays['tail'] = arrays['head'] = np.zeros(0, dtype=np.int64)
+        arrays['cost'] = np.zeros(0)
+    if np.isnan(arrays['cost']).any():
+        raise ValueError("Hay arcos sin costo en el archivo de arcos")
+
+    n_nodes = len(interner.names)
+    supply, demand = np.zeros(n_nodes), np.zeros(n_nodes)
+    if node_parts:
+        nodes = np.concatenate(node_parts)
+        np.add.at(supply, nodes, np.concatenate(supply_parts))
+        np.add.at(demand, nodes, np.concatenate(demand_parts))
+
+    return TransshipmentNetwork(interner.names, arrays['tail'], arrays['head'], arrays['cost'],
+                                supply, demand, arrays['capacity'], arrays['lower'], arc_names)
+
+
+def save_columnar(network, directory):
+    """
+    Guarda la red en formato columnar: un archivo .npy por columna
+
+    Los nombres de nodos (y de arcos, solo si se definieron explícitamente)
+    van en archivos JSON aparte.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for key, dtype in _COLUMNAR_ARRAYS.items():
+        np.save(os.path.join(directory, f"{key}.npy"),
+                np.ascontiguousarray(getattr(network, key), dtype=dtype))
+    with open(os.path.join(directory, 'nodes.json'), 'w') as f:
+        json.dump(network.node_names, f)
+    arc_names_path = os.path.join(directory, 'arc_names.json')
+    if network._arc_names is not None:
+        with open(arc_names_path, 'w') as f:
+            json.dump(network._arc_names, f)
+    elif os.path.exists(arc_names_path):
+        os.remove(arc_names_path)
+
+
+def load_columnar(directory, mmap=True):
+    """
+    Carga una red guardada con save_columnar
+
+    Args:
+        directory: Carpeta con los archivos .npy
+        mmap: Si es True, los arreglos de arcos se leen con mapeo en memoria:
+            el sistema operativo trae las páginas a medida que se usan y no se
+            copian los datos al cargar
+
+    Returns:
+        TransshipmentNetwork
+    """
+    mode = 'r' if mmap else None
+    arrays = {key: np.load(os.path.join(directory, f"{key}.npy"), mmap_mode=mode)
+              for key in _COLUMNAR_ARRAYS}
+    with open(os.path.join(directory, 'nodes.json')) as f:
+        node_names = json.load(f)
+    arc_names = None
+    arc_names_path = os.path.join(directory, 'arc_names.json')
+    if os.path.exists(arc_names_path):
+        with open(arc_names_path) as f:
+            arc_names = json.load(f)
+
+    return TransshipmentNetwork(node_names, arrays['tail'], arrays['head'], arrays['cost'],
+                                arrays['supply'], arrays['demand'], arrays['capacity'],
+                                arrays['lower'], arc_names)
+
+
+def csv_to_columnar(arcs_path, nodes_path, directory, **options):
+    """Convierte tablas CSV al formato columnar (para cargas posteriores más rápidas)"""
+    network = load_network_csv(arcs_path, nodes_path, **options)
+    save_columnar(network, directory)
+    return network
@@ -0,0 +1,376 @@
+"""
+COLA DE TRABAJOS - BARRIDOS Y ESCENARIOS LARGOS CON ASYNCIO
+Ejecuta barridos de costos como trabajos que entregan cada resolución apenas
+termina, se pueden cancelar o vencer por tiempo y guardan los puntos resueltos
+en un archivo de control para retomar un barrido interrumpido
+"""
+
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+from pulp import LpStatusNotSolved, LpStatusOptimal
+
+from barrido_paralelo import _solve_chunk
+from metricas import publish, set_exporter
+from red_transbordo import FlowSolution
+from resolutores import PersistentModel
+
+# Estados de un trabajo
+PENDING = 'PENDIENTE'
+RUNNING = 'EN CURSO'
+FINISHED = 'TERMINADO'
+CANCELLED = 'CANCELADO'
+TIMED_OUT = 'VENCIDO'
+FAILED = 'ERROR'
+
+# Modelos persistentes de cada hilo o proceso del ejecutor, por trabajo
+_LOCAL = threading.local()
+_MODELS_PER_WORKER = 4
+
+
+def _init_worker():
+    # Las estadísticas vuelven con cada solución y las publica el proceso principal
+    set_exporter(None)
+
+
+def _solve_job_chunk(key, network, backend, costs_chunk, time_limit, return_flows):
+    """
+    Resuelve un bloque de un trabajo con el modelo persistente de este hilo
+
+    Con procesos la red viaja una sola vez por worker: los bloques llegan
+    con network=None y, si este proceso todavía no tiene el modelo del
+    trabajo, se devuelve None para que el bloque se reenvíe con la red.
+    """
+    models = getattr(_LOCAL, 'models', None)
+    if models is None:
+        models = _LOCAL.models = OrderedDict()
+    model = models.get(key)
+    if model is None:
+        if network is None:
+            return None
+        model = models[key] = PersistentModel(network, backend)
+        while len(models) > _MODELS_PER_WORKER:
+            models.popitem(last=False)
+    models.move_to_end(key)
+    return _solve_chunk(model, 0, costs_chunk, time_limit, return_flows)[1]
+
+
+def perturbation_costs(network, factors=(0.9, 1.1), arcs=None, costs=None):
+    """
+    Matriz de costos de un barrido de perturbaciones arco por arco
+
+    La fila len(factors) * j + i es el costo base con el arco arcs[j]
+    multiplicado por factors[i], como en analyze_sensitivity.
+
+    Returns:
+        Matriz (len(arcs) * len(factors)) x arcos
+    """
+    costs = network.cost if costs is None else np.asarray(costs, dtype=float)
+    arcs = np.arange(network.n_arcs) if arcs is None else np.asarray(arcs, dtype=np.int64)
+    factors = np.asarray(factors, dtype=float)
+    matrix = np.repeat(costs[np.newaxis, :], len(arcs) * len(factors), axis=0)
+    rows = np.arange(len(matrix))
+    columns = np.repeat(arcs, len(factors))
+    matrix[rows, columns] *= np.tile(factors, len(arcs))
+    return matrix
+
+
+class Job:
+    """
+    Trabajo de un barrido de costos sobre una red
+
+    Los puntos se resuelven en bloques de chunk_size (cada bloque arranca en
+    frío y encadena arranques en caliente, como en ParallelSweep). Mientras
+    corre, results tiene la solución de cada punto terminado y None en los
+    pendientes; al cancelarse o vencer se conservan los puntos ya resueltos.
+
+    Attributes:
+        name: Nombre del trabajo
+        state: PENDIENTE, EN CURSO, TERMINADO, CANCELADO, VENCIDO o ERROR
+        total: Número de puntos
+        done: Puntos resueltos (incluye los recuperados del archivo de control)
+        restored: Puntos recuperados del archivo de control
+        results: FlowSolution de cada punto (None si no terminó)
+        error: Excepción que detuvo el trabajo, si state es ERROR
+    """
+
+    def __init__(self, runner, network, cost_matrix, backend, chunk_size, time_limit, timeout,
+                 checkpoint, return_flows, name):
+        self.name = name
+        self.network = network
+        self.cost_matrix = cost_matrix
+        self.backend = backend
+        self.chunk_size = max(1, int(chunk_size))
+        self.time_limit = time_limit
+        self.timeout = timeout
+        self.checkpoint = checkpoint
+        self.return_flows = return_flows
+        self.state = PENDING
+        self.total = len(cost_matrix)
+        self.done = 0
+        self.restored = 0
+        self.results = [None] * self.total
+        self.error = None
+        self._runner = runner
+        self._key = self._digest()
+        self._queue = asyncio.Queue()
+        self._file = None
+        self._task = None
+
+    def _digest(self):
+        """Hash de la red, de la matriz de costos y de las opciones del trabajo"""
+        network = self.network
+        digest = hashlib.sha1(f"{self.backend}|{self.return_flows}|".encode())
+        for array in (network.tail, network.head, network.supply, network.demand,
+                      network.capacity, network.lower, self.cost_matrix):
+            digest.update(np.ascontiguousarray(array).tobytes())
+            digest.update(b'|')
+        return digest.hexdigest()
+
+    def cancel(self):
+        """Cancela el trabajo; los puntos ya resueltos se conservan"""
+        if self._task is not None:
+            self._task.cancel()
+
+    async def wait(self):
+        """Espera a que el trabajo termine (de cualquier forma) y lo devuelve"""
+        await asyncio.shield(self._task)
+        return self
+
+    async def stream(self):
+        """
+        Entrega (índice, FlowSolution) de cada punto a medida que termina
+
+        Primero llegan los puntos recuperados del archivo de control. La
+        iteración termina cuando el trabajo termina, se cancela o vence.
+        """
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                self._queue.put_nowait(None)
+                return
+            yield item
+
+    def objectives(self):
+        """Costo total de cada punto (NaN si no terminó o no es óptimo)"""
+        return np.array([s.objective if s is not None and s.status == LpStatusOptimal
+                         else np.nan for s in self.results], dtype=float)
+
+    def _restore(self):
+        """Recupera los puntos del archivo de control, si es de este mismo trabajo"""
+        if self.checkpoint is None or not os.path.exists(self.checkpoint):
+            return
+        with open(self.checkpoint) as f:
+            lines = f.read().splitlines()
+        if not lines:
+            return
+        header = json.loads(lines[0])
+        if header.get('key') != self._key:
+            raise ValueError(f"El archivo de control {self.checkpoint} es de otro trabajo "
+                             f"(red, costos u opciones distintos)")
+        for line in lines[1:]:
+            try:
+                point = json.loads(line)
+            except json.JSONDecodeError:
+                # Última línea a medio escribir si el proceso se cortó
+                continue
+            flows = point.get('flows')
+            solution = FlowSolution(point['status'], point['objective'],
+                                    None if flows is None else np.asarray(flows), None, None,
+                                    point['iterations'])
+            if self.results[point['index']] is None:
+                self.done += 1
+                self.restored += 1
+            self.results[point['index']] = solution
+        for i, solution in enumerate(self.results):
+            if solution is not None:
+                self._queue.put_nowait((i, solution))
+
+    def _open_checkpoint(self):
+        if self.checkpoint is None:
+            return
+        size = os.path.getsize(self.checkpoint) if os.path.exists(self.checkpoint) else 0
+        torn = False
+        if size:
+            with open(self.checkpoint, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                torn = f.read(1) != b"\n"
+        self._file = open(self.checkpoint, 'a')
+        if torn:
+            # Cierra la línea a medio escribir para no pegarle el próximo bloque
+            self._file.write("\n")
+        if not size:
+            self._file.write(json.dumps({'key': self._key, 'points': self.total}) + "\n")
+            self._file.flush()
+
+    def _record(self, indices, solutions):
+        """Guarda un bloque resuelto, lo agrega al archivo de control y lo entrega"""
+        lines = []
+        for i, solution in zip(indices, solutions):
+            if self.results[i] is None:
+                self.done += 1
+            self.results[i] = solution
+            self._queue.put_nowait((i, solution))
+            if solution.status == LpStatusNotSolved:
+                # Interrumpida por límite de tiempo: al retomar se vuelve a resolver
+                continue
+            point = {'index': i, 'status': solution.status, 'objective': solution.objective,
+                     'iterations': solution.iterations}
+            if self.return_flows and solution.flows is not None:
+                point['flows'] = solution.flows.tolist()
+            lines.append(json.dumps(point))
+        if self._file is not None and lines:
+            self._file.write("\n".join(lines) + "\n")
+            self._file.flush()
+
+    async def _run(self):
+        runner = self._runner
+        try:
+            async with runner._jobs:
+                self.state = RUNNING
+                self._open_checkpoint()
+                await asyncio.wait_for(self._execute(), self.timeout)
+            self.state = FINISHED
+        except asyncio.TimeoutError:
+            self.state = TIMED_OUT
+        except asyncio.CancelledError:
+            self.state = CANCELLED
+        except Exception as exc:
+            self.state = FAILED
+            self.error = exc
+        finally:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._queue.put_nowait(None)
+
+    async def _execute(self):
+        """Envía los bloques pendientes al ejecutor, respetando el límite de bloques en curso"""
+        runner = self._runner
+        loop = asyncio.get_running_loop()
+        pending = [i for i, solution in enumerate(self.results) if solution is None]
+
+        async def run_chunk(indices):
+            costs_chunk = self.cost_matrix[indices]
+            async with runner._slots:
+                # En el pool de procesos la red no se serializa con cada bloque
+                network = None if runner._processes else self.network
+                solutions = await loop.run_in_executor(
+                    runner._executor, _solve_job_chunk, self._key, network, self.backend,
+                    costs_chunk, self.time_limit, self.return_flows)
+                if solutions is None:
+                    solutions = await loop.run_in_executor(
+                        runner._executor, _solve_job_chunk, self._key, self.network,
+                        self.backend, costs_chunk, self.time_limit, self.return_flows)
+            if runner._processes:
+                for solution in solutions:
+                    publish(solution.stats)
+            self._record(indices, solutions)
+
+        tasks = [asyncio.ensure_future(run_chunk(pending[start:start + self.chunk_size]))
+                 for start in range(0, len(pending), self.chunk_size)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def __repr__(self):
+        return f"Job({self.name!r}, {self.state}, {self.done}/{self.total})"
+
+
+class JobRunner:
+    """
+    Ejecutor asíncrono de trabajos de barrido
+
+    Los bloques de todos los trabajos comparten un pool de workers procesos
+    (o un hilo si workers es 1, para no bloquear el bucle de eventos). Como
+    mucho hay workers bloques en curso a la vez y max_jobs trabajos activos;
+    los demás esperan su turno, así que cancelar un trabajo solo deja
+    terminar los bloques que ya estaban en el pool.
+
+    Se usa como administrador de contexto asíncrono:
+
+        async with JobRunner(workers=4) as runner:
+            job = runner.submit(network, cost_matrix, checkpoint='barrido.jsonl')
+            async for index, solution in job.stream():
+                ...
+    """
+
+    def __init__(self, workers=None, max_jobs=None):
+        """
+        Args:
+            workers: Procesos del pool (por defecto os.cpu_count(); 1 = un hilo)
+            max_jobs: Trabajos que corren a la vez (None = sin límite)
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.max_jobs = max_jobs
+        self._processes = self.workers > 1
+        self._executor = None
+        self._slots = None
+        self._jobs = None
+        self.jobs = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def submit(self, network, cost_matrix, backend='simplex_red', chunk_size=32,
+               time_limit=None, timeout=None, checkpoint=None, return_flows=False, name=None):
+        """
+        Lanza un trabajo (debe llamarse desde el bucle de eventos)
+
+        Args:
+            network: TransshipmentNetwork sobre la que se resuelve
+            cost_matrix: Matriz K x arcos de costos (ver perturbation_costs)
+            backend: Resolutor a usar ('cbc', 'simplex_red' o 'highs')
+            chunk_size: Puntos por bloque enviado al pool
+            time_limit: Segundos máximos por resolución
+            timeout: Segundos máximos para todo el trabajo
+            checkpoint: Archivo JSONL donde se guarda cada punto resuelto; si
+                ya existe y es del mismo trabajo, esos puntos no se resuelven
+            return_flows: Si es True, las soluciones (y el archivo de control)
+                incluyen los flujos
+            name: Nombre del trabajo (por defecto 'trabajo_N')
+
+        Returns:
+            Job en ejecución
+        """
+        cost_matrix = np.atleast_2d(np.asarray(cost_matrix, dtype=float))
+        if cost_matrix.shape[1] != network.n_arcs:
+            raise ValueError(f"La matriz de costos tiene {cost_matrix.shape[1]} columnas y la "
+                             f"red {network.n_arcs} arcos")
+        if self._executor is None:
+            self._executor = (ProcessPoolExecutor(self.workers, initializer=_init_worker)
+                              if self._processes else ThreadPoolExecutor(1))
+            self._slots = asyncio.Semaphore(self.workers)
+            self._jobs = asyncio.Semaphore(self.max_jobs or 2 ** 30)
+        job = Job(self, network, cost_matrix, backend, chunk_size, time_limit, timeout,
+                  checkpoint, return_flows, name or f"trabajo_{len(self.jobs) + 1}")
+        job._restore()
+        job._task = asyncio.ensure_future(job._run())
+        self.jobs.append(job)
+        return job
+
+    async def close(self, cancel=False):
+        """
+        Espera a los trabajos lanzados (o los cancela) y cierra el pool
+
+        Args:
+            cancel: Si es True, cancela los trabajos que siguen en curso
+        """
+        if cancel:
+            for job in self.jobs:
+                job.cancel()
+        await asyncio.gather(*(job._task for job in self.jobs), return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,370 @@
+"""
+EXPANSIÓN DE CAPACIDAD - APERTURA DE TRANSBORDOS Y AMPLIACIONES CON COSTO FIJO
+Modelo de costo fijo en el que abrir un transbordo o ampliar la capacidad de
+una ruta son opciones binarias, resuelto por descomposición de Benders con el
+problema de flujo como subproblema
+"""
+
+import time
+
+from pulp import (PULP_CBC_CMD, LpBinary, LpMinimize, LpProblem, LpStatus, LpStatusOptimal,
+                  LpVariable, lpSum, value)
+import numpy as np
+
+from red_transbordo import TransshipmentNetwork
+from resolutores import _check_backend, solve_flow
+from simplex_red import NetworkSimplex
+
+# Nodo artificial por el que pasan los envíos de emergencia (demanda no atendida)
+EMERGENCY_NODE = 'EMERGENCIA'
+
+
+class ExpansionOption:
+    """
+    Opción binaria con costo fijo
+
+    Attributes:
+        name: Nombre de la opción (p. ej. 'Abrir_H2' o 'Ampliar_S1H1_200')
+        cost: Costo fijo de elegirla
+        arcs: Arcos cuya capacidad aporta
+        amounts: Capacidad que aporta a cada uno de esos arcos
+    """
+
+    def __init__(self, name, cost, arcs, amounts):
+        self.name = name
+        self.cost = float(cost)
+        self.arcs = np.asarray(arcs, dtype=np.int64)
+        self.amounts = np.asarray(amounts, dtype=float)
+
+
+class ExpansionModel:
+    """
+    Problema de apertura de transbordos y ampliación de capacidad
+
+    La capacidad de cada arco es lineal en las opciones elegidas: un arco que
+    sale de un transbordo candidato (o llega a él, si su origen no es
+    candidato) solo tiene capacidad si el transbordo se abre, y cada
+    ampliación suma su incremento a la capacidad de su arco. Un transbordo
+    cerrado no puede despachar nada, así que tampoco recibe flujo.
+    """
+
+    def __init__(self, network, hub_costs=None, capacity_options=None):
+        """
+        Args:
+            network: TransshipmentNetwork con las capacidades actuales
+            hub_costs: Diccionario {transbordo: costo de apertura} con los
+                transbordos candidatos; los demás quedan siempre abiertos
+            capacity_options: Lista de (arco, incremento, costo) con las
+                ampliaciones posibles
+        """
+        self.network = network
+        m = network.n_arcs
+        # Ningún arco lleva más que la oferta total: esa cota reemplaza a las
+        # capacidades infinitas de los arcos que dependen de una apertura
+        bound = float(network.supply.sum())
+        capacity = np.minimum(network.capacity, bound)
+        self.base_capacity = network.capacity.copy()
+        self.options = []
+
+        hub_ids = {network.node_ids[name]: name for name in (hub_costs or {})}
+        controlled = np.full(m, -1)
+        for h in hub_ids:
+            controlled[(network.head == h) & (controlled < 0)] = h
+        for h in hub_ids:
+            controlled[network.tail == h] = h
+        for h, name in hub_ids.items():
+            arcs = np.flatnonzero(controlled == h)
+            self.options.append(ExpansionOption(f"Abrir_{name}", hub_costs[name], arcs,
+                                                capacity[arcs]))
+        self.base_capacity[controlled >= 0] = 0.0
+
+        for arc_name, increment, cost in capacity_options or []:
+            k = network.arc_ids[arc_name]
+            self.options.append(ExpansionOption(f"Ampliar_{arc_name}_{increment:g}", cost,
+                                                [k], [increment]))
+
+        self.option_costs = np.array([option.cost for option in self.options])
+
+    @property
+    def n_options(self):
+        return len(self.options)
+
+    def capacity(self, selected):
+        """Capacidad de cada arco con las opciones elegidas (vector 0/1)"""
+        capacity = self.base_capacity.copy()
+        for option, chosen in zip(self.options, selected):
+            if chosen:
+                np.add.at(capacity, option.arcs, option.amounts)
+        return capacity
+
+    def capacity_gradient(self, weights):
+        """Para cada opción, la suma de weights sobre la capacidad que aporta"""
+        return np.array([float(weights[option.arcs] @ option.amounts) for option in self.options])
+
+
+class _FlowSubproblem:
+    """
+    Problema de flujo con las capacidades de una elección de opciones
+
+    Se agrega un nodo de emergencia con arcos desde cada oferta y hacia cada
+    demanda para que el subproblema siempre sea factible. Los arcos de
+    emergencia solo sirven para medir la factibilidad: unmet() minimiza el
+    flujo de emergencia y da los cortes de factibilidad, y solve() usa una
+    penalización mayor que cualquier ruta real para que la demanda que no se
+    puede atender de ninguna forma no vuelva infactible el subproblema. La
+    penalización nunca compite con los costos fijos: el maestro solo acepta
+    elecciones que atienden tanta demanda como abriendo todo.
+    """
+
+    def __init__(self, model, backend):
+        network = model.network
+        n, m = network.n_nodes, network.n_arcs
+        sources = np.flatnonzero(network.net_supply > 0)
+        sinks = np.flatnonzero(network.net_supply < 0)
+        self.penalty = 1.0 + (n + 1) * max(float(np.abs(network.cost).max(initial=0.0)), 1.0)
+
+        self.tail = np.concatenate([network.tail, sources, np.full(len(sinks), n)])
+        self.head = np.concatenate([network.head, np.full(len(sources), n), sinks])
+        self.cost = np.concatenate([network.cost, np.full(len(sources), self.penalty),
+                                    np.zeros(len(sinks))])
+        # En la fase de factibilidad solo cuesta lo que sale hacia la emergencia
+        self.unmet_cost = np.concatenate([np.zeros(m), np.ones(len(sources)),
+                                          np.zeros(len(sinks))])
+        self.lower = np.concatenate([network.lower, np.zeros(len(sources) + len(sinks))])
+        self.extra = len(sources) + len(sinks)
+        self.node_names = network.node_names + [EMERGENCY_NODE]
+        self.arc_names = network.arc_names + [f"{network.node_names[v]}{EMERGENCY_NODE}"
+                                              for v in sources.tolist()] + \
+                         [f"{EMERGENCY_NODE}{network.node_names[v]}" for v in sinks.tolist()]
+        self.supply = np.append(network.supply, 0.0)
+        self.demand = np.append(network.demand, 0.0)
+        self.n_arcs = m
+        self.backend = backend
+        self._bases = {}
+
+    def _solve(self, capacity, costs, phase):
+        """
+        Resuelve con las capacidades dadas y el vector de costos de una fase
+
+        Returns:
+            solution: FlowSolution del subproblema
+            weights: Cuánto baja el objetivo por unidad más de capacidad en
+                cada arco real
+        """
+        capacity = np.concatenate([capacity, np.full(self.extra, np.inf)])
+        network = TransshipmentNetwork(self.node_names, self.tail, self.head, costs,
+                                       self.supply, self.demand, capacity, self.lower,
+                                       self.arc_names)
+        if self.backend == 'simplex_red':
+            # Arranque desde la base de la iteración anterior de la misma fase:
+            # solo cambian capacidades
+            basis = self._bases.get(phase)
+            simplex = NetworkSimplex(network)
+            if basis is not None:
+                simplex.load_basis(*basis)
+            solution = simplex.solve(warm_start=basis is not None)
+            self._bases[phase] = simplex.basis()
+        else:
+            solution = solve_flow(network, backend=self.backend)
+        if solution.status != LpStatusOptimal:
+            raise RuntimeError(f"El subproblema de flujo terminó con estado "
+                               f"{LpStatus.get(solution.status, solution.status)}")
+
+        # Los arcos en su capacidad tienen costo reducido negativo: es lo que
+        # ahorraría una unidad más de capacidad
+        return solution, np.maximum(-solution.reduced_costs[:self.n_arcs], 0.0)
+
+    def unmet(self, capacity):
+        """
+        Returns:
+            unmet: Demanda mínima que queda sin atender con estas capacidades
+            weights: Cuánto baja unmet por unidad más de capacidad en cada arco real
+        """
+        solution, weights = self._solve(capacity, self.unmet_cost, 'factibilidad')
+        return solution.objective, weights
+
+    def solve(self, capacity):
+        """
+        Returns:
+            objective: Costo de flujo (incluye la penalización de emergencia)
+            weights: Precio de una unidad más de capacidad en cada arco real
+            solution: FlowSolution del subproblema
+        """
+        solution, weights = self._solve(capacity, self.cost, 'costo')
+        return solution.objective, weights, solution
+
+
+class ExpansionResult:
+    """
+    Resultado de la optimización de apertura y ampliación
+
+    Attributes:
+        selected: Nombres de las opciones elegidas
+        fixed_cost: Costo fijo de las opciones elegidas
+        flow_cost: Costo de transporte con esas opciones
+        penalty_cost: Penalización de la demanda sin atender
+        total_cost: fixed_cost + flow_cost + penalty_cost
+        flows: Flujo de cada arco de la red
+        capacity: Capacidad resultante de cada arco
+        lower_bound: Mejor cota inferior de Benders
+        iterations: Iteraciones (cortes) de Benders
+        history: Lista de (cota inferior, cota superior) por iteración
+        unmet_demand: Demanda que ni abriendo todo se puede atender
+        seconds: Tiempo total
+    """
+
+    def __init__(self, selected, fixed_cost, flow_cost, flows, capacity, lower_bound,
+                 iterations, history, unmet_demand, seconds, penalty_cost=0.0):
+        self.selected = selected
+        self.fixed_cost = fixed_cost
+        self.flow_cost = flow_cost
+        self.penalty_cost = penalty_cost
+        self.total_cost = fixed_cost + flow_cost + penalty_cost
+        self.flows = flows
+        self.capacity = capacity
+        self.lower_bound = lower_bound
+        self.iterations = iterations
+        self.history = history
+        self.unmet_demand = unmet_demand
+        self.seconds = seconds
+
+    @property
+    def gap(self):
+        """Brecha relativa entre la mejor solución y la cota inferior"""
+        return (self.total_cost - self.lower_bound) / max(1.0, abs(self.total_cost))
+
+
+def solve_benders(model, backend='simplex_red', tol=1e-6, max_iterations=200, time_limit=None):
+    """
+    Resuelve el modelo de expansión por descomposición de Benders
+
+    El maestro (MILP de CBC) elige las opciones y estima el costo de flujo
+    con la variable theta; el subproblema es el flujo de costo mínimo con
+    las capacidades elegidas. Si la elección deja más demanda sin atender
+    que abriendo todo (la primera iteración), se agrega el corte de
+    factibilidad sum_o f_o (y_o - y*_o) >= u* - u_min, donde u* es esa
+    demanda y f_o lo que baja por unidad de capacidad de la opción o. Si
+    no, se agrega el corte de optimalidad theta >= z - sum_o g_o (y_o - y*_o),
+    donde g_o es el ahorro por unidad de capacidad (costos reducidos de los
+    arcos saturados) sobre lo que aporta la opción o.
+
+    Args:
+        model: ExpansionModel
+        backend: Resolutor del subproblema ('simplex_red', 'cbc' o 'highs')
+        tol: Brecha relativa para terminar
+        max_iterations: Máximo de iteraciones
+        time_limit: Segundos máximos en total (None = sin límite)
+
+    Returns:
+        ExpansionResult con la mejor solución encontrada
+    """
+    _check_backend(backend)
+    start = time.perf_counter()
+    subproblem = _FlowSubproblem(model, backend)
+    n_options = model.n_options
+
+    master = LpProblem("Maestro_Benders", LpMinimize)
+    y = [LpVariable(f"y_{i}", cat=LpBinary) for i in range(n_options)]
+    costs = model.network.cost
+    theta = LpVariable("theta", lowBound=float(np.minimum(costs, 0.0) @ np.minimum(
+        model.network.capacity, model.network.supply.sum())))
+    master += lpSum(c * v for c, v in zip(model.option_costs.tolist(), y)) + theta
+
+    # Primera elección: todas las opciones (la más holgada); la demanda que
+    # queda sin atender así no se puede atender con ninguna elección
+    selected = np.ones(n_options)
+    best = None
+    min_unmet = None
+    unmet_tol = 1e-9 * max(1.0, float(model.network.supply.sum()))
+    lower_bound = -np.inf
+    history = []
+    iteration = 0
+    while iteration < max_iterations:
+        iteration += 1
+        capacity = model.capacity(selected)
+        unmet, unmet_weights = subproblem.unmet(capacity)
+        if min_unmet is None:
+            min_unmet = unmet
+        if unmet > min_unmet + unmet_tol:
+            gradient = model.capacity_gradient(unmet_weights)
+            master += lpSum(float(g) * (v - float(s)) for g, v, s in
+                            zip(gradient.tolist(), y, selected.tolist()) if g) >= \
+                unmet - min_unmet, f"Factibilidad_{iteration}"
+        else:
+            z, weights, solution = subproblem.solve(capacity)
+            total = float(model.option_costs @ selected) + z
+            if best is None or total < best[0] - 1e-9:
+                best = (total, selected.copy(), solution)
+
+            gradient = model.capacity_gradient(weights)
+            master += theta >= z - lpSum(float(g) * (v - float(s)) for g, v, s in
+                                         zip(gradient.tolist(), y, selected.tolist()) if g), \
+                f"Corte_{iteration}"
+
+        master.solve(PULP_CBC_CMD(msg=0))
+        if master.status != LpStatusOptimal:
+            raise RuntimeError(f"El maestro de Benders terminó con estado {LpStatus[master.status]}")
+        lower_bound = max(lower_bound, value(master.objective))
+        history.append((lower_bound, best[0]))
+        if best[0] - lower_bound <= tol * max(1.0, abs(best[0])):
+            break
+        if time_limit is not None and time.perf_counter() - start > time_limit:
+            break
+        selected = np.array([round(v.varValue or 0.0) for v in y], dtype=float)
+
+    return _result(model, subproblem, best, lower_bound, iteration, history,
+                   time.perf_counter() - start)
+
+
+def _result(model, subproblem, best, lower_bound, iterations, history, seconds):
+    total, selected, solution = best
+    m = model.network.n_arcs
+    flows = solution.flows[:m]
+    emergency = solution.flows[m:]
+    fixed_cost = float(model.option_costs @ selected)
+    flow_cost = float(model.network.cost @ flows)
+    names = [option.name for option, chosen in zip(model.options, selected) if chosen]
+    # Cada unidad no atendida pasa por dos arcos de emergencia
+    unmet = float(emergency.sum()) / 2
+    return ExpansionResult(names, fixed_cost, flow_cost, flows, model.capacity(selected),
+                           lower_bound, iterations, history, unmet, seconds,
+                           subproblem.penalty * unmet)
+
+
+def solve_milp(model, time_limit=None):
+    """
+    Resuelve el modelo de expansión completo con CBC (sin descomponer)
+
+    Sirve como referencia para instancias chicas: flujos y opciones en un
+    mismo MILP con las restricciones de capacidad x_k <= u_k(y).
+
+    Returns:
+        ExpansionResult (lower_bound es el objetivo del MILP)
+    """
+    start = time.perf_counter()
+    network = model.network
+    prob, arc_vars = network.build_lp(name="Expansion_Capacidad")
+    y = [LpVariable(f"y_{i}", cat=LpBinary) for i in range(model.n_options)]
+    prob.setObjective(prob.objective + lpSum(c * v for c, v in zip(model.option_costs.tolist(), y)))
+    for var in arc_vars:
+        var.upBound = None
+
+    contributions = [[] for _ in range(network.n_arcs)]
+    for option, v in zip(model.options, y):
+        for k, amount in zip(option.arcs.tolist(), option.amounts.tolist()):
+            contributions[k].append((amount, v))
+    base = model.base_capacity.tolist()
+    for k, var in enumerate(arc_vars):
+        if np.isfinite(base[k]):
+            prob += var <= base[k] + lpSum(a * v for a, v in contributions[k]), f"Capacidad_{k}"
+
+    prob.solve(PULP_CBC_CMD(msg=0, timeLimit=time_limit))
+    if prob.status != LpStatusOptimal:
+        raise RuntimeError(f"El MILP terminó con estado {LpStatus[prob.status]}")
+    selected = np.array([round(v.varValue or 0.0) for v in y], dtype=float)
+    flows = np.array([var.varValue or 0.0 for var in arc_vars])
+    fixed_cost = float(model.option_costs @ selected)
+    names = [option.name for option, chosen in zip(model.options, selected) if chosen]
+    return ExpansionResult(names, fixed_cost, float(network.cost @ flows), flows,
+                           model.capacity(selected), value(prob.objective), 1, [], 0.0,
+                           time.perf_counter() - start)
@@ -0,0 +1,423 @@
+"""
+INSTANCIAS DE REFERENCIA - PRUEBAS DE REGRESIÓN CON SOLUCIONES CONOCIDAS
+Cada instancia de referencia guarda la red (formato columnar) junto con el
+objetivo, los flujos y los precios sombra esperados; el verificador resuelve
+todas las instancias con cada backend y cada camino de resolución y las
+compara en bloque
+"""
+
+import argparse
+import json
+import os
+import tempfile
+
+from pulp import LpStatus, LpStatusOptimal
+import numpy as np
+
+from benchmark_red import generate_network
+from cache_soluciones import SolveCache
+from carga_datos import load_columnar, save_columnar
+from expansion_capacidad import ExpansionModel, solve_benders, solve_milp
+from red_transbordo import FlowSolution, TransshipmentNetwork, default_network
+from reduccion_transporte import is_two_stage, solve_two_stage
+from resolutores import BACKENDS, PersistentModel, solve_flow, solve_lp
+from verificacion import verify_solution
+
+REFERENCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'referencias')
+
+# Caso de estudio del proyecto (S1-S2, H1-H3, D1-D5), usado por los reportes
+REFERENCE_CASE = os.path.join(REFERENCE_DIR, 'caso_estudio')
+
+# Caminos de resolución que se comparan con cada backend:
+#   'directo'    -> solve_flow (arreglos; con 'cbc' pasa por PuLP)
+#   'pulp'       -> solve_lp y extracción desde el modelo de PuLP
+#   'persistente'-> PersistentModel, resolviendo antes otros costos (arranque en caliente)
+#   'cache'      -> SolveCache: acierto sobre los costos escalados por un factor
+#   'cache_disco'-> SolveCache guardada en disco y cargada en una caché nueva
+#   'transporte' -> reducción a transporte (solo redes de dos etapas sin capacidades)
+#   'presolve'   -> PersistentModel con preproceso_red.presolve, resolviendo antes
+#                   otros costos (la red reducida puede cambiar entre resoluciones)
+PATHS = ('directo', 'pulp', 'persistente', 'cache', 'cache_disco', 'transporte', 'presolve')
+
+# Apertura de transbordos y ampliaciones sobre el caso de estudio: Benders con
+# cada backend debe dar el mismo costo total que el MILP completo
+#   (nombre, con capacidades, costos de apertura, ampliaciones)
+EXPANSION_CASES = (
+    ('expansion_apertura_cara', False, {'H1': 1e6, 'H2': 1e6, 'H3': 1e6}, None),
+    ('expansion_apertura_barata', False, {'H1': 10, 'H2': 20}, None),
+    ('expansion_ampliaciones', True, {'H1': 5000, 'H2': 8000, 'H3': 3000},
+     [('S1H1', 200, 1500), ('H2D4', 100, 900)]),
+)
+
+
+class ReferenceInstance:
+    """
+    Instancia de referencia con su solución esperada
+
+    El estado, el objetivo y la factibilidad se comparan siempre. Los flujos y
+    los precios sombra pueden no ser únicos (soluciones degeneradas; los
+    precios sombra se comparan ya normalizados con
+    TransshipmentNetwork.normalize_duals), así que solo se comparan si
+    compare_flows / compare_duals lo indican.
+
+    Attributes:
+        name: Nombre de la instancia (carpeta)
+        network: TransshipmentNetwork
+        status: Estado esperado (código de PuLP)
+        objective: Objetivo esperado (None si no es óptima)
+        flows: Flujos esperados (o None)
+        duals: Precios sombra esperados (o None)
+        compare_flows: Si los flujos deben coincidir
+        compare_duals: Si los precios sombra deben coincidir
+        tol: Tolerancia relativa: del objetivo respecto de su valor, y de flujos y
+            factibilidad respecto de la mayor oferta o demanda
+        description: Texto libre
+    """
+
+    def __init__(self, name, network, status, objective=None, flows=None, duals=None,
+                 compare_flows=False, compare_duals=False, tol=1e-6, description=""):
+        self.name = name
+        self.network = network
+        self.status = status
+        self.objective = objective
+        self.flows = flows
+        self.duals = duals
+        self.compare_flows = compare_flows
+        self.compare_duals = compare_duals
+        self.tol = tol
+        self.description = description
+
+    def check(self, solution, compare_duals=True):
+        """
+        Compara una solución con la esperada
+
+        Los precios sombra se validan siempre con las condiciones de
+        optimalidad (costos reducidos >= 0 en los arcos en su cota inferior,
+        <= 0 en los saturados y 0 en los demás).
+
+        Args:
+            solution: FlowSolution a comparar
+            compare_duals: False para no exigir los precios sombra esperados
+                aunque la instancia los compare (caminos que resuelven otro LP
+                y pueden dar otro vértice dual igual de válido)
+
+        Returns:
+            Lista de diferencias encontradas (vacía si la solución es correcta)
+        """
+        if solution.status != self.status:
+            return [f"estado {LpStatus[solution.status]}, se esperaba {LpStatus[self.status]}"]
+        if self.status != LpStatusOptimal:
+            return []
+
+        errors = []
+        scale = max(1.0, abs(self.objective))
+        if abs(solution.objective - self.objective) > self.tol * scale:
+            errors.append(f"objetivo {solution.objective:.6f}, se esperaba {self.objective:.6f}")
+        recomputed = float(self.network.cost @ solution.flows)
+        if abs(recomputed - solution.objective) > self.tol * scale:
+            errors.append(f"objetivo informado {solution.objective:.6f} y costo de los "
+                          f"flujos {recomputed:.6f} no coinciden")
+        # Los flujos de CBC vuelven por archivo con precisión limitada: la
+        # factibilidad se mide relativa a la mayor oferta o demanda
+        size = max(1.0, float(np.abs(self.network.net_supply).max(initial=0.0)))
+        report = verify_solution(self.network, solution.flows, self.tol * size)
+        if not report.ok:
+            errors.append(f"solución infactible (balance {report.max_balance_violation:.2e}, "
+                          f"capacidad {report.max_capacity_violation:.2e}, "
+                          f"mínimo {report.max_lower_violation:.2e})")
+        if self.compare_flows:
+            gap = np.abs(solution.flows - self.flows)
+            if gap.max(initial=0.0) > self.tol * size:
+                k = int(gap.argmax())
+                errors.append(f"flujo de {self.network.arc_names[k]} = {solution.flows[k]:.6f}, "
+                              f"se esperaba {self.flows[k]:.6f}")
+        network = self.network
+        y = solution.duals * network.row_sign
+        reduced = network.cost - y[network.tail] + y[network.head]
+        at_lower = solution.flows <= network.lower + self.tol * size
+        at_upper = solution.flows >= network.capacity - self.tol * size
+        violation = np.where(at_lower & at_upper, 0.0,
+                             np.where(at_lower, -reduced,
+                                      np.where(at_upper, reduced, np.abs(reduced))))
+        cost_scale = max(1.0, float(np.abs(network.cost).max(initial=0.0)))
+        if violation.max(initial=0.0) > self.tol * cost_scale:
+            k = int(violation.argmax())
+            errors.append(f"precios sombra no óptimos: costo reducido de "
+                          f"{network.arc_names[k]} = {reduced[k]:.6f} con flujo "
+                          f"{solution.flows[k]:.6f}")
+        if self.compare_duals and compare_duals:
+            gap = np.abs(solution.duals - self.duals)
+            if gap.max(initial=0.0) > self.tol:
+                v = int(gap.argmax())
+                errors.append(f"precio sombra de {self.network.node_names[v]} = "
+                              f"{solution.duals[v]:.6f}, se esperaba {self.duals[v]:.6f}")
+        return errors
+
+
+def save_reference(directory, network, solution, compare_flows=False, compare_duals=False,
+                   tol=1e-6, description=""):
+    """
+    Guarda una instancia de referencia
+
+    La red va en formato columnar (carga_datos.save_columnar), los flujos y
+    precios sombra esperados en flujos.npy y duales.npy, y el resto en
+    esperado.json.
+
+    Args:
+        directory: Carpeta de la instancia
+        network: TransshipmentNetwork
+        solution: FlowSolution de referencia
+        compare_flows: Si los flujos son únicos y deben compararse
+        compare_duals: Si los precios sombra son únicos y deben compararse
+        tol: Tolerancia de la comparación
+        description: Texto libre
+    """
+    save_columnar(network, directory)
+    optimal = solution.status == LpStatusOptimal
+    expected = {
+        'status': LpStatus[solution.status],
+        'objective': float(solution.objective) if optimal else None,
+        'compare_flows': compare_flows and optimal,
+        'compare_duals': compare_duals and optimal,
+        'tol': tol,
+        'description': description,
+    }
+    for key, array in (('flujos', solution.flows), ('duales', solution.duals)):
+        path = os.path.join(directory, f"{key}.npy")
+        if optimal:
+            np.save(path, np.asarray(array, dtype=np.float64))
+        elif os.path.exists(path):
+            os.remove(path)
+    with open(os.path.join(directory, 'esperado.json'), 'w') as f:
+        json.dump(expected, f, indent=2, ensure_ascii=False)
+
+
+def load_reference(directory):
+    """Carga una instancia guardada con save_reference"""
+    with open(os.path.join(directory, 'esperado.json')) as f:
+        expected = json.load(f)
+    arrays = {}
+    for key in ('flujos', 'duales'):
+        path = os.path.join(directory, f"{key}.npy")
+        arrays[key] = np.load(path) if os.path.exists(path) else None
+    status = {text: code for code, text in LpStatus.items()}[expected['status']]
+    return ReferenceInstance(os.path.basename(os.path.normpath(directory)),
+                             load_columnar(directory, mmap=False), status,
+                             expected['objective'], arrays['flujos'], arrays['duales'],
+                             expected['compare_flows'], expected['compare_duals'],
+                             expected['tol'], expected['description'])
+
+
+def load_references(directory=REFERENCE_DIR):
+    """Carga todas las instancias de referencia de una carpeta, en orden alfabético"""
+    return [load_reference(os.path.join(directory, name))
+            for name in sorted(os.listdir(directory))
+            if os.path.exists(os.path.join(directory, name, 'esperado.json'))]
+
+
+def solve_path(network, backend, path):
+    """
+    Resuelve la red por uno de los caminos de PATHS
+
+    Returns:
+        FlowSolution
+    """
+    if path == 'directo':
+        return solve_flow(network, backend=backend)
+    if path == 'pulp':
+        prob, arc_vars = solve_lp(network, backend=backend)
+        return FlowSolution.from_lp(network, prob, arc_vars)
+    if path == 'persistente':
+        model = PersistentModel(network, backend)
+        model.solve(network.cost[::-1])
+        return model.solve()
+    if path in ('cache', 'cache_disco'):
+        cache = SolveCache()
+        PersistentModel(network, backend, cache=cache).solve(network.cost * 3.0)
+        if path == 'cache_disco':
+            with tempfile.TemporaryDirectory() as tmp:
+                cache.save(os.path.join(tmp, 'cache.pkl'))
+                cache = SolveCache(path=os.path.join(tmp, 'cache.pkl'))
+        solution = PersistentModel(network, backend, cache=cache).solve()
+        if not cache.hits:
+            raise RuntimeError("La resolución no se respondió desde la caché")
+        return solution
+    if path == 'transporte':
+        if not is_two_stage(network):
+            raise NotImplementedError("La red no admite la reducción a transporte")
+        return solve_two_stage(network, backend=backend)
+    if path == 'presolve':
+        model = PersistentModel(network, backend, presolve=True)
+        model.solve(network.cost[::-1])
+        return model.solve()
+    raise ValueError(f"Camino desconocido: {path!r}. Opciones: {', '.join(PATHS)}")
+
+
+def run_references(references=None, backends=BACKENDS, paths=PATHS, verbose=True):
+    """
+    Resuelve todas las instancias con cada backend y camino y las compara
+
+    Los backends que no se pueden usar en este entorno (p. ej. 'highs' sin
+    scipy) y los caminos que no se aplican a la instancia (p. ej.
+    'transporte' con capacidades) se informan como omitidos.
+
+    Args:
+        references: Lista de ReferenceInstance (por defecto las de REFERENCE_DIR)
+        backends: Backends a verificar
+        paths: Caminos de resolución a verificar
+
+    Returns:
+        Lista de diccionarios con instancia, backend, camino, estado
+        ('OK', 'FALLA' u 'OMITIDO') y detalle
+    """
+    references = load_references() if references is None else references
+    results = []
+    if verbose:
+        print(f"{'Instancia':28} | {'Backend':11} | {'Camino':11} | Estado")
+        print("-" * 80)
+    for reference in references:
+        for backend in backends:
+            for path in paths:
+                try:
+                    # La reducción a transporte resuelve otro LP: en una red
+                    # degenerada sus precios sombra pueden ser otro vértice dual
+                    errors = reference.check(solve_path(reference.network, backend, path),
+                                             compare_duals=path != 'transporte')
+                    state = 'FALLA' if errors else 'OK'
+                except (ImportError, NotImplementedError) as exc:
+                    errors, state = [str(exc)], 'OMITIDO'
+                except Exception as exc:
+                    errors, state = [f"{type(exc).__name__}: {exc}"], 'FALLA'
+                results.append({'instance': reference.name, 'backend': backend, 'path': path,
+                                'state': state, 'errors': errors})
+                if verbose:
+                    detail = f"  {errors[0]}" if errors else ""
+                    print(f"{reference.name:28} | {backend:11} | {path:11} | {state}{detail}")
+    return results
+
+
+def run_expansion_checks(backends=BACKENDS, verbose=True, tol=1e-6):
+    """
+    Compara solve_benders con cada backend contra solve_milp en EXPANSION_CASES
+
+    Returns:
+        Lista de diccionarios como los de run_references (camino 'benders')
+    """
+    results = []
+    for name, with_capacity, hub_costs, capacity_options in EXPANSION_CASES:
+        model = ExpansionModel(default_network(with_capacity=with_capacity), hub_costs,
+                               capacity_options)
+        expected = solve_milp(model)
+        for backend in backends:
+            try:
+                result = solve_benders(model, backend=backend)
+                errors = []
+                if abs(result.total_cost - expected.total_cost) > tol * max(1.0, expected.total_cost):
+                    errors.append(f"costo total {result.total_cost:.6f} "
+                                  f"({', '.join(result.selected) or 'nada'}), el MILP da "
+                                  f"{expected.total_cost:.6f} ({', '.join(expected.selected)})")
+                if result.gap < -tol:
+                    errors.append(f"brecha negativa {result.gap:.6f}")
+                state = 'FALLA' if errors else 'OK'
+            except ImportError as exc:
+                errors, state = [str(exc)], 'OMITIDO'
+            except Exception as exc:
+                errors, state = [f"{type(exc).__name__}: {exc}"], 'FALLA'
+            results.append({'instance': name, 'backend': backend, 'path': 'benders',
+                            'state': state, 'errors': errors})
+            if verbose:
+                detail = f"  {errors[0]}" if errors else ""
+                print(f"{name:28} | {backend:11} | {'benders':11} | {state}{detail}")
+    return results
+
+
+def _direct_two_stage(seed=3):
+    """
+    Red de dos etapas sin capacidades (4 fuentes, 3 transbordos, 6 destinos)
+    en la que los arcos directos fuente -> destino son más baratos que
+    cualquier ruta por un transbordo: ninguna ruta óptima usa los transbordos
+    """
+    rng = np.random.default_rng(seed)
+    n_s, n_h, n_d = 4, 3, 6
+    sources, hubs = np.arange(n_s), n_s + np.arange(n_h)
+    dests = n_s + n_h + np.arange(n_d)
+    tail = np.concatenate([np.repeat(sources, n_h), np.repeat(hubs, n_d), np.repeat(sources, n_d)])
+    head = np.concatenate([np.tile(hubs, n_s), np.tile(dests, n_h), np.tile(dests, n_s)])
+    cost = np.concatenate([rng.integers(4, 9, n_s * n_h), rng.integers(4, 9, n_h * n_d),
+                           rng.integers(1, 8, n_s * n_d)]).astype(float)
+    demand = rng.integers(50, 200, n_d).astype(float)
+    supply = np.full(n_s, demand.sum() / n_s)
+    names = ([f"S{i + 1}" for i in range(n_s)] + [f"H{i + 1}" for i in range(n_h)] +
+             [f"D{i + 1}" for i in range(n_d)])
+    return TransshipmentNetwork(names, tail, head, cost,
+                                np.concatenate([supply, np.zeros(n_h + n_d)]),
+                                np.concatenate([np.zeros(n_s + n_h), demand]))
+
+
+def build_references(directory=REFERENCE_DIR, backend='cbc'):
+    """
+    Regenera las instancias de referencia que acompañan al proyecto
+
+    Solo debe usarse cuando cambia intencionalmente el conjunto de instancias;
+    las soluciones esperadas se calculan con backend.
+    """
+    base = default_network()
+    capacitated = default_network(with_capacity=True)
+    infeasible = TransshipmentNetwork(capacitated.node_names, capacitated.tail, capacitated.head,
+                                      capacitated.cost, capacitated.supply, capacitated.demand,
+                                      capacitated.capacity * 0.5, capacitated.lower,
+                                      capacitated.arc_names)
+    # (nombre, red, flujos únicos, precios sombra únicos, descripción); en el
+    # caso de estudio los precios sombra normalizados deben coincidir en
+    # todos los backends
+    cases = [
+        ('dos_etapas_directa', _direct_two_stage(), False, False,
+         "Red de dos etapas con arcos directos más baratos que cualquier transbordo"),
+        ('caso_estudio', base, True, True,
+         "Caso de estudio: solución única de costo 15500"),
+        ('caso_estudio_capacidad', capacitated, True, False, "Caso de estudio con capacidades"),
+        ('caso_estudio_infactible', infeasible, False, False,
+         "Caso de estudio con la mitad de las capacidades: infactible"),
+        ('aleatoria_1000', generate_network(1000, seed=1), False, False,
+         "Red aleatoria de unos 1000 arcos sin capacidades (flujos degenerados)"),
+        ('aleatoria_1000_holgura', generate_network(1000, tightness=0.7, seed=2), False, False,
+         "Red aleatoria de unos 1000 arcos con capacidades ajustadas (holgura 0.7)"),
+    ]
+    for name, network, unique_flows, unique_duals, description in cases:
+        solution = solve_flow(network, backend=backend)
+        save_reference(os.path.join(directory, name), network, solution,
+                       compare_flows=unique_flows, compare_duals=unique_duals,
+                       description=description)
+
+
+def main():
+    """Función principal del verificador de regresión"""
+    parser = argparse.ArgumentParser(
+        description="Verifica todos los backends y caminos contra las instancias de referencia")
+    parser.add_argument('--dir', default=REFERENCE_DIR, help="Carpeta de las instancias")
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument('--paths', nargs='+', default=list(PATHS), choices=PATHS)
+    parser.add_argument('--regenerate', action='store_true',
+                        help="Vuelve a generar las instancias (cambia las soluciones esperadas)")
+    args = parser.parse_args()
+
+    print("="*80)
+    print("VERIFICACIÓN CONTRA INSTANCIAS DE REFERENCIA")
+    print("="*80 + "\n")
+    if args.regenerate:
+        build_references(args.dir)
+        print(f"Instancias regeneradas en {args.dir}\n")
+
+    results = run_references(load_references(args.dir), args.backends, args.paths)
+    results += run_expansion_checks(args.backends)
+    counts = {state: sum(r['state'] == state for r in results)
+              for state in ('OK', 'FALLA', 'OMITIDO')}
+    print("-" * 80)
+    print(f"OK: {counts['OK']}  |  Fallas: {counts['FALLA']}  |  Omitidos: {counts['OMITIDO']}")
+    if counts['FALLA']:
+        raise SystemExit(1)
+    print("\n✅ Todas las instancias coinciden con su solución de referencia")
+
+
+if __name__ == "__main__":
+    main()
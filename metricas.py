@@ -0,0 +1,203 @@
+"""
+MÉTRICAS - TIEMPOS POR FASE Y ESTADÍSTICAS DE CADA RESOLUCIÓN
+Registro estructurado de cada resolución y exportación opcional a un archivo
+de métricas (líneas JSON o formato de texto de Prometheus)
+"""
+
+from contextlib import contextmanager
+import json
+import os
+import re
+import time
+
+from pulp import LpStatus
+
+FORMATS = ('jsonl', 'prometheus')
+
+# Nombres de etiqueta válidos en Prometheus
+_LABEL_NAME = re.compile(r'[a-zA-Z_][a-zA-Z0-9_]*')
+
+# Exportador global al que se publican todas las resoluciones (None = ninguno)
+_EXPORTER = None
+
+
+class SolveStats:
+    """
+    Estadísticas de una resolución
+
+    Attributes:
+        backend: Resolutor usado
+        n_variables: Número de variables (arcos) del modelo
+        n_constraints: Número de restricciones (nodos) del modelo
+        phases: Segundos de cada fase, en el orden en que ocurrieron. Con CBC:
+            build/objective (modelo de PuLP), write (MPS), solver (proceso
+            CBC), parse (lectura de la solución) y extract (arreglos); en
+            proceso: build, initialize/pivots o solve; con caché: lookup; con
+            preproceso se suman presolve y postsolve
+        iterations: Iteraciones del resolutor o pivotes del simplex de redes
+        status: Estado de PuLP de la resolución
+        objective: Valor de la función objetivo
+        cache_hit: True si la solución salió de la caché sin resolver
+    """
+
+    def __init__(self, backend, n_variables, n_constraints, cache_hit=False):
+        self.backend = backend
+        self.n_variables = n_variables
+        self.n_constraints = n_constraints
+        self.phases = {}
+        self.iterations = None
+        self.status = None
+        self.objective = None
+        self.cache_hit = cache_hit
+        self.timestamp = time.time()
+
+    @classmethod
+    def for_network(cls, network, backend, cache_hit=False):
+        return cls(backend, network.n_arcs, network.n_nodes, cache_hit)
+
+    @contextmanager
+    def phase(self, name):
+        """Mide el tiempo de un bloque y lo acumula en la fase indicada"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @property
+    def total_time(self):
+        return sum(self.phases.values())
+
+    def finish(self, status, objective, iterations=None):
+        """Registra el resultado de la resolución y lo publica en el exportador global"""
+        self.status = status
+        self.objective = objective
+        if iterations is not None:
+            self.iterations = iterations
+        publish(self)
+        return self
+
+    def to_dict(self):
+        return {
+            'timestamp': self.timestamp,
+            'backend': self.backend,
+            'status': LpStatus.get(self.status, str(self.status)),
+            'objective': self.objective,
+            'variables': self.n_variables,
+            'constraints': self.n_constraints,
+            'iterations': self.iterations,
+            'cache_hit': self.cache_hit,
+            'total_seconds': self.total_time,
+            'phases': dict(self.phases),
+        }
+
+    def __repr__(self):
+        phases = ", ".join(f"{name}={seconds:.4f}s" for name, seconds in self.phases.items())
+        return (f"SolveStats({self.backend}, {LpStatus.get(self.status, self.status)}, "
+                f"{self.n_variables} vars x {self.n_constraints} rest., "
+                f"iter={self.iterations}, cache={self.cache_hit}, {phases})")
+
+
+class MetricsExporter:
+    """
+    Escribe las estadísticas de las resoluciones en un archivo de métricas
+
+    En formato 'jsonl' se agrega una línea por resolución. En formato
+    'prometheus' se mantienen contadores acumulados y el archivo se reescribe
+    completo en cada publicación (para el colector textfile de node_exporter).
+    """
+
+    def __init__(self, path, format='jsonl', labels=None, prefix='transbordo'):
+        """
+        Args:
+            path: Archivo de salida
+            format: 'jsonl' o 'prometheus'
+            labels: Etiquetas fijas agregadas a cada registro (p. ej. {'corrida': 'plan_q3'})
+            prefix: Prefijo de los nombres de las métricas de Prometheus
+        """
+        if format not in FORMATS:
+            raise ValueError(f"Formato desconocido: {format!r}. Opciones: {', '.join(FORMATS)}")
+        for name in labels or {}:
+            if not isinstance(name, str) or not _LABEL_NAME.fullmatch(name):
+                raise ValueError(f"Nombre de etiqueta inválido: {name!r} (debe cumplir "
+                                 f"{_LABEL_NAME.pattern})")
+        self.path = path
+        self.format = format
+        self.labels = dict(labels or {})
+        self.prefix = prefix
+        self._counters = {}
+
+    def record(self, stats):
+        """Publica una resolución"""
+        if self.format == 'jsonl':
+            with open(self.path, 'a') as f:
+                f.write(json.dumps({**self.labels, **stats.to_dict()}) + "\n")
+            return
+
+        labels = {**self.labels, 'backend': stats.backend}
+        status = LpStatus.get(stats.status, str(stats.status))
+        self._add('solves_total', {**labels, 'status': status}, 1)
+        self._add('cache_hits_total', labels, int(stats.cache_hit))
+        self._add('iterations_total', labels, stats.iterations or 0)
+        self._add('solve_seconds_total', labels, stats.total_time)
+        for name, seconds in stats.phases.items():
+            self._add('phase_seconds_total', {**labels, 'phase': name}, seconds)
+        self._counters[('model_variables', _label_key(labels))] = stats.n_variables
+        self._counters[('model_constraints', _label_key(labels))] = stats.n_constraints
+        self._write_prometheus()
+
+    def _add(self, metric, labels, amount):
+        key = (metric, _label_key(labels))
+        self._counters[key] = self._counters.get(key, 0) + amount
+
+    def _write_prometheus(self):
+        lines = []
+        current = None
+        for (metric, labels), amount in sorted(self._counters.items()):
+            name = f"{self.prefix}_{metric}"
+            if metric != current:
+                kind = 'gauge' if metric.startswith('model_') else 'counter'
+                lines.append(f"# TYPE {name} {kind}")
+                current = metric
+            label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+            lines.append(f"{name}{{{label_text}}} {amount}")
+
+        # Escritura atómica para que el colector nunca lea un archivo a medias
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, self.path)
+
+
+def _label_key(labels):
+    # Valores ya escapados para el formato de texto de Prometheus
+    return tuple(sorted((k, _escape_label(str(v))) for k, v in labels.items()))
+
+
+def _escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def set_exporter(exporter):
+    """
+    Define el exportador global de métricas (None para desactivarlo)
+
+    Returns:
+        El exportador anterior
+    """
+    global _EXPORTER
+    previous, _EXPORTER = _EXPORTER, exporter
+    return previous
+
+
+def get_exporter():
+    return _EXPORTER
+
+
+def publish(stats):
+    """Envía un registro al exportador global, si hay uno"""
+    if _EXPORTER is not None and stats is not None:
+        _EXPORTER.record(stats)
@@ -0,0 +1,309 @@
+"""
+PREPROCESO DE LA RED - PODA DE ARCOS DOMINADOS Y CONTRACCIÓN DE TRANSBORDOS
+Reduce la red antes de enviarla a cualquier backend y reconstruye después la
+solución completa (flujos, precios sombra y costos reducidos) de la red original
+"""
+
+import numpy as np
+from pulp import LpStatusOptimal
+
+from red_transbordo import FlowSolution, TransshipmentNetwork
+
+# Elementos máximos de la matriz de distancias de cada bloque de Dijkstra
+_BLOCK_ELEMENTS = 1 << 22
+
+
+class PresolvedNetwork:
+    """
+    Red reducida y mapa para reconstruir la solución de la red original
+
+    Cada arco de la red reducida es un camino de arcos originales (un solo
+    arco si no se contrajo nada); el flujo del arco reducido pasa por todos
+    los arcos de su camino y su costo es la suma de sus costos. Los arcos
+    podados quedan con flujo cero.
+
+    Attributes:
+        network: Red original
+        reduced: TransshipmentNetwork reducida que se envía al resolutor
+        costs: Costos de la red original con que se hizo el preproceso
+        counts: Arcos podados por regla ('paralelos', 'dominados') y
+            transbordos contraídos ('contraidos')
+    """
+
+    def __init__(self, network, costs, reduced, paths, kept_nodes, contractions, counts):
+        self.network = network
+        self.costs = costs
+        self.reduced = reduced
+        self.counts = counts
+        self._kept_nodes = kept_nodes
+        self._contractions = contractions
+        self._lengths = np.array([len(p) for p in paths], dtype=np.int64)
+        self._flat = (np.concatenate([np.asarray(p, dtype=np.int64) for p in paths])
+                      if paths else np.zeros(0, dtype=np.int64))
+
+    @property
+    def structure(self):
+        """
+        Clave de la forma de la red reducida
+
+        Dos preprocesos de la misma red con la misma clave dan redes reducidas
+        que solo difieren en los costos, así que pueden resolverse con el mismo
+        modelo persistente.
+        """
+        return (self._kept_nodes.tobytes(), self._lengths.tobytes(), self._flat.tobytes())
+
+    def postsolve(self, solution):
+        """
+        Solución de la red original a partir de la solución de la red reducida
+
+        Los potenciales de los transbordos contraídos se eligen de modo que
+        los costos reducidos de sus arcos cumplan holgura complementaria, y
+        los arcos podados quedan con costo reducido no negativo.
+
+        Args:
+            solution: FlowSolution de self.reduced
+
+        Returns:
+            FlowSolution en los arcos de la red original
+        """
+        network = self.network
+        if solution.status != LpStatusOptimal:
+            zeros = np.zeros(network.n_arcs)
+            return FlowSolution(solution.status, None, zeros, np.zeros(network.n_nodes),
+                                zeros.copy(), solution.iterations, solution.stats)
+
+        flows = np.bincount(self._flat, weights=np.repeat(solution.flows, self._lengths),
+                            minlength=network.n_arcs)
+
+        y = np.zeros(network.n_nodes)
+        y[self._kept_nodes] = solution.duals * self.reduced.row_sign
+        for v, rule, arcs in reversed(self._contractions):
+            y[v] = _contracted_potential(rule, arcs, y)
+
+        costs = self.costs
+        reduced_costs = costs - y[network.tail] + y[network.head]
+        return FlowSolution(solution.status, float(costs @ flows), flows,
+                            network.normalize_duals(network.row_sign * y), reduced_costs, solution.iterations,
+                            solution.stats)
+
+
+def _contracted_potential(rule, arcs, y):
+    """
+    Potencial de un transbordo contraído
+
+    Cada arco de trabajo es (origen, destino, costo, capacidad). 'in' iguala
+    a cero el costo reducido del único arco de entrada y 'out' el del único
+    de salida; 'series' elige según cuál de los dos limita el flujo; los
+    transbordos sin salidas (o sin entradas) toman el valor extremo que deja
+    todos sus arcos con costo reducido no negativo.
+    """
+    if rule == 'series':
+        (i, _, cost_in, cap_in), (_, j, cost_out, cap_out) = arcs
+        if cost_in + cost_out - y[i] + y[j] < 0 and cap_in <= cap_out:
+            return y[j] + cost_out
+        return y[i] - cost_in
+    if rule == 'in':
+        i, _, cost, _ = arcs[0]
+        return y[i] - cost
+    if rule == 'out':
+        _, j, cost, _ = arcs[0]
+        return y[j] + cost
+    if rule == 'sink':
+        return max(y[i] - cost for i, _, cost, _ in arcs)
+    if rule == 'source':
+        return min(y[j] + cost for _, j, cost, _ in arcs)
+    return 0.0
+
+
+def _parallel_dominated(network, costs, candidates):
+    """
+    Arcos con un arco paralelo sin capacidad de costo menor o igual
+
+    Entre arcos paralelos sin capacidad y del mismo costo se conserva el de
+    menor índice.
+    """
+    dominated = np.zeros(network.n_arcs, dtype=bool)
+    free = np.flatnonzero(np.isinf(network.capacity))
+    if not len(free):
+        return dominated
+    # Por cada par (origen, destino): el arco sin capacidad más barato
+    pairs = network.tail * network.n_nodes + network.head
+    order = free[np.lexsort((free, costs[free], pairs[free]))]
+    first = np.r_[True, pairs[order][1:] != pairs[order][:-1]]
+    keeper = dict(zip(pairs[order][first].tolist(), order[first].tolist()))
+
+    for k in np.flatnonzero(candidates).tolist():
+        b = keeper.get(int(pairs[k]))
+        if b is not None and b != k and costs[b] <= costs[k]:
+            dominated[k] = True
+    return dominated
+
+
+def _path_dominated(network, costs, candidates, removed):
+    """
+    Arcos (i, j) con un camino i -> j de arcos sin capacidad estrictamente más barato
+
+    En toda solución dual óptima y_i - y_j no supera el costo de ese camino,
+    así que el costo reducido del arco es positivo y su flujo es cero en
+    toda solución óptima. Requiere scipy y costos no negativos en los arcos
+    sin capacidad; si no se cumple, no poda nada.
+    """
+    dominated = np.zeros(network.n_arcs, dtype=bool)
+    try:
+        from scipy.sparse import csr_matrix
+        from scipy.sparse.csgraph import dijkstra
+    except ImportError:
+        return dominated
+    free = np.flatnonzero(np.isinf(network.capacity) & ~removed)
+    if not len(free) or np.any(costs[free] < 0):
+        return dominated
+
+    # csr_matrix suma los arcos paralelos: se deja solo el más barato de cada par
+    n = network.n_nodes
+    pairs = network.tail[free] * n + network.head[free]
+    order = np.lexsort((costs[free], pairs))
+    first = np.r_[True, pairs[order][1:] != pairs[order][:-1]]
+    arcs = free[order][first]
+    graph = csr_matrix((costs[arcs], (network.tail[arcs], network.head[arcs])), shape=(n, n))
+
+    arcs = np.flatnonzero(candidates & ~removed)
+    tails = np.unique(network.tail[arcs])
+    block = max(1, _BLOCK_ELEMENTS // max(n, 1))
+    row = np.full(n, -1, dtype=np.int64)
+    for start in range(0, len(tails), block):
+        sources = tails[start:start + block]
+        in_block = arcs[np.isin(network.tail[arcs], sources)]
+        limit = float(costs[in_block].max())
+        dist = dijkstra(graph, indices=sources, limit=limit)
+        row[sources] = np.arange(len(sources))
+        best = dist[row[network.tail[in_block]], network.head[in_block]]
+        tol = 1e-9 * np.maximum(1.0, np.abs(costs[in_block]))
+        dominated[in_block[best < costs[in_block] - tol]] = True
+    return dominated
+
+
+def presolve(network, costs=None, dominance=True, contract=True):
+    """
+    Reduce la red para la resolución con costos dados
+
+    Reglas, todas exactas (la red reducida tiene el mismo costo óptimo y la
+    solución se reconstruye con PresolvedNetwork.postsolve):
+
+    - Arcos paralelos: se poda un arco si hay otro entre los mismos nodos sin
+      capacidad y de costo menor o igual.
+    - Arcos dominados por costo reducido: se poda un arco (i, j) si existe un
+      camino i -> j de arcos sin capacidad estrictamente más barato (con scipy).
+    - Transbordos de paso: un transbordo con una sola entrada sin capacidad
+      (o una sola salida sin capacidad, o una entrada y una salida) se
+      contrae uniendo sus arcos; los transbordos sin entradas o sin salidas
+      se eliminan con sus arcos.
+
+    Solo se podan o contraen arcos con cota inferior cero. La poda depende de
+    los costos, por eso el preproceso se hace para cada vector de costos.
+
+    Args:
+        network: TransshipmentNetwork a reducir
+        costs: Vector de costos (por defecto los de la red)
+        dominance: Aplicar la poda de arcos paralelos y dominados
+        contract: Aplicar la contracción de transbordos
+
+    Returns:
+        PresolvedNetwork
+    """
+    costs = network.cost if costs is None else np.asarray(costs, dtype=float)
+    n, m = network.n_nodes, network.n_arcs
+    counts = {'paralelos': 0, 'dominados': 0, 'contraidos': 0}
+
+    removed = np.zeros(m, dtype=bool)
+    if dominance and m:
+        candidates = network.lower == 0
+        parallel = _parallel_dominated(network, costs, candidates)
+        removed |= parallel
+        counts['paralelos'] = int(parallel.sum())
+        dominated = _path_dominated(network, costs, candidates, removed)
+        removed |= dominated
+        counts['dominados'] = int(dominated.sum())
+
+    # Arcos de trabajo: (origen, destino, costo, capacidad), cota inferior y camino original
+    kept = np.flatnonzero(~removed)
+    tail, head = network.tail[kept].tolist(), network.head[kept].tolist()
+    cost, capacity = costs[kept].tolist(), network.capacity[kept].tolist()
+    lower = network.lower[kept].tolist()
+    paths = [[k] for k in kept.tolist()]
+    alive = [True] * len(kept)
+    in_arcs = [set() for _ in range(n)]
+    out_arcs = [set() for _ in range(n)]
+    for a in range(len(kept)):
+        out_arcs[tail[a]].add(a)
+        in_arcs[head[a]].add(a)
+
+    contractions = []
+    contracted = np.zeros(n, dtype=bool)
+    if contract:
+        b = network.net_supply
+        stack = np.flatnonzero(b == 0).tolist()[::-1]
+        while stack:
+            v = stack.pop()
+            if contracted[v]:
+                continue
+            ins, outs = list(in_arcs[v]), list(out_arcs[v])
+            if any(lower[a] for a in ins + outs):
+                continue
+            if not outs or not ins:
+                rule = 'sink' if ins else 'source' if outs else 'isolated'
+                new_arcs = []
+            elif len(ins) == 1 and (np.isinf(capacity[ins[0]]) or len(outs) == 1):
+                a = ins[0]
+                rule = 'in' if np.isinf(capacity[a]) else 'series'
+                new_arcs = [(a, c) for c in outs]
+            elif len(outs) == 1 and np.isinf(capacity[outs[0]]):
+                rule = 'out'
+                new_arcs = [(c, outs[0]) for c in ins]
+            else:
+                continue
+            # Un arco de un nodo a sí mismo no se puede representar
+            if any(tail[a] == head[c] for a, c in new_arcs):
+                continue
+
+            # Arcos que necesita la regla para recuperar el potencial de v
+            if rule == 'series':
+                arcs = [(tail[a], head[a], cost[a], capacity[a]) for a in ins + outs]
+            elif rule == 'in':
+                arcs = [(tail[a], head[a], cost[a], capacity[a]) for a in ins]
+            elif rule == 'out':
+                arcs = [(tail[c], head[c], cost[c], capacity[c]) for c in outs]
+            else:
+                arcs = [(tail[a], head[a], cost[a], capacity[a]) for a in ins + outs]
+            contractions.append((v, rule, arcs))
+            contracted[v] = True
+            counts['contraidos'] += 1
+            for a in ins + outs:
+                alive[a] = False
+                out_arcs[tail[a]].discard(a)
+                in_arcs[head[a]].discard(a)
+            neighbors = {tail[a] for a in ins} | {head[a] for a in outs}
+            for a, c in new_arcs:
+                tail.append(tail[a])
+                head.append(head[c])
+                cost.append(cost[a] + cost[c])
+                capacity.append(min(capacity[a], capacity[c]))
+                lower.append(0.0)
+                paths.append(paths[a] + paths[c])
+                alive.append(True)
+                out_arcs[tail[-1]].add(len(tail) - 1)
+                in_arcs[head[-1]].add(len(tail) - 1)
+            stack.extend(w for w in neighbors if b[w] == 0 and not contracted[w])
+
+    live = [a for a in range(len(tail)) if alive[a]]
+    kept_nodes = np.flatnonzero(~contracted)
+    new_id = np.full(n, -1, dtype=np.int64)
+    new_id[kept_nodes] = np.arange(len(kept_nodes))
+    names = network.node_names
+    reduced = TransshipmentNetwork(
+        [names[v] for v in kept_nodes.tolist()],
+        new_id[np.asarray([tail[a] for a in live], dtype=np.int64)],
+        new_id[np.asarray([head[a] for a in live], dtype=np.int64)],
+        [cost[a] for a in live], network.supply[kept_nodes], network.demand[kept_nodes],
+        [capacity[a] for a in live], [lower[a] for a in live])
+    return PresolvedNetwork(network, costs, reduced, [paths[a] for a in live], kept_nodes,
+                            contractions, counts)
@@ -4,25 +4,47 @@ Solución completa con optimización y análisis de sensibilidad integrado
 """
 
 from pulp import *
-import copy
+import numpy as np
+
+from cache_soluciones import SolveCache
+from expansion_capacidad import ExpansionModel, solve_benders
+from instancias_referencia import REFERENCE_CASE, load_reference
+from red_multiperiodo import RollingHorizon, print_plan
+from red_multiproducto import MultiCommodityNetwork, solve_column_generation
+from red_transbordo import ORIGINAL_COSTS, FlowSolution, default_network
+from reportes import export_solution, print_summary
+from resolutores import solve_lp
+from sensibilidad_analitica import cost_curves
+from barrido_paralelo import solve_many
+from simulacion_montecarlo import CostSampler, MonteCarloSimulation
+from verificacion import print_verification
 
 class TransshipmentProblem:
     """
     Clase para resolver y analizar problemas de transbordo
     """
 
-    def __init__(self):
-        """Inicializa el problema con los parámetros por defecto"""
-        self.original_costs = {
-            'S1H1': 4, 'S1H2': 6, 'S1H3': 5,
-            'S2H1': 3, 'S2H2': 4, 'S2H3': 6,
-            'H1D1': 8, 'H1D2': 6, 'H1D3': 7, 'H1D4': 9,
-            'H2D1': 7, 'H2D2': 5, 'H2D3': 6, 'H2D4': 4, 'H2D5': 5,
-            'H3D2': 8, 'H3D3': 5, 'H3D4': 7, 'H3D5': 6
-        }
+    def __init__(self, backend='cbc', workers=1, cache=None, presolve=False):
+        """
+        Inicializa el problema con los parámetros por defecto
+
+        Args:
+            backend: Resolutor a usar ('cbc' o 'simplex_red', ver resolutores.BACKENDS)
+            workers: Procesos para los barridos de sensibilidad y escenarios
+            cache: SolveCache compartida (por defecto una nueva en memoria)
+            presolve: Si es True, las resoluciones y los barridos usan la red
+                reducida por preproceso_red.presolve
+        """
+        self.network = default_network()
+        self.backend = backend
+        self.workers = workers
+        self.cache = SolveCache() if cache is None else cache
+        self.presolve = presolve
+        self.original_costs = dict(ORIGINAL_COSTS)
         self.prob = None
         self.variables = None
         self.objective_value = None
+        self.solution = None
 
     def solve_with_costs(self, costs_dict):
         """
@@ -36,68 +58,44 @@ class TransshipmentProblem:
             variables: Diccionario de variables
             objective_value: Valor de la función objetivo
         """
-        prob = LpProblem("Transbordo", LpMinimize)
-
-        # Variables de decisión
-        S1H1 = LpVariable("S1H1", lowBound=0)
-        S1H2 = LpVariable("S1H2", lowBound=0)
-        S1H3 = LpVariable("S1H3", lowBound=0)
-        S2H1 = LpVariable("S2H1", lowBound=0)
-        S2H2 = LpVariable("S2H2", lowBound=0)
-        S2H3 = LpVariable("S2H3", lowBound=0)
-
-        H1D1 = LpVariable("H1D1", lowBound=0)
-        H1D2 = LpVariable("H1D2", lowBound=0)
-        H1D3 = LpVariable("H1D3", lowBound=0)
-        H1D4 = LpVariable("H1D4", lowBound=0)
-
-        H2D1 = LpVariable("H2D1", lowBound=0)
-        H2D2 = LpVariable("H2D2", lowBound=0)
-        H2D3 = LpVariable("H2D3", lowBound=0)
-        H2D4 = LpVariable("H2D4", lowBound=0)
-        H2D5 = LpVariable("H2D5", lowBound=0)
-
-        H3D2 = LpVariable("H3D2", lowBound=0)
-        H3D3 = LpVariable("H3D3", lowBound=0)
-        H3D4 = LpVariable("H3D4", lowBound=0)
-        H3D5 = LpVariable("H3D5", lowBound=0)
-
-        variables = {
-            'S1H1': S1H1, 'S1H2': S1H2, 'S1H3': S1H3,
-            'S2H1': S2H1, 'S2H2': S2H2, 'S2H3': S2H3,
-            'H1D1': H1D1, 'H1D2': H1D2, 'H1D3': H1D3, 'H1D4': H1D4,
-            'H2D1': H2D1, 'H2D2': H2D2, 'H2D3': H2D3, 'H2D4': H2D4, 'H2D5': H2D5,
-            'H3D2': H3D2, 'H3D3': H3D3, 'H3D4': H3D4, 'H3D5': H3D5
-        }
-
-        # Función Objetivo
-        prob += (costs_dict['S1H1']*S1H1 + costs_dict['S1H2']*S1H2 + costs_dict['S1H3']*S1H3 +
-                 costs_dict['S2H1']*S2H1 + costs_dict['S2H2']*S2H2 + costs_dict['S2H3']*S2H3 +
-                 costs_dict['H1D1']*H1D1 + costs_dict['H1D2']*H1D2 + costs_dict['H1D3']*H1D3 + costs_dict['H1D4']*H1D4 +
-                 costs_dict['H2D1']*H2D1 + costs_dict['H2D2']*H2D2 + costs_dict['H2D3']*H2D3 + costs_dict['H2D4']*H2D4 + costs_dict['H2D5']*H2D5 +
-                 costs_dict['H3D2']*H3D2 + costs_dict['H3D3']*H3D3 + costs_dict['H3D4']*H3D4 + costs_dict['H3D5']*H3D5), "Costo_Total"
-
-        # Restricciones
-        prob += S1H1 + S1H2 + S1H3 == 900, "Oferta_S1"
-        prob += S2H1 + S2H2 + S2H3 == 700, "Oferta_S2"
-        prob += S1H1 + S2H1 == H1D1 + H1D2 + H1D3 + H1D4, "Balance_H1"
-        prob += S1H2 + S2H2 == H2D1 + H2D2 + H2D3 + H2D4 + H2D5, "Balance_H2"
-        prob += S1H3 + S2H3 == H3D2 + H3D3 + H3D4 + H3D5, "Balance_H3"
-        prob += H1D1 + H2D1 == 300, "Demanda_D1"
-        prob += H1D2 + H2D2 + H3D2 == 250, "Demanda_D2"
-        prob += H1D3 + H2D3 + H3D3 == 350, "Demanda_D3"
-        prob += H1D4 + H2D4 + H3D4 == 400, "Demanda_D4"
-        prob += H2D5 + H3D5 == 300, "Demanda_D5"
-
-        prob.solve(PULP_CBC_CMD(msg=0))
+        prob, arc_vars = solve_lp(self.network, self.network.costs_from_dict(costs_dict),
+                                  self.backend, "Transbordo", self.presolve)
+        variables = dict(zip(self.network.arc_names, arc_vars))
 
         return prob, variables, value(prob.objective)
 
     def solve_original(self):
         """Resuelve el problema con los costos originales"""
         self.prob, self.variables, self.objective_value = self.solve_with_costs(self.original_costs)
+        # Solución en arreglos (flujos, costos reducidos y precios sombra) para
+        # los reportes; además queda en la caché: los escenarios que solo
+        # escalan los costos se responden sin volver a resolver
+        self.solution = FlowSolution.from_lp(self.network, self.prob, list(self.variables.values()))
+        self.cache.put(self.network, self.network.costs_from_dict(self.original_costs), self.solution)
         return self.prob, self.variables, self.objective_value
 
+    def export_solution(self, path, format='csv'):
+        """
+        Exporta la solución completa en una sola escritura (ver reportes.export_solution)
+
+        Args:
+            path: Ruta base sin extensión
+            format: 'csv', 'json' o 'npy'
+
+        Returns:
+            Lista de archivos escritos
+        """
+        if self.solution is None:
+            raise RuntimeError("Primero debe resolver el problema usando solve_original()")
+        return export_solution(self.network, self.solution, path, format)
+
+    def print_summary(self, top=10):
+        """Imprime solo los top arcos y restricciones más relevantes (ver reportes.print_summary)"""
+        if self.solution is None:
+            print("⚠️  Primero debe resolver el problema usando solve_original()")
+            return
+        print_summary(self.network, self.solution, top)
+
     def display_solution(self):
         """Muestra la solución óptima del problema"""
         if self.prob is None:
@@ -149,39 +147,7 @@ class TransshipmentProblem:
         print(f"\n{'='*80}")
         print("VERIFICACIÓN DE RESTRICCIONES")
         print(f"{'='*80}")
-
-        print("\nOFERTA DE FUENTES:")
-        print("-" * 80)
-        s1_total = value(self.variables['S1H1']) + value(self.variables['S1H2']) + value(self.variables['S1H3'])
-        s2_total = value(self.variables['S2H1']) + value(self.variables['S2H2']) + value(self.variables['S2H3'])
-        print(f"  S1: {s1_total:.2f} / 900 {'OK' if abs(s1_total - 900) < 0.01 else 'ERROR'}")
-        print(f"  S2: {s2_total:.2f} / 700 {'OK' if abs(s2_total - 700) < 0.01 else 'ERROR'}")
-
-        print("\nBALANCE EN TRANSBORDOS:")
-        print("-" * 80)
-        h1_in = value(self.variables['S1H1']) + value(self.variables['S2H1'])
-        h1_out = value(self.variables['H1D1']) + value(self.variables['H1D2']) + value(self.variables['H1D3']) + value(self.variables['H1D4'])
-        h2_in = value(self.variables['S1H2']) + value(self.variables['S2H2'])
-        h2_out = value(self.variables['H2D1']) + value(self.variables['H2D2']) + value(self.variables['H2D3']) + value(self.variables['H2D4']) + value(self.variables['H2D5'])
-        h3_in = value(self.variables['S1H3']) + value(self.variables['S2H3'])
-        h3_out = value(self.variables['H3D2']) + value(self.variables['H3D3']) + value(self.variables['H3D4']) + value(self.variables['H3D5'])
-        print(f"  H1: Entrada={h1_in:.2f}, Salida={h1_out:.2f}, Balance={h1_in-h1_out:.2f} {'OK' if abs(h1_in-h1_out) < 0.01 else 'ERROR'}")
-        print(f"  H2: Entrada={h2_in:.2f}, Salida={h2_out:.2f}, Balance={h2_in-h2_out:.2f} {'OK' if abs(h2_in-h2_out) < 0.01 else 'ERROR'}")
-        print(f"  H3: Entrada={h3_in:.2f}, Salida={h3_out:.2f}, Balance={h3_in-h3_out:.2f} {'OK' if abs(h3_in-h3_out) < 0.01 else 'ERROR'}")
-
-        print("\nDEMANDA EN DESTINOS:")
-        print("-" * 80)
-        d1_supply = value(self.variables['H1D1']) + value(self.variables['H2D1'])
-        d2_supply = value(self.variables['H1D2']) + value(self.variables['H2D2']) + value(self.variables['H3D2'])
-        d3_supply = value(self.variables['H1D3']) + value(self.variables['H2D3']) + value(self.variables['H3D3'])
-        d4_supply = value(self.variables['H1D4']) + value(self.variables['H2D4']) + value(self.variables['H3D4'])
-        d5_supply = value(self.variables['H2D5']) + value(self.variables['H3D5'])
-
-        print(f"  D1: Recibe={d1_supply:.2f}, Necesita=300 {'OK' if abs(d1_supply-300) < 0.01 else 'ERROR'}")
-        print(f"  D2: Recibe={d2_supply:.2f}, Necesita=250 {'OK' if abs(d2_supply-250) < 0.01 else 'ERROR'}")
-        print(f"  D3: Recibe={d3_supply:.2f}, Necesita=350 {'OK' if abs(d3_supply-350) < 0.01 else 'ERROR'}")
-        print(f"  D4: Recibe={d4_supply:.2f}, Necesita=400 {'OK' if abs(d4_supply-400) < 0.01 else 'ERROR'}")
-        print(f"  D5: Recibe={d5_supply:.2f}, Necesita=300 {'OK' if abs(d5_supply-300) < 0.01 else 'ERROR'}")
+        print_verification(self.network, self.solution.flows)
 
     def _visualize_flow(self):
         """Visualiza el flujo de materiales"""
@@ -247,13 +213,8 @@ class TransshipmentProblem:
         print("COMPARACIÓN CON SOLUCIÓN CONOCIDA")
         print(f"{'='*80}")
 
-        known_solution = {
-            'S1H1': 550, 'S1H2': 0, 'S1H3': 350,
-            'S2H1': 0, 'S2H2': 700, 'S2H3': 0,
-            'H1D1': 300, 'H1D2': 250, 'H1D3': 0, 'H1D4': 0,
-            'H2D1': 0, 'H2D2': 0, 'H2D3': 0, 'H2D4': 400, 'H2D5': 300,
-            'H3D2': 0, 'H3D3': 350, 'H3D4': 0, 'H3D5': 0
-        }
+        reference = load_reference(REFERENCE_CASE)
+        known_solution = dict(zip(reference.network.arc_names, reference.flows.tolist()))
 
         all_match = True
         print("\nVariable | Calculado | Conocido | Estado")
@@ -265,7 +226,7 @@ class TransshipmentProblem:
             status = "✓" if match else "✗"
             print(f"{var_name:8} | {calc_value:9.2f} | {known_value:8.2f} | {status}")
 
-        known_cost = 15500
+        known_cost = reference.objective
         cost_match = abs(self.objective_value - known_cost) < 0.01
         all_match = all_match and cost_match
 
@@ -354,19 +315,22 @@ class TransshipmentProblem:
 
         self.sensitivity_results = []
 
-        for var_name in self.original_costs.keys():
+        # Cada perturbación solo cambia un costo: las filas 2k y 2k+1 son el
+        # -10% y el +10% del arco k, y se resuelven todas en un único barrido
+        base_costs = self.network.costs_from_dict(self.original_costs)
+        arcs = np.arange(self.network.n_arcs)
+        perturbed = np.repeat(base_costs[np.newaxis, :], 2 * len(arcs), axis=0)
+        perturbed[2 * arcs, arcs] *= 0.9
+        perturbed[2 * arcs + 1, arcs] *= 1.1
+        objectives = self.solve_many(perturbed)
+
+        for k, var_name in enumerate(self.network.arc_names):
             base_cost = self.original_costs[var_name]
 
-            # Probar con -10%
-            costs_minus = copy.deepcopy(self.original_costs)
-            costs_minus[var_name] = base_cost * 0.9
-            _, _, cost_minus = self.solve_with_costs(costs_minus)
+            # Probar con -10% y +10%
+            cost_minus = objectives[2 * k]
+            cost_plus = objectives[2 * k + 1]
             change_minus = cost_minus - self.objective_value
-
-            # Probar con +10%
-            costs_plus = copy.deepcopy(self.original_costs)
-            costs_plus[var_name] = base_cost * 1.1
-            _, _, cost_plus = self.solve_with_costs(costs_plus)
             change_plus = cost_plus - self.objective_value
 
             # Determinar sensibilidad
@@ -389,6 +353,50 @@ class TransshipmentProblem:
             for var_name, base_cost, max_change, _ in critical_routes:
                 print(f"   - {var_name}: Impacto maximo = +/-{max_change:.2f}")
 
+    def analyze_cost_curves(self, max_cost=None, arcs=None):
+        """
+        Curva exacta del costo total al variar el costo unitario de cada ruta
+
+        Los tramos salen del pivoteo paramétrico desde la base óptima (ver
+        sensibilidad_analitica.cost_curves): en cada tramo el flujo de la
+        ruta es constante y es la pendiente del costo total.
+
+        Args:
+            max_cost: Costo unitario máximo del recorrido (por defecto el doble del actual)
+            arcs: Rutas a analizar (por defecto todas)
+
+        Returns:
+            Lista de CostCurve
+        """
+        print(f"\n{'='*80}")
+        print("CURVAS DE COSTO TOTAL POR RUTA")
+        print(f"{'='*80}\n")
+
+        costs = self.network.costs_from_dict(self.original_costs)
+        curves = cost_curves(self.network, arcs, max_cost, costs)
+
+        print("Ruta   | Costo Unitario Desde | Hasta  | Flujo de la Ruta | Costo Total Desde")
+        print("-" * 80)
+        for curve in curves:
+            for i, flow in enumerate(curve.arc_flows):
+                print(f"{curve.arc if i == 0 else '':6} | {curve.breakpoints[i]:20.2f} | "
+                      f"{curve.breakpoints[i + 1]:6.2f} | {flow:16.2f} | {curve.costs[i]:17.2f}")
+        return curves
+
+    def solve_many(self, cost_matrix, return_flows=False):
+        """
+        Resuelve varios vectores de costos en un solo lote (en paralelo si workers > 1)
+
+        Args:
+            cost_matrix: Matriz K x arcos de costos (columnas en el orden de network.arc_names)
+            return_flows: Si es True, también devuelve la matriz dispersa de flujos
+
+        Returns:
+            Vector de K costos totales y, si se pide, la matriz K x arcos de flujos
+        """
+        return solve_many(self.network, cost_matrix, self.backend, self.workers,
+                          return_flows, cache=self.cache, presolve=self.presolve)
+
     def _simulate_scenarios(self):
         """Simula diferentes escenarios de costos"""
         print(f"\n{'='*80}")
@@ -405,15 +413,189 @@ class TransshipmentProblem:
         print("-" * 80)
         print(f"{'Base':22} | {1.0:6.2f} | {self.objective_value:11.2f} | {0:11.2f} | {0:8.2f}%")
 
-        for scenario_name, factor in scenarios.items():
-            scenario_costs = {k: v * factor for k, v in self.original_costs.items()}
-            _, _, scenario_cost = self.solve_with_costs(scenario_costs)
+        base_costs = self.network.costs_from_dict(self.original_costs)
+        factors = np.array(list(scenarios.values()))
+        objectives = self.solve_many(factors[:, np.newaxis] * base_costs)
+
+        for (scenario_name, factor), scenario_cost in zip(scenarios.items(), objectives):
             change = scenario_cost - self.objective_value
             change_pct = (change / self.objective_value) * 100
 
             print(f"{scenario_name:22} | {factor:6.2f} | {scenario_cost:11.2f} | "
                   f"{change:11.2f} | {change_pct:8.2f}%")
 
+    def simulate_monte_carlo(self, n_samples=10000, distribution='normal', hub_correlation=0.0,
+                             seed=None, batch_size=2048, **sampler_options):
+        """
+        Simulación Monte Carlo con costos aleatorios por arco
+
+        Args:
+            n_samples: Número de vectores de costos a muestrear
+            distribution: 'normal' o 'triangular'
+            hub_correlation: Correlación entre arcos del mismo transbordo (0 a 1)
+            seed: Semilla del generador aleatorio
+            batch_size: Muestras generadas y resueltas por lote
+            **sampler_options: sigma (normal) o low, mode, high (triangular)
+
+        Returns:
+            MonteCarloResult con la distribución del costo total
+        """
+        if self.objective_value is None:
+            self.solve_original()
+
+        print(f"\n{'='*80}")
+        print("SIMULACIÓN MONTE CARLO")
+        print(f"{'='*80}\n")
+
+        base_costs = self.network.costs_from_dict(self.original_costs)
+        sampler = CostSampler(self.network, distribution, hub_correlation=hub_correlation,
+                              base_costs=base_costs, seed=seed, **sampler_options)
+        simulation = MonteCarloSimulation(self.network, self.backend, self.workers, batch_size)
+        result = simulation.run(n_samples, sampler)
+
+        print(f"Muestras: {result.n_samples} ({distribution}, correlación por transbordo = "
+              f"{hub_correlation:.2f})")
+        print(f"Muestras con solución óptima: {result.n_optimal}")
+        summary = result.summary()
+        print(f"Costo total medio: {summary['media']:,.2f} (desviación {summary['desviacion']:,.2f})")
+        print(f"Costo base:        {self.objective_value:,.2f}\n")
+
+        print("Percentil | Costo Total | Cambio vs Base")
+        print("-" * 42)
+        for q, cost in summary['percentiles'].items():
+            print(f"P{q:<8} | {cost:11.2f} | {cost - self.objective_value:14.2f}")
+
+        print("\nRuta   | Frecuencia de Uso | Flujo Medio")
+        print("-" * 42)
+        for var_name, frequency, mean_flow in zip(self.network.arc_names, result.usage_frequency,
+                                                  result.mean_flows):
+            print(f"{var_name:6} | {frequency * 100:16.1f}% | {mean_flow:11.2f}")
+
+        return result
+
+    def plan_rolling_horizon(self, supply, demand, window=7, frozen=1, transit=None,
+                             holding_cost=0.0, initial_inventory=None, days_shown=7):
+        """
+        Plan multiperíodo con inventario en los transbordos y horizonte rodante
+
+        Args:
+            supply: Oferta por día y nodo (días x nodos, en el orden de network.node_names)
+            demand: Demanda por día y nodo
+            window: Días de cada ventana de optimización
+            frozen: Días que se ejecutan tras cada resolución
+            transit: Días de tránsito de cada arco (por defecto 0)
+            holding_cost: Costo por unidad y día de inventario (escalar o {nodo: costo})
+            initial_inventory: Inventario inicial ({nodo: unidades})
+            days_shown: Días del plan que se imprimen
+
+        Returns:
+            RollingHorizonResult con el plan ejecutado
+        """
+        print(f"\n{'='*80}")
+        print("PLAN MULTIPERÍODO (HORIZONTE RODANTE)")
+        print(f"{'='*80}\n")
+
+        result = RollingHorizon(self.network, supply, demand, window, frozen, transit=transit,
+                                holding_cost=holding_cost, initial_inventory=initial_inventory,
+                                backend=self.backend).run()
+        print(f"Días: {len(result.daily_cost)} | Ventana: {window} días | Congelados: {frozen} | "
+              f"Ventanas resueltas: {len(result.statuses)}")
+        if not result.completed:
+            print(f"⚠️  La ventana {len(result.statuses)} no tiene solución factible")
+        print_plan(self.network, result, days_shown)
+        return result
+
+    def optimize_expansion(self, hub_costs, capacity_options=None, max_iterations=200,
+                           network=None):
+        """
+        Decide qué transbordos abrir y qué rutas ampliar (descomposición de Benders)
+
+        Args:
+            hub_costs: Diccionario {transbordo: costo de apertura}
+            capacity_options: Lista de (ruta, incremento, costo) con las ampliaciones posibles
+            max_iterations: Máximo de iteraciones de Benders
+            network: Red con las capacidades actuales (por defecto el caso de
+                estudio con capacidades: sin ellas ampliar no cambia nada)
+
+        Returns:
+            ExpansionResult con las opciones elegidas
+        """
+        print(f"\n{'='*80}")
+        print("APERTURA DE TRANSBORDOS Y AMPLIACIÓN DE CAPACIDAD")
+        print(f"{'='*80}\n")
+
+        network = default_network(with_capacity=True) if network is None else network
+        model = ExpansionModel(network, hub_costs, capacity_options)
+        result = solve_benders(model, backend=self.backend, max_iterations=max_iterations)
+
+        print(f"Opciones evaluadas: {model.n_options} | Iteraciones de Benders: {result.iterations} | "
+              f"Brecha: {result.gap * 100:.4f}%")
+        print(f"Opciones elegidas: {', '.join(result.selected) or 'ninguna'}")
+        print(f"Costo fijo: {result.fixed_cost:,.2f} | Costo de transporte: {result.flow_cost:,.2f} | "
+              f"Total: {result.total_cost:,.2f}")
+        if result.unmet_demand > 1e-9:
+            print(f"⚠️  Demanda sin atender aun abriendo todo: {result.unmet_demand:,.2f} "
+                  f"(penalización incluida en el total: {result.penalty_cost:,.2f})")
+
+        print("\nIteración | Cota Inferior | Mejor Solución")
+        print("-" * 80)
+        for i, (lower, upper) in enumerate(result.history, 1):
+            print(f"{i:9} | {lower:13,.2f} | {upper:14,.2f}")
+        return result
+
+    def solve_multicommodity(self, commodities, top=10, network=None):
+        """
+        Resuelve varios productos que comparten la capacidad de las rutas
+
+        Usa generación de columnas sobre caminos (ver
+        red_multiproducto.solve_column_generation).
+
+        Args:
+            commodities: Diccionario {producto: (ofertas, demandas)} con
+                diccionarios {nodo: cantidad}
+            top: Rutas más congestionadas que se imprimen
+            network: Red con las capacidades compartidas (por defecto el caso
+                de estudio con capacidades: sin ellas los productos no compiten)
+
+        Returns:
+            MultiCommodityResult
+        """
+        print(f"\n{'='*80}")
+        print("TRANSBORDO MULTIPRODUCTO (GENERACIÓN DE COLUMNAS)")
+        print(f"{'='*80}\n")
+
+        base = default_network(with_capacity=True) if network is None else network
+        network = MultiCommodityNetwork.from_dicts(base, commodities)
+        # El maestro no es un problema de redes: con 'simplex_red' se resuelve con CBC
+        result = solve_column_generation(network, 'highs' if self.backend == 'highs' else 'cbc')
+
+        print(f"Estado: {LpStatus[result.status]} | Productos: {network.n_commodities} | "
+              f"Iteraciones: {result.iterations}")
+        print(f"Caminos generados: {result.n_columns} | Caminos con flujo: {len(result.path_flows)}")
+        print(f"Costo total: {result.objective:,.2f} | Cota inferior: {result.lower_bound:,.2f}")
+        if result.unmet_demand.sum() > 1e-9:
+            print(f"⚠️  Demanda sin atender: {result.unmet_demand.sum():,.2f}")
+
+        print("\nProducto     | Caminos | Costo de Transporte")
+        print("-" * 80)
+        path_costs = np.array([float(base.cost[arcs].sum()) for arcs in result.path_arcs])
+        costs = np.bincount(result.path_commodity, weights=path_costs * result.path_flows,
+                            minlength=network.n_commodities)
+        counts = np.bincount(result.path_commodity, minlength=network.n_commodities)
+        for name, count, cost in zip(network.commodities, counts.tolist(), costs.tolist()):
+            print(f"{name:12} | {count:7} | {cost:19,.2f}")
+
+        congested = [k for k in np.argsort(result.capacity_duals, kind='stable')[:top].tolist()
+                     if result.capacity_duals[k] < -1e-9]
+        if congested:
+            print("\nRUTAS COMPARTIDAS MÁS CONGESTIONADAS:")
+            print("-" * 80)
+            flows = result.arc_flows
+            for k in congested:
+                print(f"{base.arc_names[k]:6} | Flujo {flows[k]:8.2f} / "
+                      f"{base.capacity[k]:8.2f} | Precio sombra {result.capacity_duals[k]:8.2f}")
+        return result
+
     def _generate_recommendations(self):
         """Genera recomendaciones gerenciales"""
         print(f"\n{'='*80}")
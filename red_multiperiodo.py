@@ -0,0 +1,323 @@
+"""
+RED MULTIPERÍODO - TRANSBORDO EXPANDIDO EN EL TIEMPO
+Copia de la red por período con tiempos de tránsito en los arcos, inventario
+en los transbordos con costo de almacenamiento y un planificador de horizonte
+rodante que reoptimiza solo la ventana no congelada
+"""
+
+import numpy as np
+from pulp import LpStatusInfeasible, LpStatusOptimal
+
+from red_transbordo import TransshipmentNetwork
+from resolutores import _check_backend, solve_flow
+from simplex_red import NetworkSimplex
+
+# Nodo que recibe el inventario final y los envíos que llegan después del horizonte
+END_NODE = 'FIN'
+
+
+def _per_node(values, network, default):
+    """Valor por nodo a partir de un escalar, un arreglo o un diccionario {nodo: valor}"""
+    if values is None:
+        return np.full(network.n_nodes, default, dtype=float)
+    if isinstance(values, dict):
+        result = np.full(network.n_nodes, default, dtype=float)
+        for name, v in values.items():
+            result[network.node_ids[name]] = v
+        return result
+    return np.broadcast_to(np.asarray(values, dtype=float), (network.n_nodes,)).copy()
+
+
+def _per_period(values, n_periods, default):
+    """Matriz períodos x columnas; un vector se repite en todos los períodos"""
+    values = default if values is None else np.asarray(values, dtype=float)
+    if values.ndim == 1:
+        values = np.tile(values, (n_periods, 1))
+    if len(values) != n_periods:
+        raise ValueError(f"Se esperaban {n_periods} períodos y hay {len(values)}")
+    return values
+
+
+class TimeExpandedNetwork:
+    """
+    Red de transbordo expandida en el tiempo
+
+    Cada nodo de la red base se copia una vez por período. Un arco de i a j
+    con tránsito tau que sale en el período t llega a j en t + tau; los nodos
+    de almacenamiento (por defecto los transbordos) tienen además un arco de
+    inventario de cada período al siguiente con su costo de almacenamiento.
+    El inventario del último período y los envíos que llegarían después del
+    horizonte terminan en el nodo FIN, cuya demanda es el excedente de oferta
+    del horizonte.
+
+    Los arcos se ordenan por período de salida en bloques del mismo tamaño
+    (arcos de transporte y luego arcos de inventario), de modo que el arco k
+    del período t es el arco t * block_size + k.
+    """
+
+    def __init__(self, base, n_periods, supply=None, demand=None, costs=None, transit=None,
+                 holding_cost=0.0, storage_capacity=None, initial_inventory=None,
+                 storage_nodes=None):
+        """
+        Args:
+            base: TransshipmentNetwork de un período (arcos, costos y capacidades por período)
+            n_periods: Número de períodos del horizonte
+            supply: Oferta por período y nodo (por defecto la de base en cada período)
+            demand: Demanda por período y nodo (por defecto la de base en cada período)
+            costs: Costo por período y arco (por defecto el de base)
+            transit: Períodos de tránsito de cada arco (por defecto 0)
+            holding_cost: Costo de almacenar una unidad un período (escalar,
+                arreglo por nodo o diccionario {nodo: costo})
+            storage_capacity: Inventario máximo por nodo (por defecto sin límite)
+            initial_inventory: Inventario inicial por nodo (se suma a la oferta del período 0)
+            storage_nodes: Nombres de los nodos que pueden guardar inventario
+                (por defecto los transbordos, nodos sin oferta ni demanda en base)
+        """
+        self.base = base
+        self.n_periods = T = int(n_periods)
+        if T < 1:
+            raise ValueError("El horizonte debe tener al menos un período")
+        n, m = base.n_nodes, base.n_arcs
+
+        self.supply = _per_period(supply, T, base.supply)
+        self.demand = _per_period(demand, T, base.demand)
+        self.costs = _per_period(costs, T, base.cost)
+        self.transit = (np.zeros(m, dtype=np.int64) if transit is None
+                        else np.asarray(transit, dtype=np.int64))
+        if np.any(self.transit < 0):
+            raise ValueError("Los tiempos de tránsito no pueden ser negativos")
+        if storage_nodes is None:
+            self.storage = np.flatnonzero(base.net_supply == 0)
+        else:
+            self.storage = np.array([base.node_ids[name] for name in storage_nodes], dtype=np.int64)
+        self.holding_cost = _per_node(holding_cost, base, 0.0)
+        self.storage_capacity = _per_node(storage_capacity, base, np.inf)
+        self.initial_inventory = _per_node(initial_inventory, base, 0.0)
+
+        self.block_size = m + len(self.storage)
+        self.network = self._build()
+
+    def _build(self):
+        base, T = self.base, self.n_periods
+        n, m, storage = base.n_nodes, base.n_arcs, self.storage
+        end = T * n
+        periods = np.arange(T)
+
+        # Arcos de transporte: salen de (i, t) y llegan a (j, t + tau) o a FIN
+        arrival = periods[:, np.newaxis] + self.transit
+        transport_tail = periods[:, np.newaxis] * n + base.tail
+        transport_head = np.where(arrival < T, arrival * n + base.head, end)
+
+        # Arcos de inventario: de (h, t) a (h, t + 1), o a FIN en el último período
+        inventory_tail = periods[:, np.newaxis] * n + storage
+        inventory_head = np.where(periods[:, np.newaxis] + 1 < T, inventory_tail + n, end)
+
+        tail = np.hstack([transport_tail, inventory_tail]).ravel()
+        head = np.hstack([transport_head, inventory_head]).ravel()
+        cost = np.hstack([self.costs, np.tile(self.holding_cost[storage], (T, 1))]).ravel()
+        capacity = np.hstack([np.tile(base.capacity, (T, 1)),
+                              np.tile(self.storage_capacity[storage], (T, 1))]).ravel()
+        lower = np.hstack([np.tile(base.lower, (T, 1)), np.zeros((T, len(storage)))]).ravel()
+
+        supply = self.supply.copy()
+        supply[0] += self.initial_inventory
+        excess = supply.sum() - self.demand.sum()
+        if excess < -1e-9 * max(1.0, supply.sum()):
+            raise ValueError(f"La oferta del horizonte ({supply.sum():.2f}) no alcanza para "
+                             f"la demanda ({self.demand.sum():.2f})")
+
+        node_names = [f"{name}_t{t}" for t in range(T) for name in base.node_names] + [END_NODE]
+        arc_names = [f"{name}_t{t}" for t in range(T) for name in
+                     base.arc_names + [f"INV_{base.node_names[h]}" for h in storage.tolist()]]
+        return TransshipmentNetwork(node_names, tail, head, cost,
+                                    np.append(supply.ravel(), 0.0),
+                                    np.append(self.demand.ravel(), max(excess, 0.0)),
+                                    capacity, lower, arc_names)
+
+    def shipments(self, flows):
+        """Envíos por período de salida: matriz períodos x arcos de la red base"""
+        flows = np.asarray(flows, dtype=float).reshape(self.n_periods, self.block_size)
+        return flows[:, :self.base.n_arcs]
+
+    def inventory(self, flows):
+        """Inventario al cierre de cada período: matriz períodos x nodos de la red base"""
+        flows = np.asarray(flows, dtype=float).reshape(self.n_periods, self.block_size)
+        stock = np.zeros((self.n_periods, self.base.n_nodes))
+        stock[:, self.storage] = flows[:, self.base.n_arcs:]
+        return stock
+
+    def solve(self, backend='simplex_red'):
+        """Resuelve todo el horizonte de una vez"""
+        return solve_flow(self.network, backend=backend)
+
+
+class RollingHorizonResult:
+    """
+    Plan ejecutado por el horizonte rodante
+
+    Attributes:
+        shipments: Envíos comprometidos por día de salida (días x arcos base)
+        inventory: Inventario al cierre de cada día (días x nodos base)
+        daily_cost: Costo de transporte y almacenamiento comprometido cada día
+        statuses: Estado de cada ventana resuelta
+        iterations: Pivotes o iteraciones de cada ventana
+        late: Unidades despachadas que llegan después del horizonte, por nodo base
+    """
+
+    def __init__(self, n_days, n_arcs, n_nodes):
+        self.shipments = np.zeros((n_days, n_arcs))
+        self.inventory = np.zeros((n_days, n_nodes))
+        self.daily_cost = np.zeros(n_days)
+        self.statuses = []
+        self.iterations = []
+        self.late = np.zeros(n_nodes)
+
+    @property
+    def total_cost(self):
+        return float(self.daily_cost.sum())
+
+    @property
+    def completed(self):
+        """True si todas las ventanas se resolvieron con solución óptima"""
+        return all(status == LpStatusOptimal for status in self.statuses)
+
+
+class RollingHorizon:
+    """
+    Planificador de horizonte rodante sobre la red expandida en el tiempo
+
+    Cada día se resuelve una ventana de window días a partir del estado real
+    (inventario en los transbordos y envíos en tránsito), se congelan los
+    primeros frozen días del plan y la ventana avanza. Con el backend
+    'simplex_red' cada ventana arranca desde la base de la anterior,
+    desplazada los días congelados, de modo que solo se pivotea lo que cambió
+    con los días nuevos.
+    """
+
+    def __init__(self, base, supply, demand, window=7, frozen=1, costs=None, transit=None,
+                 holding_cost=0.0, storage_capacity=None, initial_inventory=None,
+                 storage_nodes=None, backend='simplex_red', warm_start=True):
+        """
+        Args:
+            base: TransshipmentNetwork de un período
+            supply: Oferta por día y nodo (días x nodos); define el largo del horizonte
+            demand: Demanda por día y nodo (días x nodos)
+            window: Días de cada ventana de optimización
+            frozen: Días que se congelan (ejecutan) tras cada resolución
+            costs: Costo por día y arco (por defecto el de base)
+            transit, holding_cost, storage_capacity, initial_inventory,
+            storage_nodes: Igual que en TimeExpandedNetwork
+            backend: Resolutor de cada ventana ('simplex_red', 'cbc' o 'highs')
+            warm_start: Reutilizar la base de la ventana anterior (solo 'simplex_red')
+        """
+        _check_backend(backend)
+        self.base = base
+        self.supply = np.asarray(supply, dtype=float)
+        self.demand = np.asarray(demand, dtype=float)
+        self.n_days = len(self.supply)
+        if self.demand.shape != self.supply.shape:
+            raise ValueError("La oferta y la demanda deben tener la misma forma (días x nodos)")
+        self.window = max(1, int(window))
+        self.frozen = max(1, min(int(frozen), self.window))
+        self.costs = _per_period(costs, self.n_days, base.cost)
+        self.transit = (np.zeros(base.n_arcs, dtype=np.int64) if transit is None
+                        else np.asarray(transit, dtype=np.int64))
+        self.options = {'holding_cost': holding_cost, 'storage_capacity': storage_capacity,
+                        'storage_nodes': storage_nodes}
+        self.initial_inventory = _per_node(initial_inventory, base, 0.0)
+        self.backend = backend
+        self.warm_start = warm_start and backend == 'simplex_red'
+
+    def run(self, callback=None):
+        """
+        Recorre el horizonte ventana por ventana
+
+        Args:
+            callback: Función opcional llamada con (día, TimeExpandedNetwork,
+                FlowSolution) después de resolver cada ventana
+
+        Returns:
+            RollingHorizonResult con el plan ejecutado; si una ventana no tiene
+            solución óptima el recorrido se detiene en ese día
+        """
+        base, H = self.base, self.n_days
+        n, m = base.n_nodes, base.n_arcs
+        result = RollingHorizonResult(H, m, n)
+        arrivals = np.zeros((H, n))
+        stock = self.initial_inventory
+        previous = None
+
+        for day in range(0, H, self.frozen):
+            days = slice(day, min(day + self.window, H))
+            available = (self.supply[days] + arrivals[days]).sum() + stock.sum()
+            if available < self.demand[days].sum() - 1e-9 * max(1.0, available):
+                # Ni con todo el inventario y lo que llega alcanza la demanda de la ventana
+                result.statuses.append(LpStatusInfeasible)
+                result.iterations.append(0)
+                break
+            expanded = TimeExpandedNetwork(base, days.stop - day, self.supply[days] + arrivals[days],
+                                           self.demand[days], self.costs[days], self.transit,
+                                           initial_inventory=stock, **self.options)
+            solution, previous = self._solve_window(expanded, previous)
+            result.statuses.append(solution.status)
+            result.iterations.append(solution.iterations)
+            if callback is not None:
+                callback(day, expanded, solution)
+            if solution.status != LpStatusOptimal:
+                break
+
+            # Se ejecutan los primeros días de la ventana
+            executed = min(self.frozen, expanded.n_periods)
+            shipments = expanded.shipments(solution.flows)[:executed]
+            inventory = expanded.inventory(solution.flows)[:executed]
+            result.shipments[day:day + executed] = shipments
+            result.inventory[day:day + executed] = inventory
+            result.daily_cost[day:day + executed] = (
+                (shipments * expanded.costs[:executed]).sum(axis=1) +
+                inventory @ expanded.holding_cost)
+
+            # Los envíos en tránsito pasan a ser oferta del día en que llegan
+            for t in range(executed):
+                arrival = day + t + self.transit
+                inside = arrival < H
+                np.add.at(arrivals, (arrival[inside], base.head[inside]), shipments[t, inside])
+                np.add.at(result.late, base.head[~inside], shipments[t, ~inside])
+            stock = inventory[-1]
+
+        return result
+
+    def _solve_window(self, expanded, previous):
+        """
+        Resuelve una ventana, arrancando desde la base anterior si corresponde
+
+        Returns:
+            solution: FlowSolution de la ventana
+            basis: (arcos en el árbol, arcos en capacidad) de la ventana, o None
+        """
+        if not self.warm_start:
+            return solve_flow(expanded.network, backend=self.backend), None
+
+        simplex = NetworkSimplex(expanded.network)
+        if previous is not None:
+            # La base anterior se desplaza los días congelados: el arco k del
+            # día t pasa a ser el arco k del día t - frozen
+            shift = self.frozen * expanded.block_size
+            n_arcs = expanded.network.n_arcs
+            tree, upper = [a - shift for a in previous]
+            simplex.load_basis(tree[(tree >= 0) & (tree < n_arcs)],
+                               upper[(upper >= 0) & (upper < n_arcs)])
+        solution = simplex.solve(warm_start=previous is not None)
+        solution.stats.finish(solution.status, solution.objective, solution.iterations)
+        return solution, simplex.basis()
+
+
+def print_plan(base, result, days=None):
+    """Imprime el costo diario y el inventario de los nodos que guardaron stock"""
+    storage = np.flatnonzero(result.inventory.any(axis=0)).tolist()
+    days = len(result.daily_cost) if days is None else min(days, len(result.daily_cost))
+    print(" | ".join(["Día", "Costo del Día"] + [f"Inv. {base.node_names[h]:>5}" for h in storage]))
+    print("-" * 80)
+    for d in range(days):
+        print(" | ".join([f"{d:3}", f"{result.daily_cost[d]:13.2f}"] +
+                         [f"{result.inventory[d, h]:10.2f}" for h in storage]))
+    print(f"\nCosto total del horizonte: {result.total_cost:,.2f}")
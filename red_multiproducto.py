@@ -0,0 +1,589 @@
+"""
+RED MULTIPRODUCTO - VARIOS PRODUCTOS CON CAPACIDADES COMPARTIDAS
+Cada producto tiene sus propias ofertas y demandas y todos comparten la
+capacidad de las rutas. Se resuelve por generación de columnas sobre caminos:
+el maestro solo contiene los caminos activos y los nuevos caminos se obtienen
+con subproblemas de camino mínimo
+"""
+
+import heapq
+import time
+
+from pulp import (PULP_CBC_CMD, LpAffineExpression, LpConstraint, LpConstraintEQ,
+                  LpConstraintLE, LpMinimize, LpProblem, LpStatus, LpStatusInfeasible,
+                  LpStatusNotSolved, LpStatusOptimal, LpVariable, lpSum, value)
+import numpy as np
+
+from expansion_capacidad import EMERGENCY_NODE
+from red_transbordo import TransshipmentNetwork
+from resolutores import _LINPROG_STATUS, _check_backend, solve_flow
+
+
+class MultiCommodityNetwork:
+    """
+    Red de transbordo con varios productos
+
+    Los arcos, costos y capacidades son los de la red base (la capacidad de
+    cada arco la comparten todos los productos); las ofertas y demandas de la
+    red base no se usan.
+    """
+
+    def __init__(self, base, commodities, supply, demand):
+        """
+        Args:
+            base: TransshipmentNetwork con arcos, costos y capacidades
+            commodities: Nombres de los productos
+            supply: Oferta de cada producto en cada nodo (productos x nodos)
+            demand: Demanda de cada producto en cada nodo (productos x nodos)
+        """
+        self.base = base
+        self.commodities = list(commodities)
+        self.supply = np.asarray(supply, dtype=float).reshape(len(self.commodities), base.n_nodes)
+        self.demand = np.asarray(demand, dtype=float).reshape(len(self.commodities), base.n_nodes)
+        if np.any(base.lower != 0):
+            raise ValueError("El modelo multiproducto no admite flujos mínimos en los arcos")
+        if np.any(base.cost < 0):
+            raise ValueError("El modelo multiproducto requiere costos no negativos")
+        unbalanced = np.flatnonzero(np.abs(self.net_supply.sum(axis=1)) >
+                                    1e-9 * max(1.0, float(self.supply.sum())))
+        if len(unbalanced):
+            raise ValueError(f"Oferta y demanda no coinciden para: "
+                             f"{', '.join(self.commodities[i] for i in unbalanced.tolist())}")
+
+    @classmethod
+    def from_dicts(cls, base, commodities):
+        """
+        Args:
+            base: TransshipmentNetwork con arcos, costos y capacidades
+            commodities: Diccionario {producto: (ofertas, demandas)} con
+                diccionarios {nodo: cantidad}
+        """
+        supply = np.zeros((len(commodities), base.n_nodes))
+        demand = np.zeros((len(commodities), base.n_nodes))
+        for i, (supplies, demands) in enumerate(commodities.values()):
+            for name, amount in supplies.items():
+                supply[i, base.node_ids[name]] = amount
+            for name, amount in demands.items():
+                demand[i, base.node_ids[name]] = amount
+        return cls(base, commodities, supply, demand)
+
+    @property
+    def n_commodities(self):
+        return len(self.commodities)
+
+    @property
+    def net_supply(self):
+        """Oferta neta de cada producto en cada nodo (productos x nodos)"""
+        return self.supply - self.demand
+
+
+class MultiCommodityResult:
+    """
+    Solución del problema multiproducto expresada en caminos
+
+    Attributes:
+        status: Código de estado de PuLP
+        objective: Costo total
+        lower_bound: Cota inferior de la última iteración (Lagrangiana)
+        path_commodity: Producto (índice) de cada camino activo
+        path_arcs: Lista con los arcos de cada camino activo
+        path_flows: Flujo de cada camino activo
+        capacity_duals: Precio sombra de la capacidad de cada arco (<= 0)
+        unmet_demand: Demanda sin atender de cada producto
+        iterations: Iteraciones de generación de columnas
+        n_columns: Caminos generados en total
+        history: Lista de (costo del maestro, cota inferior) por iteración
+        seconds: Tiempo total
+    """
+
+    def __init__(self, network, status, objective, lower_bound, path_commodity, path_arcs,
+                 path_flows, capacity_duals, unmet_demand, iterations, n_columns, history,
+                 seconds):
+        self.network = network
+        self.status = status
+        self.objective = objective
+        self.lower_bound = lower_bound
+        self.path_commodity = path_commodity
+        self.path_arcs = path_arcs
+        self.path_flows = path_flows
+        self.capacity_duals = capacity_duals
+        self.unmet_demand = unmet_demand
+        self.iterations = iterations
+        self.n_columns = n_columns
+        self.history = history
+        self.seconds = seconds
+
+    def _index(self, commodity):
+        if isinstance(commodity, str):
+            return self.network.commodities.index(commodity)
+        return commodity
+
+    @property
+    def arc_flows(self):
+        """Flujo total (todos los productos) de cada arco"""
+        return self._accumulate(np.ones(len(self.path_flows), dtype=bool))
+
+    def commodity_flows(self, commodity):
+        """Flujo de un producto (nombre o índice) en cada arco"""
+        return self._accumulate(self.path_commodity == self._index(commodity))
+
+    def _accumulate(self, mask):
+        flows = np.zeros(self.network.base.n_arcs)
+        for arcs, amount in zip([a for a, used in zip(self.path_arcs, mask) if used],
+                                self.path_flows[mask].tolist()):
+            flows[arcs] += amount
+        return flows
+
+    def paths(self, commodity):
+        """Lista de (nombres de arcos, flujo) de los caminos de un producto"""
+        i = self._index(commodity)
+        names = self.network.base.arc_names
+        return [([names[k] for k in arcs.tolist()], amount) for arcs, amount, c in
+                zip(self.path_arcs, self.path_flows.tolist(), self.path_commodity.tolist())
+                if c == i]
+
+
+class _RestrictedMaster:
+    """
+    Datos del maestro restringido: filas de oferta y demanda por producto,
+    una variable artificial por fila y un camino por columna
+
+    Cada camino cubre su fila de oferta, su fila de demanda y la fila de
+    capacidad de cada arco con capacidad finita que recorre.
+    """
+
+    def __init__(self, rhs, penalty, capacity, time_limit=None):
+        self.rhs = rhs
+        self.penalty = penalty
+        self.capacity = capacity
+        self.time_limit = time_limit
+        self.costs, self.rows, self.arcs = [], [], []
+
+    @property
+    def n_rows(self):
+        return len(self.rhs)
+
+    def add_column(self, cost, row, arcs):
+        self.costs.append(cost)
+        self.rows.append(row)
+        self.arcs.append([k for k in arcs if np.isfinite(self.capacity[k])])
+
+
+class _PulpMaster(_RestrictedMaster):
+    """
+    Maestro restringido en PuLP resuelto con CBC
+
+    El modelo se conserva entre iteraciones: cada camino nuevo es una
+    variable que se agrega a las filas existentes, y la fila de capacidad de
+    un arco se crea recién cuando algún camino lo usa.
+    """
+
+    def __init__(self, rhs, penalty, capacity, time_limit=None):
+        super().__init__(rhs, penalty, capacity, time_limit)
+        self.prob = LpProblem("Maestro_Multiproducto", LpMinimize)
+        # Variables artificiales: dejan factible el maestro desde el inicio
+        self.artificials = [LpVariable(f"A_{r}", lowBound=0) for r in range(self.n_rows)]
+        for r, (var, amount) in enumerate(zip(self.artificials, self.rhs.tolist())):
+            self.prob.addConstraint(LpConstraint(LpAffineExpression([(var, 1.0)]),
+                                                 LpConstraintEQ, f"Fila_{r}", amount))
+        self.prob += lpSum(self.penalty * var for var in self.artificials), "Costo_Total"
+        self.constraints = list(self.prob.constraints.values())
+        self.capacity_rows = {}
+        self.columns = []
+
+    def add_column(self, cost, row, arcs):
+        super().add_column(cost, row, arcs)
+        var = LpVariable(f"P_{len(self.columns)}", lowBound=0)
+        self.columns.append(var)
+        self.prob.objective.addInPlace(LpAffineExpression([(var, cost)]))
+        for r in row:
+            self.constraints[r].addInPlace(LpAffineExpression([(var, 1.0)]))
+        for k in self.arcs[-1]:
+            if k in self.capacity_rows:
+                self.capacity_rows[k].addInPlace(LpAffineExpression([(var, 1.0)]))
+            else:
+                name = f"Capacidad_{k}"
+                self.prob.addConstraint(LpConstraint(LpAffineExpression([(var, 1.0)]),
+                                                     LpConstraintLE, name, self.capacity[k]))
+                self.capacity_rows[k] = self.prob.constraints[name]
+
+    def solve(self, n_arcs):
+        """
+        Returns:
+            status, objective: Estado de PuLP y costo del maestro
+            artificial: Valor de cada variable artificial
+            x: Flujo de cada camino
+            row_duals: Precio sombra de cada fila de oferta y demanda
+            capacity_duals: Precio sombra de la capacidad de cada arco (0 si no hay fila)
+        """
+        self.prob.solve(PULP_CBC_CMD(msg=0, timeLimit=self.time_limit))
+        artificial = np.array([var.varValue or 0.0 for var in self.artificials])
+        x = np.array([var.varValue or 0.0 for var in self.columns])
+        row_duals = np.array([c.pi or 0.0 for c in self.constraints])
+        capacity_duals = np.zeros(n_arcs)
+        for k, c in self.capacity_rows.items():
+            capacity_duals[k] = c.pi or 0.0
+        return (self.prob.status, value(self.prob.objective), artificial, x, row_duals,
+                capacity_duals)
+
+
+class _HighsMaster(_RestrictedMaster):
+    """
+    Maestro restringido como matriz dispersa resuelto con HiGHS (scipy)
+
+    La matriz se arma en memoria en cada resolución con las columnas
+    acumuladas; solo entran las filas de capacidad de arcos usados.
+    """
+
+    def __init__(self, rhs, penalty, capacity, time_limit=None):
+        try:
+            from scipy.optimize import linprog
+            from scipy.sparse import csc_matrix
+        except ImportError:
+            raise ImportError("El backend 'highs' requiere scipy: pip install scipy") from None
+        super().__init__(rhs, penalty, capacity, time_limit)
+        self._linprog = linprog
+        self._csc_matrix = csc_matrix
+
+    def _matrix(self, column_rows, n_rows):
+        counts = [len(r) for r in column_rows]
+        rows = np.fromiter((r for col in column_rows for r in col), dtype=np.int64,
+                           count=sum(counts))
+        cols = np.repeat(np.arange(len(column_rows)), counts)
+        return self._csc_matrix((np.ones(len(rows)), (rows, cols)),
+                                shape=(n_rows, len(column_rows)))
+
+    def solve(self, n_arcs):
+        """Mismos resultados que _PulpMaster.solve"""
+        n_rows = self.n_rows
+        used = np.unique(np.fromiter((k for arcs in self.arcs for k in arcs), dtype=np.int64))
+        position = dict(zip(used.tolist(), range(len(used))))
+        a_eq = self._matrix([[r] for r in range(n_rows)] + self.rows, n_rows)
+        a_ub = self._matrix([[]] * n_rows + [[position[k] for k in arcs] for arcs in self.arcs],
+                            len(used))
+        options = {} if self.time_limit is None else {'time_limit': self.time_limit}
+        res = self._linprog(np.array([self.penalty] * n_rows + self.costs),
+                            A_ub=a_ub if len(used) else None,
+                            b_ub=np.asarray(self.capacity)[used] if len(used) else None,
+                            A_eq=a_eq, b_eq=self.rhs, bounds=(0, None), method='highs',
+                            options=options)
+        status = _LINPROG_STATUS.get(res.status, LpStatusNotSolved)
+        if res.x is None:
+            return status, None, None, None, None, None
+        capacity_duals = np.zeros(n_arcs)
+        if len(used):
+            capacity_duals[used] = res.ineqlin.marginals
+        return (status, float(res.fun), res.x[:n_rows], res.x[n_rows:], res.eqlin.marginals,
+                capacity_duals)
+
+
+def _shortest_path_trees(base, lengths, sources):
+    """
+    Dijkstra desde cada nodo de origen con longitudes no negativas
+
+    Returns:
+        dist: Distancias (orígenes x nodos, np.inf si no se alcanza)
+        pred: Arco por el que se llega a cada nodo en cada árbol (-1 en la raíz)
+    """
+    n = base.n_nodes
+    tail, head = base.tail.tolist(), base.head.tolist()
+    length = lengths.tolist()
+    # Los arcos sin capacidad no pueden llevar flujo: no entran al subproblema
+    out_arcs = [[] for _ in range(n)]
+    for k in np.flatnonzero(base.capacity > 0).tolist():
+        out_arcs[tail[k]].append(k)
+
+    dist = np.full((len(sources), n), np.inf)
+    pred = np.full((len(sources), n), -1, dtype=np.int64)
+    for i, source in enumerate(sources):
+        d_row = [np.inf] * n
+        p_row = [-1] * n
+        d_row[source] = 0.0
+        heap = [(0.0, source)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > d_row[u]:
+                continue
+            for k in out_arcs[u]:
+                w, nd = head[k], d + length[k]
+                if nd < d_row[w]:
+                    d_row[w], p_row[w] = nd, k
+                    heapq.heappush(heap, (nd, w))
+        dist[i] = d_row
+        pred[i] = p_row
+    return dist, pred
+
+
+def _trace(base, pred_row, target):
+    """Arcos del camino hasta target en un árbol de caminos mínimos, en orden"""
+    arcs = []
+    w = target
+    while pred_row[w] >= 0:
+        k = int(pred_row[w])
+        arcs.append(k)
+        w = int(base.tail[k])
+    return np.array(arcs[::-1], dtype=np.int64)
+
+
+def _decompose(base, flows, net, tol=1e-9):
+    """
+    Descompone un flujo de un producto en caminos de oferta a demanda
+
+    Los ciclos que aparezcan (solo pueden tener costo cero) se descartan.
+
+    Returns:
+        Lista de (origen, destino, arcos del camino, cantidad)
+    """
+    flow = np.asarray(flows, dtype=float).tolist()
+    excess = np.asarray(net, dtype=float).tolist()
+    head = base.head.tolist()
+    out_arcs = [[] for _ in range(base.n_nodes)]
+    for k in np.flatnonzero(np.asarray(flows) > tol).tolist():
+        out_arcs[base.tail[k]].append(k)
+
+    paths = []
+    for source in np.flatnonzero(np.asarray(net) > tol).tolist():
+        while excess[source] > tol:
+            arcs, position = [], {source: 0}
+            u = source
+            while excess[u] >= -tol or not arcs:
+                while out_arcs[u] and flow[out_arcs[u][-1]] <= tol:
+                    out_arcs[u].pop()
+                if not out_arcs[u]:
+                    break
+                k = out_arcs[u][-1]
+                arcs.append(k)
+                u = head[k]
+                if u in position:
+                    # Ciclo: se cancela y el camino vuelve a donde empezó el ciclo
+                    cycle = arcs[position[u]:]
+                    amount = min(flow[a] for a in cycle)
+                    for a in cycle:
+                        flow[a] -= amount
+                    for a in cycle:
+                        position.pop(head[a], None)
+                    position[u] = len(arcs) - len(cycle)
+                    del arcs[position[u]:]
+                else:
+                    position[u] = len(arcs)
+            if excess[u] >= -tol or not arcs:
+                break
+            amount = min([flow[a] for a in arcs] + [excess[source], -excess[u]])
+            for a in arcs:
+                flow[a] -= amount
+            excess[source] -= amount
+            excess[u] += amount
+            paths.append((source, u, np.array(arcs, dtype=np.int64), amount))
+    return paths
+
+
+def _greedy_paths(network, penalty):
+    """
+    Caminos iniciales por asignación voraz
+
+    Cada producto (de mayor a menor volumen) se resuelve como un flujo de un
+    solo producto con la capacidad que dejaron los anteriores y su flujo se
+    descompone en caminos. Así el maestro arranca casi factible y no gasta
+    iteraciones en sacar las variables artificiales. Los arcos de emergencia
+    (con la misma penalización que las artificiales del maestro) dejan
+    enviar la parte de cada producto que no cabe; esos caminos no se usan.
+
+    Returns:
+        Lista de (producto, origen, destino, arcos del camino)
+    """
+    base = network.base
+    n, m = base.n_nodes, base.n_arcs
+    residual = base.capacity.copy()
+    paths = []
+    for c in np.argsort(-network.supply.sum(axis=1), kind='stable').tolist():
+        net = network.net_supply[c]
+        sources, sinks = np.flatnonzero(net > 0), np.flatnonzero(net < 0)
+        single = TransshipmentNetwork(
+            base.node_names + [EMERGENCY_NODE],
+            np.concatenate([base.tail, sources, np.full(len(sinks), n)]),
+            np.concatenate([base.head, np.full(len(sources), n), sinks]),
+            np.concatenate([base.cost, np.full(len(sources), penalty), np.zeros(len(sinks))]),
+            np.append(network.supply[c], 0.0), np.append(network.demand[c], 0.0),
+            np.concatenate([residual, np.full(len(sources) + len(sinks), np.inf)]))
+        solution = solve_flow(single, backend='simplex_red')
+        if solution.status != LpStatusOptimal:
+            continue
+        residual = np.maximum(residual - solution.flows[:m], 0.0)
+        paths.extend((c, s, d, arcs) for s, d, arcs, _ in
+                     _decompose(single, solution.flows, single.net_supply)
+                     if arcs.max() < m)
+    return paths
+
+
+def solve_column_generation(network, backend='cbc', tol=1e-7, max_iterations=1000,
+                            time_limit=None, initial_paths=True):
+    """
+    Resuelve el problema multiproducto por generación de columnas sobre caminos
+
+    El maestro tiene una variable por camino (producto, origen, destino) con
+    filas de oferta y demanda por producto y una fila de capacidad compartida
+    por arco usado. Con los precios sombra del maestro (alfa en las ofertas,
+    beta en las demandas y pi <= 0 en las capacidades), el costo reducido de
+    un camino de s a d es su largo con longitudes c - pi menos alfa_s y
+    beta_d. Las longitudes son las mismas para todos los productos, así que en
+    cada iteración basta un Dijkstra por nodo de origen; el mejor camino de
+    cada producto a cada destino sale de esas distancias en bloque. Todos los
+    caminos con costo reducido negativo entran al maestro.
+
+    Args:
+        network: MultiCommodityNetwork
+        backend: Resolutor del maestro ('cbc' o 'highs')
+        tol: Costo reducido mínimo (relativo) para agregar un camino
+        max_iterations: Máximo de iteraciones
+        time_limit: Segundos máximos en total (None = sin límite)
+        initial_paths: Si es True, el maestro arranca con los caminos de una
+            asignación voraz producto por producto (ver _greedy_paths)
+
+    Returns:
+        MultiCommodityResult
+    """
+    _check_backend(backend)
+    if backend == 'simplex_red':
+        raise ValueError("El maestro multiproducto no es un problema de redes: use 'cbc' o 'highs'")
+    start = time.perf_counter()
+    base = network.base
+    net = network.net_supply
+    n_commodities, n_nodes = net.shape
+
+    # Filas de oferta y demanda de cada producto
+    source_nodes = np.flatnonzero((net > 0).any(axis=0))
+    sink_nodes = np.flatnonzero((net < 0).any(axis=0))
+    source_row = np.full((n_commodities, len(source_nodes)), -1, dtype=np.int64)
+    sink_row = np.full((n_commodities, len(sink_nodes)), -1, dtype=np.int64)
+    is_source = net[:, source_nodes] > 0
+    is_sink = net[:, sink_nodes] < 0
+    n_source_rows = int(is_source.sum())
+    source_row[is_source] = np.arange(n_source_rows)
+    sink_row[is_sink] = n_source_rows + np.arange(int(is_sink.sum()))
+    rhs = np.concatenate([net[:, source_nodes][is_source], -net[:, sink_nodes][is_sink]])
+    row_commodity = np.concatenate([np.nonzero(is_source)[0], np.nonzero(is_sink)[0]])
+    n_rows = len(rhs)
+
+    # Una unidad sin atender usa dos artificiales: la penalización supera
+    # el costo de cualquier camino
+    penalty = 1.0 + (n_nodes + 1) * max(float(base.cost.max(initial=0.0)), 1.0)
+    master_class = _PulpMaster if backend == 'cbc' else _HighsMaster
+    master = master_class(rhs, penalty, base.capacity.tolist(), time_limit)
+    volume = network.supply.sum(axis=1)
+
+    path_commodity, path_arcs = [], []
+    seen = set()
+    source_index = {v: i for i, v in enumerate(source_nodes.tolist())}
+    sink_index = {v: j for j, v in enumerate(sink_nodes.tolist())}
+
+    def add_path(c, i, j, arcs):
+        signature = (c, arcs.tobytes())
+        if signature in seen:
+            return False
+        seen.add(signature)
+        master.add_column(float(base.cost[arcs].sum()),
+                          (int(source_row[c, i]), int(sink_row[c, j])), arcs.tolist())
+        path_commodity.append(c)
+        path_arcs.append(arcs)
+        return True
+
+    if initial_paths:
+        for c, s, d, arcs in _greedy_paths(network, penalty):
+            add_path(c, source_index[s], sink_index[d], arcs)
+
+    history = []
+    lower_bound = -np.inf
+    status = LpStatusNotSolved
+    iteration = 0
+    while True:
+        iteration += 1
+        status, objective, artificial, x, row_duals, capacity_duals = master.solve(base.n_arcs)
+        if objective is None or status != LpStatusOptimal:
+            raise RuntimeError(f"El maestro terminó con estado {LpStatus.get(status, status)}")
+
+        lengths = base.cost - np.minimum(capacity_duals, 0.0)
+        dist, pred = _shortest_path_trees(base, lengths, source_nodes.tolist())
+        # -alfa en los orígenes de cada producto (+inf donde no ofrece)
+        offset = np.where(is_source, -row_duals[np.maximum(source_row, 0)], np.inf)
+        beta = row_duals[np.maximum(sink_row, 0)]
+
+        # Mejor origen de cada producto hacia cada destino
+        best = np.full((n_commodities, len(sink_nodes)), np.inf)
+        best_source = np.zeros((n_commodities, len(sink_nodes)), dtype=np.int64)
+        for i in range(len(source_nodes)):
+            value_i = dist[i, sink_nodes][None, :] + offset[:, i][:, None]
+            better = value_i < best
+            best[better] = value_i[better]
+            best_source[better] = i
+        reduced = np.where(is_sink, best - beta, np.inf)
+
+        most_negative = np.minimum(reduced.min(axis=1, initial=np.inf), 0.0)
+        lower_bound = max(lower_bound, objective + float(volume @ most_negative))
+        history.append((objective, lower_bound))
+
+        threshold = -tol * max(1.0, penalty)
+        candidates = np.argwhere(reduced < threshold)
+        added = 0
+        traced = {}
+        for c, j in candidates.tolist():
+            i = int(best_source[c, j])
+            key = (i, j)
+            if key not in traced:
+                traced[key] = _trace(base, pred[i], int(sink_nodes[j]))
+            added += add_path(c, i, j, traced[key])
+
+        if not added:
+            break
+        if iteration >= max_iterations or (time_limit is not None and
+                                           time.perf_counter() - start > time_limit):
+            status = LpStatusNotSolved
+            break
+
+    unmet = np.bincount(row_commodity, weights=artificial, minlength=n_commodities) / 2
+    if status == LpStatusOptimal and unmet.sum() > 1e-6 * max(1.0, float(volume.sum())):
+        status = LpStatusInfeasible
+    flows = x
+    active = np.flatnonzero(flows > 1e-12)
+    path_commodity = np.array(path_commodity, dtype=np.int64)
+    return MultiCommodityResult(network, status, objective - penalty * float(artificial.sum()),
+                                lower_bound, path_commodity[active],
+                                [path_arcs[p] for p in active.tolist()], flows[active],
+                                capacity_duals, unmet, iteration, len(path_arcs), history,
+                                time.perf_counter() - start)
+
+
+def solve_arc_formulation(network, time_limit=None):
+    """
+    Resuelve el problema multiproducto con una variable por producto y arco (CBC)
+
+    Es el modelo completo, de tamaño productos x arcos; sirve como referencia
+    para instancias chicas.
+
+    Returns:
+        status: Código de estado de PuLP
+        objective: Costo total
+        flows: Flujo de cada producto en cada arco (productos x arcos)
+    """
+    base = network.base
+    n_commodities, m = network.n_commodities, base.n_arcs
+    prob = LpProblem("Multiproducto_Arcos", LpMinimize)
+    x = [[LpVariable(f"x_{c}_{k}", lowBound=0) for k in range(m)] for c in range(n_commodities)]
+    prob += lpSum(LpAffineExpression(zip(row, base.cost.tolist())) for row in x), "Costo_Total"
+
+    out_arcs = [[] for _ in range(base.n_nodes)]
+    in_arcs = [[] for _ in range(base.n_nodes)]
+    for k, (u, v) in enumerate(zip(base.tail.tolist(), base.head.tolist())):
+        out_arcs[u].append(k)
+        in_arcs[v].append(k)
+    net = network.net_supply.tolist()
+    for c in range(n_commodities):
+        for v in range(base.n_nodes):
+            prob += (lpSum(x[c][k] for k in out_arcs[v]) - lpSum(x[c][k] for k in in_arcs[v])
+                     == net[c][v]), f"Balance_{c}_{v}"
+    for k, u in enumerate(base.capacity.tolist()):
+        if np.isfinite(u):
+            prob += lpSum(x[c][k] for c in range(n_commodities)) <= u, f"Capacidad_{k}"
+
+    prob.solve(PULP_CBC_CMD(msg=0, timeLimit=time_limit))
+    flows = np.array([[var.varValue or 0.0 for var in row] for row in x])
+    return prob.status, value(prob.objective), flows
@@ -0,0 +1,331 @@
+"""
+RED DE TRANSBORDO - MODELO BASADO EN DATOS
+Especificación de la red (nodos enteros y arcos en arreglos) y construcción
+vectorizada del modelo de PuLP, válida para cualquier tamaño de instancia
+"""
+
+from pulp import (LpProblem, LpMinimize, LpVariable, LpAffineExpression, LpConstraint,
+                  LpConstraintEQ, value)
+import numpy as np
+
+
+# Datos de la instancia de referencia (2 fuentes, 3 transbordos, 5 destinos)
+SUPPLIES = {'S1': 900, 'S2': 700}
+HUBS = ['H1', 'H2', 'H3']
+DEMANDS = {'D1': 300, 'D2': 250, 'D3': 350, 'D4': 400, 'D5': 300}
+
+ORIGINAL_COSTS = {
+    'S1H1': 4, 'S1H2': 6, 'S1H3': 5,
+    'S2H1': 3, 'S2H2': 4, 'S2H3': 6,
+    'H1D1': 8, 'H1D2': 6, 'H1D3': 7, 'H1D4': 9,
+    'H2D1': 7, 'H2D2': 5, 'H2D3': 6, 'H2D4': 4, 'H2D5': 5,
+    'H3D2': 8, 'H3D3': 5, 'H3D4': 7, 'H3D5': 6
+}
+
+CAPACITIES = {
+    'S1H1': 600, 'S1H2': 400, 'S1H3': 300,
+    'S2H1': 500, 'S2H2': 300, 'S2H3': 400,
+    'H1D1': 250, 'H1D2': 300, 'H1D3': 250, 'H1D4': 300,
+    'H2D1': 150, 'H2D2': 200, 'H2D3': 300, 'H2D4': 350, 'H2D5': 250,
+    'H3D2': 150, 'H3D3': 200, 'H3D4': 250, 'H3D5': 250
+}
+
+
+class TransshipmentNetwork:
+    """
+    Especificación de una red de transbordo con nodos identificados por enteros
+
+    Los arcos se guardan como arreglos contiguos (origen, destino, costo,
+    capacidad y cota inferior), de modo que el modelo se construye en una sola
+    pasada sin escribir variables ni restricciones a mano.
+    """
+
+    def __init__(self, node_names, tail, head, cost, supply=None, demand=None,
+                 capacity=None, lower=None, arc_names=None):
+        """
+        Args:
+            node_names: Lista con el nombre de cada nodo (su posición es el id)
+            tail: Arreglo con el id del nodo origen de cada arco
+            head: Arreglo con el id del nodo destino de cada arco
+            cost: Arreglo con el costo unitario de cada arco
+            supply: Oferta de cada nodo (por defecto 0)
+            demand: Demanda de cada nodo (por defecto 0)
+            capacity: Capacidad de cada arco (np.inf si no tiene límite)
+            lower: Flujo mínimo de cada arco (por defecto 0)
+            arc_names: Nombres de los arcos (por defecto origen + destino)
+        """
+        self.node_names = list(node_names)
+        self.node_ids = {name: i for i, name in enumerate(self.node_names)}
+        n_nodes = len(self.node_names)
+        if len(self.node_ids) != n_nodes:
+            raise ValueError("Los nombres de los nodos deben ser únicos")
+
+        self.tail = np.asarray(tail, dtype=np.int64)
+        self.head = np.asarray(head, dtype=np.int64)
+        self.cost = np.asarray(cost, dtype=float)
+        n_arcs = len(self.tail)
+        if len(self.head) != n_arcs or len(self.cost) != n_arcs:
+            raise ValueError("Los arreglos de arcos deben tener la misma longitud")
+        if n_arcs and (min(self.tail.min(), self.head.min()) < 0 or
+                       max(self.tail.max(), self.head.max()) >= n_nodes):
+            raise ValueError("Hay arcos que apuntan a nodos inexistentes")
+        if np.any(self.tail == self.head):
+            raise ValueError("La red no admite arcos de un nodo a sí mismo")
+
+        self.capacity = (np.full(n_arcs, np.inf) if capacity is None
+                         else np.asarray(capacity, dtype=float))
+        self.lower = (np.zeros(n_arcs) if lower is None
+                      else np.asarray(lower, dtype=float))
+        if np.any(self.lower > self.capacity):
+            raise ValueError("Hay arcos con cota inferior mayor que su capacidad")
+
+        self.supply = np.zeros(n_nodes) if supply is None else np.asarray(supply, dtype=float)
+        self.demand = np.zeros(n_nodes) if demand is None else np.asarray(demand, dtype=float)
+        if abs(self.supply.sum() - self.demand.sum()) > 1e-9 * max(1.0, self.supply.sum()):
+            raise ValueError(f"La red no está balanceada: oferta={self.supply.sum():.2f}, "
+                             f"demanda={self.demand.sum():.2f}")
+
+        # Los nombres de los arcos se arman recién cuando se piden: en redes de
+        # millones de arcos cargadas desde archivo no hace falta crearlos
+        self._arc_names = None if arc_names is None else _unique_names(arc_names)
+        self._arc_ids = None
+
+    @property
+    def arc_names(self):
+        """Nombre de cada arco (por defecto origen + destino)"""
+        if self._arc_names is None:
+            names = self.node_names
+            self._arc_names = _unique_names([names[t] + names[h] for t, h in
+                                             zip(self.tail.tolist(), self.head.tolist())])
+        return self._arc_names
+
+    @property
+    def arc_ids(self):
+        """Diccionario {nombre_arco: id}"""
+        if self._arc_ids is None:
+            self._arc_ids = {name: k for k, name in enumerate(self.arc_names)}
+        return self._arc_ids
+
+    @property
+    def n_nodes(self):
+        return len(self.node_names)
+
+    @property
+    def n_arcs(self):
+        return len(self.tail)
+
+    @property
+    def net_supply(self):
+        """Oferta neta b de cada nodo (salida - entrada = b)"""
+        return self.supply - self.demand
+
+    @property
+    def row_sign(self):
+        """
+        Signo de cada fila del modelo respecto de la forma salida - entrada = b
+
+        Las restricciones de oferta se escriben como salida - entrada y las de
+        balance y demanda como entrada - salida, igual que en el modelo original.
+        """
+        return np.where(self.net_supply > 0, 1.0, -1.0)
+
+    def constraint_names(self):
+        """Nombre de la restricción asociada a cada nodo"""
+        b = self.net_supply
+        prefixes = np.where(b > 0, 'Oferta_', np.where(b < 0, 'Demanda_', 'Balance_'))
+        return [p + name for p, name in zip(prefixes.tolist(), self.node_names)]
+
+    def costs_from_dict(self, costs_dict):
+        """
+        Convierte un diccionario {nombre_arco: costo} en un arreglo de costos
+
+        Los arcos que no aparecen en el diccionario conservan su costo actual.
+        """
+        costs = self.cost.copy()
+        for name, c in costs_dict.items():
+            costs[self.arc_ids[name]] = c
+        return costs
+
+    def flows_to_dict(self, flows):
+        """Convierte un arreglo de flujos en un diccionario {nombre_arco: flujo}"""
+        return dict(zip(self.arc_names, np.asarray(flows, dtype=float).tolist()))
+
+    def with_costs(self, costs):
+        """Devuelve una copia de la red con otro vector de costos"""
+        return TransshipmentNetwork(self.node_names, self.tail, self.head, costs,
+                                    self.supply, self.demand, self.capacity,
+                                    self.lower, self._arc_names)
+
+    def incidence(self):
+        """
+        Matriz de incidencia de las restricciones en formato coordenado
+
+        Cada arco aporta +1 en su origen y -1 en su destino, multiplicado por el
+        signo de fila, igual que en las restricciones del modelo de PuLP.
+
+        Returns:
+            rows: Nodo (fila) de cada coeficiente
+            cols: Arco (columna) de cada coeficiente
+            coefs: Valor de cada coeficiente
+        """
+        sign = self.row_sign
+        arcs = np.arange(self.n_arcs)
+        rows = np.concatenate([self.tail, self.head])
+        cols = np.concatenate([arcs, arcs])
+        coefs = np.concatenate([sign[self.tail], -sign[self.head]])
+        return rows, cols, coefs
+
+    def rhs(self):
+        """Lado derecho de la restricción de cada nodo"""
+        return self.row_sign * self.net_supply
+
+    def normalize_duals(self, duals):
+        """
+        Fija la constante libre de los precios sombra
+
+        En una red balanceada los potenciales de los nodos (salida - entrada = b)
+        se definen salvo una constante: sumarla a todos no cambia ningún costo
+        reducido. Cada backend fija esa constante a su manera, así que todos
+        pasan sus precios sombra por aquí: se desplazan para que el potencial
+        del último nodo de demanda (D5 en el caso de estudio) sea cero. En una
+        red desconectada solo se fija la constante de la componente de ese nodo.
+
+        Args:
+            duals: Precio sombra de cada restricción de nodo (signo de PuLP)
+
+        Returns:
+            Precios sombra normalizados (arreglo nuevo)
+        """
+        duals = np.asarray(duals, dtype=float)
+        if not len(duals):
+            return duals.copy()
+        sinks = np.flatnonzero(self.net_supply < 0)
+        anchor = sinks[-1] if len(sinks) else len(duals) - 1
+        sign = self.row_sign
+        return duals - sign * (sign[anchor] * duals[anchor])
+
+    def build_lp(self, costs=None, name="Transbordo"):
+        """
+        Construye el modelo de PuLP en una sola pasada vectorizada
+
+        Args:
+            costs: Vector de costos (por defecto los de la red)
+            name: Nombre del problema
+
+        Returns:
+            prob: Problema de PuLP listo para resolver
+            arc_vars: Lista de variables en el mismo orden que los arcos
+        """
+        costs = self.cost if costs is None else np.asarray(costs, dtype=float)
+        prob = LpProblem(name, LpMinimize)
+
+        upper = [None if np.isinf(u) else u for u in self.capacity.tolist()]
+        arc_vars = [LpVariable(arc_name, lowBound=lo, upBound=up)
+                    for arc_name, lo, up in zip(self.arc_names, self.lower.tolist(), upper)]
+
+        prob += LpAffineExpression(zip(arc_vars, costs.tolist())), "Costo_Total"
+
+        # Coeficientes de la matriz de incidencia agrupados por nodo
+        rows, cols, coefs = self.incidence()
+        order = np.argsort(rows, kind='stable')
+        bounds = np.searchsorted(rows[order], np.arange(self.n_nodes + 1))
+        cols = cols[order].tolist()
+        coefs = coefs[order].tolist()
+
+        rhs = self.rhs().tolist()
+        for node, con_name in enumerate(self.constraint_names()):
+            start, end = bounds[node], bounds[node + 1]
+            expr = LpAffineExpression([(arc_vars[k], a) for k, a in
+                                       zip(cols[start:end], coefs[start:end])])
+            prob.addConstraint(LpConstraint(expr, LpConstraintEQ, con_name, rhs[node]))
+
+        return prob, arc_vars
+
+
+class FlowSolution:
+    """
+    Solución de una red en forma de arreglos, independiente del resolutor
+
+    Attributes:
+        status: Código de estado de PuLP (LpStatusOptimal, LpStatusInfeasible, ...)
+        objective: Valor de la función objetivo
+        flows: Flujo de cada arco
+        duals: Precio sombra de cada restricción de nodo (mismo signo que PuLP,
+            normalizados con TransshipmentNetwork.normalize_duals)
+        reduced_costs: Costo reducido de cada arco
+        iterations: Número de pivotes o iteraciones del resolutor
+        stats: SolveStats de la resolución (tiempos por fase), si se midió
+    """
+
+    def __init__(self, status, objective, flows, duals, reduced_costs, iterations=0, stats=None):
+        self.status = status
+        self.objective = objective
+        self.flows = flows
+        self.duals = duals
+        self.reduced_costs = reduced_costs
+        self.iterations = iterations
+        self.stats = stats
+
+    @classmethod
+    def from_lp(cls, network, prob, arc_vars):
+        """Extrae la solución de un problema de PuLP ya resuelto"""
+        flows = np.array([v.varValue or 0.0 for v in arc_vars])
+        reduced_costs = np.array([v.dj or 0.0 for v in arc_vars])
+        constraints = prob.constraints
+        duals = network.normalize_duals([constraints[name].pi or 0.0
+                                         for name in network.constraint_names()])
+        objective = value(prob.objective)
+        return cls(prob.status, objective, flows, duals, reduced_costs)
+
+    def assign_to(self, network, prob, arc_vars):
+        """
+        Copia la solución en un problema de PuLP para que value(), .pi, .dj y
+        prob.status funcionen igual que tras resolver con CBC
+        """
+        for var, x, dj in zip(arc_vars, self.flows.tolist(), self.reduced_costs.tolist()):
+            var.varValue = x
+            var.dj = dj
+        constraints = prob.constraints
+        for name, pi in zip(network.constraint_names(), self.duals.tolist()):
+            constraints[name].pi = pi
+        prob.assignStatus(self.status)
+
+
+def _unique_names(names):
+    """Agrega un sufijo a los nombres repetidos (arcos paralelos)"""
+    seen = {}
+    used = set()
+    unique = []
+    for name in names:
+        candidate = name
+        while candidate in used:
+            seen[name] = seen.get(name, 0) + 1
+            candidate = f"{name}_{seen[name]}"
+        used.add(candidate)
+        unique.append(candidate)
+    return unique
+
+
+def default_network(with_capacity=False):
+    """
+    Construye la red de referencia del problema de transbordo
+
+    Args:
+        with_capacity: Si es True, aplica las capacidades de CAPACITIES
+
+    Returns:
+        TransshipmentNetwork con 10 nodos y 19 arcos
+    """
+    node_names = list(SUPPLIES) + HUBS + list(DEMANDS)
+    node_ids = {name: i for i, name in enumerate(node_names)}
+    supply = [SUPPLIES.get(name, 0) for name in node_names]
+    demand = [DEMANDS.get(name, 0) for name in node_names]
+
+    arc_names = list(ORIGINAL_COSTS)
+    tail = [node_ids[name[:2]] for name in arc_names]
+    head = [node_ids[name[2:]] for name in arc_names]
+    cost = [ORIGINAL_COSTS[name] for name in arc_names]
+    capacity = [CAPACITIES[name] for name in arc_names] if with_capacity else None
+
+    return TransshipmentNetwork(node_names, tail, head, cost, supply, demand,
+                                capacity=capacity, arc_names=arc_names)
@@ -0,0 +1,275 @@
+"""
+REDUCCIÓN A TRANSPORTE - CAMINO RÁPIDO PARA REDES DE DOS ETAPAS SIN CAPACIDADES
+Sin capacidades, cada par fuente-destino usa solo su transbordo más barato:
+los costos de ruta salen de un producto min-plus de las dos matrices de costos
+y se resuelve un problema de transporte sin nodos de transbordo
+"""
+
+import numpy as np
+from pulp import LpStatusOptimal
+
+from metricas import SolveStats
+from red_transbordo import FlowSolution, TransshipmentNetwork
+from resolutores import solve_flow
+from simplex_red import NetworkSimplex
+
+# Elementos máximos del bloque fuentes x transbordos x destinos del producto min-plus
+_BLOCK_ELEMENTS = 1 << 22
+
+
+def min_plus(a, b):
+    """
+    Producto min-plus de dos matrices de costos
+
+    Args:
+        a: Matriz S x H (np.inf donde no hay arco)
+        b: Matriz H x D (np.inf donde no hay arco)
+
+    Returns:
+        cost: Matriz S x D con min_h a[s, h] + b[h, d]
+        argmin: Índice h que alcanza el mínimo (sin sentido donde cost es inf)
+    """
+    n_rows, n_inner = a.shape
+    n_cols = b.shape[1]
+    cost = np.full((n_rows, n_cols), np.inf)
+    argmin = np.zeros((n_rows, n_cols), dtype=np.int64)
+    if not n_inner:
+        return cost, argmin
+    # Se procesa por bloques de filas para acotar la memoria del arreglo S x H x D
+    rows = max(1, _BLOCK_ELEMENTS // (n_inner * max(n_cols, 1)))
+    for start in range(0, n_rows, rows):
+        block = a[start:start + rows, :, np.newaxis] + b[np.newaxis, :, :]
+        best = block.argmin(axis=1)
+        argmin[start:start + rows] = best
+        cost[start:start + rows] = np.take_along_axis(block, best[:, np.newaxis, :], 1)[:, 0]
+    return cost, argmin
+
+
+class TwoStageReduction:
+    """
+    Red de dos etapas (fuentes -> transbordos -> destinos) sin capacidades
+    reducida a un problema de transporte fuentes -> destinos
+
+    Se admiten también arcos directos fuente -> destino. La red no puede
+    tener capacidades finitas, cotas inferiores, arcos entre transbordos ni
+    arcos que salgan de un destino o lleguen a una fuente; en ese caso el
+    constructor lanza ValueError (ver is_two_stage).
+    """
+
+    def __init__(self, network):
+        """
+        Args:
+            network: TransshipmentNetwork de dos etapas sin capacidades
+        """
+        b = network.net_supply
+        if np.isfinite(network.capacity).any() or np.any(network.lower):
+            raise ValueError("La reducción a transporte requiere arcos sin capacidades "
+                             "ni cotas inferiores")
+        role = np.sign(b).astype(np.int64)  # 1 fuente, 0 transbordo, -1 destino
+        tail_role, head_role = role[network.tail], role[network.head]
+        first = (tail_role == 1) & (head_role == 0)
+        second = (tail_role == 0) & (head_role == -1)
+        direct = (tail_role == 1) & (head_role == -1)
+        if not np.all(first | second | direct):
+            raise ValueError("La red no es de dos etapas: hay arcos entre transbordos, "
+                             "que salen de un destino o que llegan a una fuente")
+
+        self.network = network
+        self.sources = np.flatnonzero(role == 1)
+        self.hubs = np.flatnonzero(role == 0)
+        self.dests = np.flatnonzero(role == -1)
+        position = np.zeros(network.n_nodes, dtype=np.int64)
+        for nodes in (self.sources, self.hubs, self.dests):
+            position[nodes] = np.arange(len(nodes))
+        self._position = position
+        self._first = np.flatnonzero(first)
+        self._second = np.flatnonzero(second)
+        self._direct = np.flatnonzero(direct)
+
+        # Problema de transporte: fuentes y destinos, ofertas y demandas originales
+        nodes = np.concatenate([self.sources, self.dests])
+        names = network.node_names
+        self._node_names = [names[v] for v in nodes.tolist()]
+        self._supply = np.maximum(b[nodes], 0.0)
+        self._demand = np.maximum(-b[nodes], 0.0)
+
+    @property
+    def n_route_arcs(self):
+        """Número máximo de arcos del problema de transporte (fuentes x destinos)"""
+        return len(self.sources) * len(self.dests)
+
+    def _cheapest(self, costs, arcs, rows, cols, shape):
+        """
+        Matriz del costo más barato entre cada par (arcos paralelos) y el arco que lo da
+
+        Returns:
+            matrix: Costos (np.inf donde no hay arco)
+            arc: Id del arco más barato de cada par (-1 donde no hay)
+        """
+        matrix = np.full(shape, np.inf)
+        arc = np.full(shape, -1, dtype=np.int64)
+        if len(arcs):
+            # Los arcos más caros primero: el último en escribirse es el más barato
+            order = np.lexsort((-costs[arcs], rows, cols))
+            flat = rows[order] * shape[1] + cols[order]
+            last = np.r_[flat[1:] != flat[:-1], True]
+            matrix.flat[flat[last]] = costs[arcs][order][last]
+            arc.flat[flat[last]] = arcs[order][last]
+        return matrix, arc
+
+    def route_costs(self, costs=None):
+        """
+        Costo más barato de cada par fuente-destino y la ruta que lo da
+
+        Returns:
+            cost: Matriz S x D de costos de ruta (np.inf si no hay ruta)
+            first_arc: Arco fuente -> transbordo de la ruta (-1 si es directa)
+            second_arc: Arco transbordo -> destino, o el arco directo
+        """
+        network = self.network
+        costs = network.cost if costs is None else np.asarray(costs, dtype=float)
+        pos, tail, head = self._position, network.tail, network.head
+        n_s, n_h, n_d = len(self.sources), len(self.hubs), len(self.dests)
+
+        a, a_arc = self._cheapest(costs, self._first, pos[tail[self._first]],
+                                  pos[head[self._first]], (n_s, n_h))
+        b, b_arc = self._cheapest(costs, self._second, pos[tail[self._second]],
+                                  pos[head[self._second]], (n_h, n_d))
+        cost, hub = min_plus(a, b)
+        first_arc = np.take_along_axis(a_arc, hub, 1) if n_h else np.full((n_s, n_d), -1)
+        second_arc = b_arc[hub, np.arange(n_d)] if n_h else np.full((n_s, n_d), -1)
+
+        direct, direct_arc = self._cheapest(costs, self._direct, pos[tail[self._direct]],
+                                            pos[head[self._direct]], (n_s, n_d))
+        use_direct = direct < cost
+        cost = np.where(use_direct, direct, cost)
+        first_arc = np.where(use_direct, -1, first_arc)
+        second_arc = np.where(use_direct, direct_arc, second_arc)
+        return cost, first_arc, second_arc
+
+    def solve(self, costs=None, backend='simplex_red'):
+        """
+        Resuelve el problema de transporte y devuelve la solución de la red original
+
+        Con 'simplex_red' el simplex de redes arranca desde la base del método
+        del costo mínimo; con otro backend se resuelve con solve_flow.
+
+        Returns:
+            FlowSolution en los arcos de la red original, con precios sombra y
+            costos reducidos válidos para la red original
+        """
+        network = self.network
+        costs = network.cost if costs is None else np.asarray(costs, dtype=float)
+        stats = SolveStats.for_network(network, f"transporte/{backend}")
+        n_s = len(self.sources)
+
+        with stats.phase('reduce'):
+            route_cost, first_arc, second_arc = self.route_costs(costs)
+            s_idx, d_idx = np.nonzero(np.isfinite(route_cost))
+            transport = TransshipmentNetwork(self._node_names, s_idx, n_s + d_idx,
+                                             route_cost[s_idx, d_idx], self._supply,
+                                             self._demand)
+        stats.n_variables, stats.n_constraints = transport.n_arcs, transport.n_nodes
+
+        if backend == 'simplex_red':
+            simplex = NetworkSimplex(transport)
+            with stats.phase('initialize'):
+                simplex.load_basis(_least_cost_basis(transport))
+            reduced = simplex.solve(warm_start=True)
+        else:
+            reduced = solve_flow(transport, backend=backend)
+        for phase, seconds in reduced.stats.phases.items():
+            stats.add_time(phase, seconds)
+        stats.iterations = reduced.iterations
+
+        with stats.phase('expand'):
+            solution = self._expand(costs, transport, reduced, s_idx, d_idx, first_arc,
+                                    second_arc)
+        solution.stats = stats.finish(solution.status, solution.objective)
+        return solution
+
+    def _expand(self, costs, transport, reduced, s_idx, d_idx, first_arc, second_arc):
+        """Lleva los flujos y potenciales del problema de transporte a la red original"""
+        network = self.network
+        n_s = len(self.sources)
+        if reduced.status != LpStatusOptimal:
+            zeros = np.zeros(network.n_arcs)
+            return FlowSolution(reduced.status, None, zeros, np.zeros(network.n_nodes),
+                                zeros.copy(), reduced.iterations)
+
+        used = reduced.flows > 0
+        x = reduced.flows[used]
+        first = first_arc[s_idx[used], d_idx[used]]
+        second = second_arc[s_idx[used], d_idx[used]]
+        via_hub = first >= 0
+        flows = np.zeros(network.n_arcs)
+        np.add.at(flows, first[via_hub], x[via_hub])
+        np.add.at(flows, second, x)
+
+        # Potenciales en la forma salida - entrada = b: los de fuentes y destinos
+        # salen del problema de transporte; cada transbordo toma el menor valor
+        # que deja sin costo reducido negativo a sus arcos de salida (o, si no
+        # tiene salidas, el mayor que exigen sus arcos de entrada)
+        y_transport = reduced.duals * transport.row_sign
+        y = np.zeros(network.n_nodes)
+        y[self.sources] = y_transport[:n_s]
+        y[self.dests] = y_transport[n_s:]
+        tail, head = network.tail, network.head
+        if len(self.hubs):
+            out = np.full(network.n_nodes, np.inf)
+            np.minimum.at(out, tail[self._second], costs[self._second] + y[head[self._second]])
+            inbound = np.full(network.n_nodes, -np.inf)
+            np.maximum.at(inbound, head[self._first], y[tail[self._first]] - costs[self._first])
+            hubs = self.hubs
+            y[hubs] = np.where(np.isfinite(out[hubs]), out[hubs],
+                               np.where(np.isfinite(inbound[hubs]), inbound[hubs], 0.0))
+
+        reduced_costs = costs - y[tail] + y[head]
+        return FlowSolution(reduced.status, float(costs @ flows), flows,
+                            network.normalize_duals(network.row_sign * y), reduced_costs, reduced.iterations)
+
+
+def _least_cost_basis(transport):
+    """
+    Base inicial por el método del costo mínimo
+
+    Se recorren las rutas de la más barata a la más cara asignando todo lo
+    posible; cada asignación agota una fuente o un destino, de modo que las
+    rutas usadas forman un bosque que NetworkSimplex.load_basis completa.
+    """
+    supply = transport.supply.tolist()
+    demand = transport.demand.tolist()
+    tail, head = transport.tail.tolist(), transport.head.tolist()
+    left = float(transport.supply.sum())
+    tol = 1e-9 * max(left, 1.0)
+    tree = []
+    for a in np.argsort(transport.cost, kind='stable').tolist():
+        s, d = tail[a], head[a]
+        amount = min(supply[s], demand[d])
+        if amount > tol:
+            tree.append(a)
+            supply[s] -= amount
+            demand[d] -= amount
+            left -= amount
+            if left <= tol:
+                break
+    return tree
+
+
+def is_two_stage(network):
+    """True si la red admite la reducción a transporte (ver TwoStageReduction)"""
+    try:
+        TwoStageReduction(network)
+    except ValueError:
+        return False
+    return True
+
+
+def solve_two_stage(network, costs=None, backend='simplex_red'):
+    """
+    Resuelve una red de dos etapas sin capacidades por reducción a transporte
+
+    Returns:
+        FlowSolution en los arcos de la red original
+    """
+    return TwoStageReduction(network).solve(costs, backend)
@@ -0,0 +1,191 @@
+"""
+REPORTES - EXPORTACIÓN Y RESUMEN DE SOLUCIONES
+Capa de presentación separada de la resolución: escribe la solución completa
+a CSV, JSON o NPY de una sola vez e imprime solo un resumen de los N arcos y
+restricciones más relevantes
+"""
+
+import csv
+import json
+import sys
+
+import numpy as np
+from pulp import LpStatus
+
+FORMATS = ('csv', 'json', 'npy')
+
+
+def arc_table(network, solution):
+    """
+    Tabla de arcos de la solución en columnas
+
+    Returns:
+        Diccionario {columna: arreglo} con nombre, origen, destino, costo,
+        capacidad, flujo, costo reducido y costo total de cada arco
+    """
+    names = np.asarray(network.node_names)
+    return {
+        'arco': np.asarray(network.arc_names),
+        'origen': names[network.tail],
+        'destino': names[network.head],
+        'costo': network.cost,
+        'capacidad': network.capacity,
+        'flujo': np.asarray(solution.flows, dtype=float),
+        'costo_reducido': np.asarray(solution.reduced_costs, dtype=float),
+        'costo_total': network.cost * np.asarray(solution.flows, dtype=float),
+    }
+
+
+def node_table(network, solution):
+    """
+    Tabla de restricciones de nodo en columnas
+
+    Returns:
+        Diccionario {columna: arreglo} con restricción, nodo, oferta, demanda,
+        flujo neto (salida - entrada) y precio sombra
+    """
+    flows = np.asarray(solution.flows, dtype=float)
+    return {
+        'restriccion': np.asarray(network.constraint_names()),
+        'nodo': np.asarray(network.node_names),
+        'oferta': network.supply,
+        'demanda': network.demand,
+        'flujo_neto': net_outflow(network, flows),
+        'precio_sombra': np.asarray(solution.duals, dtype=float),
+    }
+
+
+def net_outflow(network, flows):
+    """Salida menos entrada de cada nodo, calculada en bloque"""
+    n = network.n_nodes
+    return (np.bincount(network.tail, weights=flows, minlength=n) -
+            np.bincount(network.head, weights=flows, minlength=n))
+
+
+def _write_csv(path, table):
+    """
+    Escribe una tabla de columnas en un CSV con una sola escritura
+
+    Los nombres con comas, comillas o saltos de línea se escriben entre
+    comillas, igual que los lee carga_datos.load_network_csv.
+    """
+    columns = []
+    for values in table.values():
+        if values.dtype.kind in 'fi':
+            columns.append(np.char.mod('%.10g', values).tolist())
+        else:
+            columns.append(values.tolist())
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(list(table))
+        writer.writerows(zip(*columns))
+
+
+def _json_values(values):
+    # JSON no admite infinito: las capacidades ilimitadas se escriben como null
+    if values.dtype.kind == 'f':
+        return [None if not np.isfinite(v) else v for v in values.tolist()]
+    return values.tolist()
+
+
+def export_solution(network, solution, path, format='csv'):
+    """
+    Exporta la solución completa
+
+    Args:
+        network: TransshipmentNetwork resuelta
+        solution: FlowSolution de la red
+        path: Ruta base sin extensión
+        format: 'csv' (path_arcos.csv y path_nodos.csv), 'json' (path.json)
+            o 'npy' (path.npz con un arreglo por columna)
+
+    Returns:
+        Lista de archivos escritos
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Formato desconocido: {format!r}. Opciones: {', '.join(FORMATS)}")
+    arcs, nodes = arc_table(network, solution), node_table(network, solution)
+
+    if format == 'csv':
+        paths = [f"{path}_arcos.csv", f"{path}_nodos.csv"]
+        _write_csv(paths[0], arcs)
+        _write_csv(paths[1], nodes)
+        return paths
+
+    if format == 'json':
+        report = {
+            'estado': LpStatus.get(solution.status, str(solution.status)),
+            'costo_total': solution.objective,
+            'arcos': {column: _json_values(values) for column, values in arcs.items()},
+            'nodos': {column: _json_values(values) for column, values in nodes.items()},
+        }
+        with open(f"{path}.json", 'w') as f:
+            json.dump(report, f)
+        return [f"{path}.json"]
+
+    np.savez(f"{path}.npz", estado=solution.status, costo_total=solution.objective,
+             **{f"arcos_{k}": v for k, v in arcs.items()},
+             **{f"nodos_{k}": v for k, v in nodes.items()})
+    return [f"{path}.npz"]
+
+
+def _top(values, n):
+    """Índices de los n valores más grandes, de mayor a menor"""
+    n = min(n, len(values))
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    idx = np.argpartition(-values, n - 1)[:n]
+    return idx[np.argsort(-values[idx], kind='stable')]
+
+
+def print_summary(network, solution, top=10, file=None):
+    """
+    Imprime un resumen acotado de la solución
+
+    Solo se muestran los top arcos con mayor costo total, las top
+    restricciones con mayor precio sombra (en valor absoluto) y las top rutas
+    sin usar más cercanas a entrar en la solución, de modo que el tiempo de
+    impresión no depende del tamaño de la red.
+    """
+    file = file or sys.stdout
+    flows = np.asarray(solution.flows, dtype=float)
+    duals = np.asarray(solution.duals, dtype=float)
+    reduced = np.asarray(solution.reduced_costs, dtype=float)
+    arc_names = network.arc_names
+    constraint_names = network.constraint_names()
+
+    def out(text=""):
+        print(text, file=file)
+
+    out("="*80)
+    out("RESUMEN DE LA SOLUCIÓN")
+    out("="*80)
+    out(f"\nEstado: {LpStatus.get(solution.status, solution.status)}")
+    if solution.objective is not None:
+        out(f"Costo total: {solution.objective:,.2f}")
+    used = flows > 1e-9
+    out(f"Nodos: {network.n_nodes:,} | Arcos: {network.n_arcs:,} | Arcos con flujo: {int(used.sum()):,}")
+    residual = np.abs(net_outflow(network, flows) - network.net_supply)
+    out(f"Máxima violación de balance: {residual.max(initial=0.0):.2e}")
+
+    contribution = network.cost * flows
+    out(f"\nTOP {top} ARCOS POR COSTO TOTAL:")
+    out("-" * 80)
+    out(f"{'Arco':20} | {'Flujo':>12} | {'Costo':>8} | {'Costo Total':>14}")
+    for k in _top(contribution, top).tolist():
+        if flows[k] <= 1e-9:
+            break
+        out(f"{arc_names[k]:20} | {flows[k]:12.2f} | {network.cost[k]:8.2f} | {contribution[k]:14.2f}")
+
+    out(f"\nTOP {top} RESTRICCIONES POR PRECIO SOMBRA:")
+    out("-" * 80)
+    for v in _top(np.abs(duals), top).tolist():
+        out(f"{constraint_names[v]:30} | {duals[v]:12.2f}")
+
+    unused = np.where(~used & (reduced > 1e-9), reduced, np.inf)
+    candidates = [k for k in _top(-unused, top).tolist() if np.isfinite(unused[k])]
+    if candidates:
+        out(f"\nTOP {top} RUTAS SIN USAR MÁS CERCANAS A SER RENTABLES:")
+        out("-" * 80)
+        for k in candidates:
+            out(f"{arc_names[k]:20} | costo reducido {reduced[k]:10.2f}")
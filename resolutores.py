@@ -0,0 +1,413 @@
+"""
+RESOLUTORES - BACKENDS INTERCAMBIABLES PARA EL PROBLEMA DE TRANSBORDO
+Permite resolver el mismo modelo con CBC, con el simplex de redes en proceso
+o con HiGHS en proceso
+"""
+
+from collections import OrderedDict
+import os
+import re
+import time
+import uuid
+
+from pulp import (PULP_CBC_CMD, LpAffineExpression, LpStatusOptimal, LpStatusInfeasible,
+                  LpStatusUnbounded, LpStatusNotSolved, value)
+import numpy as np
+
+from metricas import SolveStats
+from preproceso_red import presolve as run_presolve
+from red_transbordo import FlowSolution
+from simplex_red import NetworkSimplex
+
+# Backends disponibles:
+#   'cbc'         -> PuLP + CBC (resolutor LP/MIP general en un subproceso)
+#   'simplex_red' -> simplex de redes en proceso, sin binarios externos
+#   'highs'       -> HiGHS en proceso (requiere scipy); la matriz se pasa en
+#                    memoria, sin archivos MPS ni subprocesos
+BACKENDS = ('cbc', 'simplex_red', 'highs')
+
+# Formas de red reducida cuyos modelos guarda un PersistentModel con preproceso
+_REDUCED_MODELS = 4
+
+# Códigos de scipy.optimize.linprog -> estados de PuLP
+_LINPROG_STATUS = {0: LpStatusOptimal, 1: LpStatusNotSolved, 2: LpStatusInfeasible,
+                   3: LpStatusUnbounded, 4: LpStatusNotSolved}
+
+
+def _check_backend(backend):
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend desconocido: {backend!r}. Opciones: {', '.join(BACKENDS)}")
+
+
+class TimedCBC(PULP_CBC_CMD):
+    """
+    PULP_CBC_CMD que separa el tiempo de cada fase de la llamada a CBC
+
+    Mide la escritura del archivo MPS, la lectura del archivo de solución y,
+    por diferencia, el proceso de CBC. El número de iteraciones se toma del
+    registro que CBC escribe en un archivo temporal.
+    """
+
+    def __init__(self, stats, time_limit=None):
+        super().__init__(msg=0, timeLimit=time_limit)
+        self.stats = stats
+
+    def actualSolve(self, lp, **kwargs):
+        log_path = os.path.join(self.tmpDir, f"{uuid.uuid4().hex}-cbc.log")
+        self.optionsDict['logPath'] = log_path
+        stats = self.stats
+        write_mps = lp.writeMPS
+
+        def timed_write_mps(*args, **kw):
+            with stats.phase('write'):
+                return write_mps(*args, **kw)
+
+        # El atributo de instancia tapa el método solo durante esta resolución
+        lp.writeMPS = timed_write_mps
+        start = time.perf_counter()
+        before = sum(stats.phases.get(phase, 0.0) for phase in ('write', 'parse'))
+        try:
+            status = super().actualSolve(lp, **kwargs)
+        finally:
+            del lp.writeMPS
+            elapsed = time.perf_counter() - start
+            measured = sum(stats.phases.get(phase, 0.0) for phase in ('write', 'parse')) - before
+            stats.add_time('solver', elapsed - measured)
+            stats.iterations = _cbc_iterations(log_path)
+            if os.path.exists(log_path):
+                os.remove(log_path)
+        return status
+
+    def readsol_MPS(self, *args, **kwargs):
+        with self.stats.phase('parse'):
+            return super().readsol_MPS(*args, **kwargs)
+
+
+def _cbc_iterations(log_path):
+    """Iteraciones informadas por CBC en su registro (None si no aparecen)"""
+    try:
+        with open(log_path) as f:
+            match = re.search(r"(\d+) iterations", f.read())
+    except OSError:
+        return None
+    return int(match.group(1)) if match else None
+
+
+class HighsModel:
+    """
+    Modelo de la red en arreglos para HiGHS (scipy.optimize.linprog)
+
+    La matriz de restricciones se arma una vez como matriz dispersa y se pasa
+    a HiGHS en memoria; entre resoluciones solo cambia el vector de costos.
+    """
+
+    def __init__(self, network):
+        """
+        Args:
+            network: TransshipmentNetwork a resolver
+        """
+        try:
+            from scipy.optimize import linprog
+            from scipy.sparse import csr_matrix
+        except ImportError:
+            raise ImportError("El backend 'highs' requiere scipy: pip install scipy") from None
+        self._linprog = linprog
+        self.network = network
+        rows, cols, coefs = network.incidence()
+        self._a_eq = csr_matrix((coefs, (rows, cols)), shape=(network.n_nodes, network.n_arcs))
+        self._b_eq = network.rhs()
+        self._bounds = np.column_stack([network.lower, network.capacity])
+
+    def solve(self, costs=None, time_limit=None):
+        """
+        Resuelve con el vector de costos dado
+
+        Returns:
+            FlowSolution con los precios sombra y costos reducidos de HiGHS
+        """
+        network = self.network
+        costs = network.cost if costs is None else np.asarray(costs, dtype=float)
+        options = {} if time_limit is None else {'time_limit': time_limit}
+        start = time.perf_counter()
+        res = self._linprog(costs, A_eq=self._a_eq, b_eq=self._b_eq, bounds=self._bounds,
+                            method='highs', options=options)
+        stats = SolveStats.for_network(network, 'highs')
+        stats.add_time('solve', time.perf_counter() - start)
+        status = _LINPROG_STATUS.get(res.status, LpStatusNotSolved)
+        if res.x is None:
+            zeros = np.zeros(network.n_arcs)
+            return FlowSolution(status, None, zeros, np.zeros(network.n_nodes), zeros.copy(),
+                                stats=stats)
+
+        # Las marginales de HiGHS son derivadas del objetivo respecto del lado
+        # derecho y de las cotas, con el mismo signo que .pi y .dj de PuLP; la
+        # constante libre de los precios sombra se fija como en los demás backends
+        reduced_costs = res.lower.marginals + res.upper.marginals
+        return FlowSolution(status, float(res.fun), res.x,
+                            network.normalize_duals(res.eqlin.marginals), reduced_costs,
+                            int(res.nit), stats)
+
+
+def solve_lp(network, costs=None, backend='cbc', name="Transbordo", presolve=False):
+    """
+    Construye y resuelve el modelo de PuLP de la red con el backend elegido
+
+    Con cualquier backend el problema devuelto se consulta igual: value(),
+    .pi de las restricciones, .dj de las variables y prob.status. Las
+    estadísticas de la resolución (SolveStats) quedan en prob.stats.
+
+    Args:
+        network: TransshipmentNetwork a resolver
+        costs: Vector de costos (por defecto los de la red)
+        backend: Uno de BACKENDS
+        name: Nombre del problema
+        presolve: Si es True, el backend resuelve la red reducida por
+            preproceso_red.presolve y la solución completa se copia al modelo
+
+    Returns:
+        prob: Problema resuelto
+        arc_vars: Lista de variables en el orden de los arcos
+    """
+    _check_backend(backend)
+    stats = SolveStats.for_network(network, backend)
+    with stats.phase('build'):
+        prob, arc_vars = network.build_lp(costs, name)
+    if presolve:
+        solution = _solve_presolved(network, costs, stats, lambda reduction: _solve_arrays(
+            reduction.reduced, None, backend, stats))
+        with stats.phase('assign'):
+            solution.assign_to(network, prob, arc_vars)
+    elif backend == 'cbc':
+        prob.solve(TimedCBC(stats))
+        _normalize_lp_duals(network, prob)
+    else:
+        solution = _solve_in_process(network, costs, backend, stats)
+        with stats.phase('assign'):
+            solution.assign_to(network, prob, arc_vars)
+    prob.stats = stats.finish(prob.status, value(prob.objective))
+    return prob, arc_vars
+
+
+def _normalize_lp_duals(network, prob):
+    """Deja los .pi del modelo de PuLP con la normalización de normalize_duals"""
+    constraints = [prob.constraints[name] for name in network.constraint_names()]
+    duals = network.normalize_duals([c.pi or 0.0 for c in constraints])
+    for constraint, pi in zip(constraints, duals.tolist()):
+        constraint.pi = pi
+
+
+def _solve_in_process(network, costs, backend, stats):
+    """Resuelve con 'simplex_red' o 'highs' y acumula sus fases en stats"""
+    with stats.phase('build'):
+        model = NetworkSimplex(network) if backend == 'simplex_red' else HighsModel(network)
+    solution = model.solve(costs)
+    _merge_phases(stats, solution)
+    return solution
+
+
+def _merge_phases(stats, solution):
+    """Suma al registro stats las fases medidas por el resolutor en proceso"""
+    if solution.stats is not None:
+        for phase, seconds in solution.stats.phases.items():
+            stats.add_time(phase, seconds)
+    stats.iterations = solution.iterations
+    solution.stats = stats
+
+
+def _solve_arrays(network, costs, backend, stats):
+    """
+    Resuelve en arreglos acumulando las fases en stats
+
+    No cierra ni publica stats: eso lo hace quien lo creó, una sola vez.
+    """
+    if backend == 'cbc':
+        with stats.phase('build'):
+            prob, arc_vars = network.build_lp(costs)
+        prob.solve(TimedCBC(stats))
+        with stats.phase('extract'):
+            solution = FlowSolution.from_lp(network, prob, arc_vars)
+        solution.stats = stats
+        solution.iterations = stats.iterations or 0
+        return solution
+    return _solve_in_process(network, costs, backend, stats)
+
+
+def _solve_presolved(network, costs, stats, solve_reduced):
+    """
+    Preprocesa la red, resuelve la red reducida y reconstruye la solución
+
+    Args:
+        solve_reduced: Función que recibe la PresolvedNetwork y devuelve la
+            FlowSolution de su red reducida, acumulando sus fases en stats
+
+    Returns:
+        FlowSolution de la red original, con stats (sin cerrar)
+    """
+    with stats.phase('presolve'):
+        reduction = run_presolve(network, costs)
+    reduced = solve_reduced(reduction)
+    with stats.phase('postsolve'):
+        solution = reduction.postsolve(reduced)
+    solution.stats = stats
+    return solution
+
+
+def solve_flow(network, costs=None, backend='cbc', presolve=False):
+    """
+    Resuelve la red y devuelve la solución en arreglos (FlowSolution)
+
+    Los backends en proceso no construyen el modelo de PuLP en este camino.
+    Las estadísticas de la resolución quedan en solution.stats.
+
+    Con presolve=True el backend recibe la red reducida por
+    preproceso_red.presolve (arcos dominados podados y transbordos de paso
+    contraídos) y la solución se reconstruye sobre la red original; las
+    estadísticas suman las fases 'presolve' y 'postsolve' y cuentan las
+    variables y restricciones de la red original.
+    """
+    _check_backend(backend)
+    stats = SolveStats.for_network(network, backend)
+    if presolve:
+        solution = _solve_presolved(network, costs, stats, lambda reduction: _solve_arrays(
+            reduction.reduced, None, backend, stats))
+    else:
+        solution = _solve_arrays(network, costs, backend, stats)
+    stats.finish(solution.status, solution.objective)
+    return solution
+
+
+class PersistentModel:
+    """
+    Modelo que se construye una sola vez y se resuelve con distintos costos
+
+    Pensado para barridos de sensibilidad: entre resoluciones solo cambian los
+    coeficientes de la función objetivo. Con 'simplex_red' cada resolución
+    arranca desde la base óptima anterior, por lo que un punto del barrido
+    cuesta unos pocos pivotes; con 'highs' se reutiliza la matriz dispersa; con
+    'cbc' se reutiliza el modelo de PuLP y solo se reemplaza la función objetivo.
+
+    Con presolve=True cada resolución pasa antes por preproceso_red.presolve.
+    Como la poda depende de los costos, la red reducida puede cambiar de un
+    punto a otro: se guarda un modelo persistente por forma de red reducida
+    (PresolvedNetwork.structure), de modo que los puntos consecutivos con la
+    misma forma siguen encadenando arranques en caliente.
+    """
+
+    def __init__(self, network, backend='cbc', name="Transbordo", cache=None, presolve=False):
+        """
+        Args:
+            network: TransshipmentNetwork a resolver
+            backend: Uno de BACKENDS
+            name: Nombre del problema de PuLP (solo para 'cbc')
+            cache: SolveCache opcional que se consulta antes de resolver
+            presolve: Si es True, cada resolución se hace sobre la red reducida
+        """
+        _check_backend(backend)
+        self.network = network
+        self.backend = backend
+        self.cache = cache
+        self.presolve = presolve
+        self._name = name
+        self._reduced_models = OrderedDict()
+        if presolve:
+            return
+        if backend == 'simplex_red':
+            self._simplex = NetworkSimplex(network)
+        elif backend == 'highs':
+            self._highs = HighsModel(network)
+        else:
+            self._prob, self._arc_vars = network.build_lp(name=name)
+
+    def solve(self, costs=None, time_limit=None):
+        """
+        Resuelve con un nuevo vector de costos reutilizando el modelo
+
+        Args:
+            costs: Vector de costos (por defecto los de la red)
+            time_limit: Segundos máximos para esta resolución (None = sin límite)
+
+        Returns:
+            FlowSolution de la resolución
+        """
+        costs = self.network.cost if costs is None else np.asarray(costs, dtype=float)
+        if self.cache is not None:
+            start = time.perf_counter()
+            solution = self.cache.get(self.network, costs)
+            if solution is not None:
+                stats = SolveStats.for_network(self.network, self.backend, cache_hit=True)
+                stats.add_time('lookup', time.perf_counter() - start)
+                solution.stats = stats.finish(solution.status, solution.objective)
+                return solution
+
+        stats = SolveStats.for_network(self.network, self.backend)
+        if self.presolve:
+            solution = _solve_presolved(self.network, costs, stats, lambda reduction: (
+                self._reduced_model(reduction)._solve(reduction.reduced.cost, time_limit, stats)))
+        else:
+            solution = self._solve(costs, time_limit, stats)
+        stats.finish(solution.status, solution.objective, solution.iterations)
+
+        if self.cache is not None:
+            self.cache.put(self.network, costs, solution)
+        return solution
+
+    def _solve(self, costs, time_limit, stats):
+        """Resuelve con el modelo persistente y acumula sus fases en stats (sin publicarlo)"""
+        if self.backend == 'cbc':
+            with stats.phase('objective'):
+                self._prob.setObjective(LpAffineExpression(zip(self._arc_vars, costs.tolist()),
+                                                           name="Costo_Total"))
+            self._prob.solve(TimedCBC(stats, time_limit))
+            with stats.phase('extract'):
+                solution = FlowSolution.from_lp(self.network, self._prob, self._arc_vars)
+            solution.iterations = stats.iterations or 0
+            solution.stats = stats
+            return solution
+        if self.backend == 'simplex_red':
+            solution = self._simplex.solve(costs, warm_start=True, time_limit=time_limit)
+        else:
+            solution = self._highs.solve(costs, time_limit)
+        _merge_phases(stats, solution)
+        return solution
+
+    def _reduced_model(self, reduction):
+        """Modelo persistente de la forma de red reducida (lo crea si no existe)"""
+        key = reduction.structure
+        model = self._reduced_models.get(key)
+        if model is None:
+            model = self._reduced_models[key] = PersistentModel(reduction.reduced, self.backend,
+                                                                self._name)
+            while len(self._reduced_models) > _REDUCED_MODELS:
+                self._reduced_models.popitem(last=False)
+        self._reduced_models.move_to_end(key)
+        return model
+
+    def reset(self):
+        """Olvida la base anterior para que la próxima resolución arranque en frío"""
+        if self.presolve:
+            self._reduced_models.clear()
+        elif self.backend == 'simplex_red':
+            self._simplex.reset()
+
+    def basis(self):
+        """
+        Base de la última resolución con 'simplex_red'
+
+        Returns:
+            (arcos en el árbol, arcos en capacidad), o None si no hay base, el
+            backend no es 'simplex_red' o el modelo usa preproceso
+        """
+        if self.backend == 'simplex_red' and not self.presolve and self._simplex._has_basis:
+            return self._simplex.basis()
+        return None
+
+    def load_basis(self, tree_arcs, upper_arcs=()):
+        """
+        Arranca la próxima resolución desde una base dada (solo 'simplex_red')
+
+        La base puede venir de otra red con los mismos arcos y distintas
+        capacidades, ofertas o demandas; ver NetworkSimplex.load_basis. Con
+        los demás backends (o con preproceso) no hace nada.
+        """
+        if self.backend == 'simplex_red' and not self.presolve:
+            self._simplex.load_basis(tree_arcs, upper_arcs)
@@ -0,0 +1,517 @@
+"""
+SENSIBILIDAD ANALÍTICA - RANGOS DE OPTIMALIDAD SIN RE-RESOLVER
+Rangos exactos de costos y de lado derecho a partir de la base óptima y de
+los costos reducidos de una sola resolución
+"""
+
+import heapq
+
+import numpy as np
+
+from simplex_red import NetworkSimplex
+
+
+class BasisTree:
+    """
+    Árbol de expansión de una base óptima de la red
+
+    Se reconstruye a partir de cualquier solución óptima básica (de CBC o del
+    simplex de redes): los arcos con flujo estrictamente entre sus cotas son
+    básicos y el árbol se completa con arcos de costo reducido cero. Los
+    componentes que quedan sueltos cuelgan de una raíz artificial.
+    """
+
+    def __init__(self, network, flows, reduced_costs, tol=1e-7):
+        """
+        Args:
+            network: TransshipmentNetwork resuelta
+            flows: Flujo óptimo de cada arco
+            reduced_costs: Costo reducido de cada arco
+            tol: Tolerancia para comparar flujos y costos reducidos
+        """
+        n, m = network.n_nodes, network.n_arcs
+        self.network = network
+        self.root = n
+        self.flows = np.asarray(flows, dtype=float)
+        self.reduced_costs = np.asarray(reduced_costs, dtype=float)
+
+        scale = max(1.0, float(np.abs(network.net_supply).max(initial=0.0)))
+        free = ((self.flows > network.lower + tol * scale) &
+                (self.flows < network.capacity - tol * scale))
+        zero_rc = np.abs(self.reduced_costs) <= tol * max(1.0, float(np.abs(network.cost).max(initial=0.0)))
+        candidates = np.concatenate([np.flatnonzero(free), np.flatnonzero(zero_rc & ~free)])
+
+        # Unión-búsqueda para elegir arcos básicos sin formar ciclos
+        group = list(range(n))
+
+        def find(v):
+            while group[v] != v:
+                group[v] = group[group[v]]
+                v = group[v]
+            return v
+
+        tail, head = network.tail.tolist(), network.head.tolist()
+        in_tree = np.zeros(m, dtype=bool)
+        adjacency = [[] for _ in range(n)]
+        for k in candidates.tolist():
+            a, b = find(tail[k]), find(head[k])
+            if a != b:
+                group[a] = b
+                in_tree[k] = True
+                adjacency[tail[k]].append((head[k], k))
+                adjacency[head[k]].append((tail[k], k))
+        self.in_tree = in_tree
+        self.at_upper = ~in_tree & (self.flows > network.lower + tol * scale)
+
+        # Recorrido desde la raíz: cada componente cuelga de su primer nodo
+        self.parent = [-1] * (n + 1)
+        self.pred = [-1] * (n + 1)
+        self.depth = [0] * (n + 1)
+        seen = [False] * n
+        for start in range(n):
+            if seen[start]:
+                continue
+            seen[start] = True
+            self.parent[start] = self.root
+            self.depth[start] = 1
+            order = [start]
+            for v in order:
+                for w, k in adjacency[v]:
+                    if not seen[w]:
+                        seen[w] = True
+                        self.parent[w] = v
+                        self.pred[w] = k
+                        self.depth[w] = self.depth[v] + 1
+                        order.append(w)
+
+    def path(self, u, v):
+        """
+        Camino en el árbol de u a v
+
+        Returns:
+            Lista de (arco, sentido) donde sentido es +1 si el camino recorre
+            el arco de origen a destino y -1 si lo recorre al revés. Los tramos
+            que pasan por la raíz artificial se devuelven con arco -1.
+        """
+        tail = self.network.tail
+        parent, pred, depth = self.parent, self.pred, self.depth
+        up, down = [], []
+        while u != v:
+            if depth[u] >= depth[v]:
+                k = pred[u]
+                up.append((k, 1 if k >= 0 and tail[k] == u else -1))
+                u = parent[u]
+            else:
+                k = pred[v]
+                down.append((k, 1 if k >= 0 and tail[k] != v else -1))
+                v = parent[v]
+        return up + down[::-1]
+
+
+def cost_ranging(network, flows, reduced_costs, costs=None):
+    """
+    Rangos de optimalidad de los costos de cada arco (uno a la vez)
+
+    Para un arco no básico el rango viene directo de su costo reducido. Para un
+    arco básico, cambiar su costo desplaza los potenciales del subárbol que
+    cuelga de él, y el límite es el primer arco no básico del ciclo
+    fundamental correspondiente cuyo costo reducido cambiaría de signo.
+
+    Args:
+        network: TransshipmentNetwork resuelta
+        flows: Flujo óptimo de cada arco
+        reduced_costs: Costo reducido de cada arco (LpVariable.dj)
+        costs: Costos con los que se resolvió (por defecto los de la red)
+
+    Returns:
+        lower: Costo mínimo de cada arco con la misma base óptima
+        upper: Costo máximo de cada arco con la misma base óptima
+    """
+    costs = network.cost if costs is None else np.asarray(costs, dtype=float)
+    tree = BasisTree(network, flows, reduced_costs)
+    rc = tree.reduced_costs
+
+    decrease = np.full(network.n_arcs, np.inf)
+    increase = np.full(network.n_arcs, np.inf)
+    at_lower = ~tree.in_tree & ~tree.at_upper
+    decrease[at_lower] = np.maximum(rc[at_lower], 0.0)
+    increase[tree.at_upper] = np.maximum(-rc[tree.at_upper], 0.0)
+
+    # El costo reducido de un arco no básico j es el costo de su ciclo
+    # fundamental (j seguido del camino del árbol de head[j] a tail[j]). Si el
+    # costo del arco básico k sube en d, ese costo cambia en +d cuando el ciclo
+    # recorre k en el sentido de j y en -d en caso contrario.
+    tail, head = network.tail.tolist(), network.head.tolist()
+    for j in np.flatnonzero(~tree.in_tree).tolist():
+        state = -1.0 if tree.at_upper[j] else 1.0
+        slack = max(state * rc[j], 0.0)
+        for k, direction in tree.path(head[j], tail[j]):
+            if k < 0:
+                continue
+            if state * direction < 0:
+                increase[k] = min(increase[k], slack)
+            else:
+                decrease[k] = min(decrease[k], slack)
+
+    return costs - decrease, costs + increase
+
+
+def rhs_ranging(network, flows, reduced_costs, duals, reference=None):
+    """
+    Rangos del lado derecho de las restricciones de oferta y demanda
+
+    En una red balanceada el cambio en la oferta o demanda de un nodo debe
+    compensarse en otro nodo. Se usa como referencia un nodo con precio sombra
+    cero, de modo que la tasa de cambio del costo total es justamente el precio
+    sombra informado. El rango es el intervalo en que la base actual sigue
+    siendo factible: el flujo adicional recorre el camino del árbol entre el
+    nodo y la referencia.
+
+    Args:
+        network: TransshipmentNetwork resuelta
+        flows: Flujo óptimo de cada arco
+        reduced_costs: Costo reducido de cada arco
+        duals: Precio sombra de cada restricción de nodo (constraint.pi)
+        reference: Id o nombre del nodo que absorbe el cambio (por defecto el
+            primero con precio sombra cero)
+
+    Returns:
+        Lista de (restricción, valor_actual, precio_sombra, mínimo, máximo)
+    """
+    duals = np.asarray(duals, dtype=float)
+    reference = _reference_node(network, duals, reference)
+    tree = BasisTree(network, flows, reduced_costs)
+    flows = tree.flows
+
+    sign = network.row_sign
+    rhs_values = sign * network.net_supply
+    names = network.constraint_names()
+    results = []
+    for v in range(network.n_nodes):
+        if network.net_supply[v] == 0 or v == reference:
+            continue
+
+        # Subir el lado derecho en d envía sign[v] * d unidades de v a la referencia
+        t_min, t_max = -np.inf, np.inf
+        for k, direction in tree.path(v, reference):
+            if k < 0:
+                t_min, t_max = max(t_min, 0.0), min(t_max, 0.0)
+                continue
+            room_up = network.capacity[k] - flows[k]
+            room_down = flows[k] - network.lower[k]
+            if direction > 0:
+                t_min, t_max = max(t_min, -room_down), min(t_max, room_up)
+            else:
+                t_min, t_max = max(t_min, -room_up), min(t_max, room_down)
+
+        if sign[v] > 0:
+            d_min, d_max = t_min, t_max
+        else:
+            d_min, d_max = -t_max, -t_min
+        rhs = rhs_values[v]
+        results.append((names[v], rhs, duals[v], rhs + d_min, rhs + d_max))
+
+    return results
+
+
+def _reference_node(network, duals, reference):
+    """Id del nodo que compensa los cambios de oferta o demanda"""
+    if reference is None:
+        zeros = np.flatnonzero(np.abs(duals) < 1e-9)
+        return int(zeros[0]) if len(zeros) else network.n_nodes - 1
+    return network.node_ids[reference] if isinstance(reference, str) else int(reference)
+
+
+class RhsParametric:
+    """
+    Costo total óptimo en función del lado derecho de una restricción
+
+    La función es lineal por tramos y convexa. breakpoints contiene los
+    valores del lado derecho donde cambia la base (ordenados, con el valor
+    actual entre ellos), costs el costo total en cada uno y slopes la
+    pendiente de cada tramo. Un extremo infinito indica que la base final
+    admite cambios sin límite; fuera de [min_value, max_value] el problema
+    deja de ser factible.
+    """
+
+    def __init__(self, constraint, node, reference, value, objective, breakpoints, costs, slopes):
+        self.constraint = constraint
+        self.node = node
+        self.reference = reference
+        self.value = value
+        self.objective = objective
+        self.breakpoints = np.asarray(breakpoints, dtype=float)
+        self.costs = np.asarray(costs, dtype=float)
+        self.slopes = np.asarray(slopes, dtype=float)
+
+    @property
+    def min_value(self):
+        return self.breakpoints[0]
+
+    @property
+    def max_value(self):
+        return self.breakpoints[-1]
+
+    def cost_at(self, value):
+        """Costo total óptimo con el lado derecho en value (NaN si no es factible)"""
+        if not self.min_value <= value <= self.max_value:
+            return np.nan
+        if not len(self.slopes):
+            return float(self.costs[0])
+        i = int(np.searchsorted(self.breakpoints, value, side='right')) - 1
+        i = min(max(i, 0), len(self.slopes) - 1)
+        # En un tramo que empieza en -inf se mide desde su extremo derecho
+        anchor = i if np.isfinite(self.breakpoints[i]) else i + 1
+        return float(self.costs[anchor] + self.slopes[i] * (value - self.breakpoints[anchor]))
+
+    def __repr__(self):
+        return (f"RhsParametric({self.constraint}, valor={self.value:g}, "
+                f"rango=[{self.min_value:g}, {self.max_value:g}], tramos={len(self.slopes)})")
+
+
+def _augmenting_paths(network, flows, reduced_costs, source, target, limit):
+    """
+    Caminos de aumento más baratos de source a target desde una solución óptima
+
+    Es el algoritmo de caminos mínimos sucesivos sobre la red residual: con
+    los costos reducidos de la base óptima todas las longitudes son no
+    negativas, así que cada camino se busca con Dijkstra y los potenciales se
+    actualizan con las distancias. Cada camino mantiene la optimalidad para
+    el flujo enviado hasta saturar su arco más ajustado, que es donde la base
+    cambia.
+
+    Returns:
+        Lista de (cantidad, costo por unidad) en el orden en que se envían
+    """
+    n = network.n_nodes
+    tail, head = network.tail.tolist(), network.head.tolist()
+    cost = network.cost.tolist()
+    capacity, lower = network.capacity.tolist(), network.lower.tolist()
+    flow = np.asarray(flows, dtype=float).tolist()
+    rc = np.asarray(reduced_costs, dtype=float).tolist()
+    out_arcs = [[] for _ in range(n)]
+    in_arcs = [[] for _ in range(n)]
+    for k in range(network.n_arcs):
+        out_arcs[tail[k]].append(k)
+        in_arcs[head[k]].append(k)
+    scale = max(1.0, float(np.abs(network.net_supply).max(initial=0.0)))
+    tol = 1e-9 * scale
+
+    segments = []
+    sent = 0.0
+    while sent < limit:
+        # Dijkstra en la red residual con longitudes de costo reducido
+        dist = [np.inf] * n
+        via = [None] * n
+        dist[source] = 0.0
+        heap = [(0.0, source)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            if u == target:
+                break
+            for k in out_arcs[u]:
+                if capacity[k] - flow[k] > tol:
+                    w, nd = head[k], d + max(rc[k], 0.0)
+                    if nd < dist[w]:
+                        dist[w], via[w] = nd, (k, 1)
+                        heapq.heappush(heap, (nd, w))
+            for k in in_arcs[u]:
+                if flow[k] - lower[k] > tol:
+                    w, nd = tail[k], d + max(-rc[k], 0.0)
+                    if nd < dist[w]:
+                        dist[w], via[w] = nd, (k, -1)
+                        heapq.heappush(heap, (nd, w))
+        if dist[target] == np.inf:
+            break
+
+        path = []
+        w = target
+        while w != source:
+            k, direction = via[w]
+            path.append((k, direction))
+            w = tail[k] if direction > 0 else head[k]
+        amount = min([capacity[k] - flow[k] if direction > 0 else flow[k] - lower[k]
+                      for k, direction in path] + [limit - sent])
+        segments.append((amount, sum(direction * cost[k] for k, direction in path)))
+        if amount == np.inf:
+            break
+        sent += amount
+        for k, direction in path:
+            flow[k] += direction * amount
+
+        # Nuevos potenciales: los costos reducidos siguen siendo no negativos
+        reach = dist[target]
+        shift = [min(d, reach) for d in dist]
+        rc = [r + shift[tail[k]] - shift[head[k]] for k, r in enumerate(rc)]
+
+    return segments
+
+
+def parametric_rhs(network, flows, reduced_costs, duals, nodes=None, reference=None, costs=None):
+    """
+    Análisis paramétrico del lado derecho de las restricciones de oferta y demanda
+
+    Para cada nodo se recorre el costo total óptimo como función de su oferta
+    o demanda, hacia arriba y hacia abajo, partiendo de la solución óptima y
+    sin volver a resolver: el cambio se compensa en el nodo de referencia y
+    se envía por caminos de aumento sucesivos (ver _augmenting_paths). Cada
+    camino es un tramo lineal; sus extremos son los puntos de quiebre donde
+    cambia la base. La oferta o demanda del nodo y de la referencia no bajan
+    de cero.
+
+    Args:
+        network: TransshipmentNetwork resuelta
+        flows: Flujo óptimo de cada arco
+        reduced_costs: Costo reducido de cada arco
+        duals: Precio sombra de cada restricción de nodo
+        nodes: Nombres de los nodos a analizar (por defecto todos los de
+            oferta y demanda)
+        reference: Id o nombre del nodo que absorbe el cambio (por defecto el
+            primero con precio sombra cero, como en rhs_ranging)
+        costs: Costos con los que se resolvió (por defecto los de la red)
+
+    Returns:
+        Lista de RhsParametric, uno por nodo
+    """
+    costs = network.cost if costs is None else np.asarray(costs, dtype=float)
+    if costs is not network.cost:
+        network = network.with_costs(costs)
+    reference = _reference_node(network, np.asarray(duals, dtype=float), reference)
+    b = network.net_supply
+    sign = network.row_sign
+    names = network.constraint_names()
+    objective = float(costs @ np.asarray(flows, dtype=float))
+    if nodes is None:
+        nodes = [v for v in range(network.n_nodes) if b[v] != 0 and v != reference]
+    else:
+        nodes = [network.node_ids[name] for name in nodes]
+
+    results = []
+    for v in nodes:
+        if v == reference:
+            raise ValueError(f"El nodo {network.node_names[v]} es la referencia del análisis")
+        value = sign[v] * b[v]
+
+        # Subir el lado derecho en d agrega sign[v] * d a la oferta neta de v
+        # y lo quita de la referencia; el flujo va de v a la referencia si
+        # sign[v] > 0 y al revés si no
+        def room(direction):
+            """Máximo cambio antes de que la oferta o demanda cruce cero"""
+            limit = value if direction < 0 else np.inf
+            moved = -sign[v] * direction * b[reference]
+            if b[reference] != 0 and moved < 0:
+                limit = min(limit, abs(b[reference]))
+            return limit
+
+        pieces = {}
+        for direction in (1, -1):
+            forward = sign[v] * direction > 0
+            source, target = (v, reference) if forward else (reference, v)
+            pieces[direction] = _augmenting_paths(network, flows, reduced_costs, source, target,
+                                                  room(direction))
+
+        # Cada unidad enviada cuesta unit_cost, tanto al subir como al bajar
+        # el lado derecho: la pendiente respecto del lado derecho es
+        # unit_cost al subir y -unit_cost al bajar
+        breakpoints, point_costs, slopes = [value], [objective], []
+        for amount, unit_cost in pieces[1]:
+            if amount > 0:
+                breakpoints.append(breakpoints[-1] + amount)
+                point_costs.append(point_costs[-1] + (unit_cost * amount if unit_cost else 0.0))
+                slopes.append(unit_cost)
+        for amount, unit_cost in pieces[-1]:
+            if amount > 0:
+                breakpoints.insert(0, breakpoints[0] - amount)
+                point_costs.insert(0, point_costs[0] + (unit_cost * amount if unit_cost else 0.0))
+                slopes.insert(0, 0.0 - unit_cost)
+
+        results.append(RhsParametric(names[v], network.node_names[v],
+                                     network.node_names[reference], value, objective,
+                                     breakpoints, point_costs, slopes))
+    return results
+
+
+class CostCurve:
+    """
+    Costo total óptimo en función del costo unitario de un arco
+
+    La función es cóncava y lineal por tramos: en cada tramo la base óptima
+    no cambia y la pendiente es el flujo del arco. breakpoints tiene los
+    costos unitarios donde cambia la base (desde 0 hasta el máximo), costs
+    el costo total en cada uno, arc_flows el flujo del arco en cada tramo y
+    flows, si se pidió, el flujo de todos los arcos en cada tramo.
+    """
+
+    def __init__(self, arc, breakpoints, costs, arc_flows, flows=None):
+        self.arc = arc
+        self.breakpoints = np.asarray(breakpoints, dtype=float)
+        self.costs = np.asarray(costs, dtype=float)
+        self.arc_flows = np.asarray(arc_flows, dtype=float)
+        self.flows = flows
+
+    def _segment(self, unit_cost):
+        if not self.breakpoints[0] <= unit_cost <= self.breakpoints[-1]:
+            raise ValueError(f"Costo fuera del recorrido [{self.breakpoints[0]:g}, "
+                             f"{self.breakpoints[-1]:g}]")
+        i = int(np.searchsorted(self.breakpoints, unit_cost, side='right')) - 1
+        return min(i, len(self.arc_flows) - 1)
+
+    def cost_at(self, unit_cost):
+        """Costo total óptimo con el costo unitario del arco en unit_cost"""
+        i = self._segment(unit_cost)
+        return float(self.costs[i] + self.arc_flows[i] * (unit_cost - self.breakpoints[i]))
+
+    def flow_at(self, unit_cost):
+        """Flujo óptimo del arco con el costo unitario en unit_cost"""
+        return float(self.arc_flows[self._segment(unit_cost)])
+
+    def __repr__(self):
+        return (f"CostCurve({self.arc}, [{self.breakpoints[0]:g}, {self.breakpoints[-1]:g}], "
+                f"tramos={len(self.arc_flows)})")
+
+
+def cost_curves(network, arcs=None, max_cost=None, costs=None, return_flows=False):
+    """
+    Curvas de costo total de cada arco por pivoteo paramétrico
+
+    Se usa un único simplex de redes: cada curva arranca desde la base en que
+    terminó la anterior y solo pivotea en los puntos de quiebre, en lugar de
+    resolver el problema para cada costo de una grilla.
+
+    Args:
+        network: TransshipmentNetwork
+        arcs: Nombres de los arcos a analizar (por defecto todos)
+        max_cost: Costo unitario máximo del recorrido (escalar, arreglo por
+            arco o None para el doble del costo actual de cada arco)
+        costs: Costos del resto de los arcos (por defecto los de la red)
+        return_flows: Guardar en cada curva los flujos de todos los arcos por tramo
+
+    Returns:
+        Lista de CostCurve en el orden de arcs
+    """
+    costs = network.cost if costs is None else np.asarray(costs, dtype=float)
+    ids = range(network.n_arcs) if arcs is None else [network.arc_ids[name] for name in arcs]
+    if max_cost is None:
+        max_cost = np.maximum(2.0 * np.abs(costs), 1.0)
+    max_cost = np.broadcast_to(np.asarray(max_cost, dtype=float), (network.n_arcs,))
+
+    simplex = NetworkSimplex(network)
+    names = network.arc_names
+    curves = []
+    for k in ids:
+        status, segments = simplex.cost_curve(k, float(max_cost[k]), costs)
+        if not segments:
+            raise ValueError(f"La red no tiene solución óptima (estado {status})")
+        others = costs.copy()
+        others[k] = 0.0
+        breakpoints = [segments[0][0]] + [end for _, end, _ in segments]
+        arc_flows = [flows[k] for _, _, flows in segments]
+        point_costs = [float(others @ flows) + start * flows[k] for start, _, flows in segments]
+        last_start, last_end, last_flows = segments[-1]
+        point_costs.append(point_costs[-1] + last_flows[k] * (last_end - last_start))
+        curves.append(CostCurve(names[k], breakpoints, point_costs, arc_flows,
+                                np.array([flows for _, _, flows in segments]) if return_flows
+                                else None))
+    return curves
@@ -0,0 +1,390 @@
+"""
+SERVICIO DE RESOLUCIÓN - MODELOS EN MEMORIA PARA CONSULTAS INTERACTIVAS
+Servidor local (HTTP/JSON por TCP o por socket Unix) que carga la red una vez,
+mantiene los modelos y su última base en memoria y responde cambios de costos,
+capacidades, ofertas y demandas agrupando las consultas simultáneas en lotes
+"""
+
+from collections import OrderedDict
+from concurrent.futures import Future
+import http.client
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import queue
+import socket
+import socketserver
+import threading
+import time
+
+import numpy as np
+from pulp import LpStatus, LpStatusOptimal
+
+from red_transbordo import TransshipmentNetwork
+from resolutores import PersistentModel
+
+FLOW_MODES = ('nonzero', 'all', 'none')
+
+
+class SolveService:
+    """
+    Resolutor de larga vida sobre una red fija
+
+    Un solo hilo resuelve: las consultas se encolan y el hilo las toma en
+    lotes (todas las que llegan dentro de batch_window segundos, hasta
+    max_batch). Dentro de un lote las consultas idénticas se resuelven una
+    vez y las que comparten capacidades, ofertas y demandas usan el mismo
+    modelo persistente, encadenando arranques en caliente. Los modelos de las
+    variantes de la red se guardan en una LRU; con 'simplex_red' cada variante
+    nueva arranca desde la base de la red original.
+
+    Una consulta es un diccionario con las claves opcionales:
+        costs: {nombre_arco: costo} o la lista completa de costos
+        capacity: {nombre_arco: capacidad} (None = sin límite)
+        supply, demand: {nombre_nodo: valor}; la red debe seguir balanceada
+        flows: 'nonzero' (por defecto), 'all' o 'none'
+        duals: False para omitir los precios sombra
+    """
+
+    def __init__(self, network, backend='simplex_red', batch_window=0.002, max_batch=64,
+                 max_models=8, time_limit=None):
+        """
+        Args:
+            network: TransshipmentNetwork que se mantiene en memoria
+            backend: Resolutor de los modelos persistentes
+            batch_window: Segundos que se esperan consultas para armar un lote
+            max_batch: Consultas máximas por lote
+            max_models: Variantes de la red (capacidades, ofertas o demandas
+                distintas) cuyos modelos se conservan además del original
+            time_limit: Segundos máximos por resolución
+        """
+        self.network = network
+        self.backend = backend
+        self.batch_window = batch_window
+        self.max_batch = max(1, int(max_batch))
+        self.max_models = max_models
+        self.time_limit = time_limit
+        self.counters = {'requests': 0, 'batches': 0, 'solves': 0, 'errors': 0}
+        self._base = PersistentModel(network, backend)
+        self._models = OrderedDict()
+        self._queue = queue.Queue()
+        self._thread = None
+
+    def start(self):
+        """Arranca el hilo resolutor (no hace nada si ya está corriendo)"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="servicio-resolucion",
+                                            daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Detiene el hilo resolutor después de terminar las consultas encoladas"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, request):
+        """
+        Encola una consulta
+
+        Returns:
+            concurrent.futures.Future con el diccionario de respuesta
+        """
+        future = Future()
+        self._queue.put((request, future))
+        return future
+
+    def solve(self, request, timeout=None):
+        """
+        Encola una consulta y espera su respuesta (ver SolveService)
+
+        Si la respuesta no llega en timeout segundos se lanza TimeoutError y
+        la consulta se descarta si todavía no empezó a resolverse.
+        """
+        future = self.submit(request)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def status(self):
+        """Tamaño de la red, backend y contadores del servicio"""
+        return {
+            'backend': self.backend,
+            'nodos': self.network.n_nodes,
+            'arcos': self.network.n_arcs,
+            'modelos': 1 + len(self._models),
+            **self.counters,
+        }
+
+    def _loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.perf_counter() + self.batch_window
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.perf_counter(), 0.0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+            try:
+                self._run_batch(batch)
+            except Exception as exc:
+                # Ningún error de un lote puede detener el hilo: las consultas
+                # que quedaron sin respuesta reciben la excepción
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+
+    def _run_batch(self, batch):
+        """Resuelve un lote agrupando las consultas por variante de la red"""
+        self.counters['batches'] += 1
+        self.counters['requests'] += len(batch)
+        groups = OrderedDict()
+        for request, future in batch:
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                structure, costs = self._parse(request)
+            except (ValueError, TypeError) as exc:
+                self.counters['errors'] += 1
+                future.set_exception(ValueError(str(exc)))
+                continue
+            except Exception as exc:
+                self.counters['errors'] += 1
+                future.set_exception(exc)
+                continue
+            groups.setdefault(structure, []).append((request, costs, future))
+
+        for structure, items in groups.items():
+            try:
+                model = self._model(structure)
+            except Exception as exc:
+                self.counters['errors'] += len(items)
+                for _, _, future in items:
+                    future.set_exception(exc)
+                continue
+            solved = {}
+            for request, costs, future in items:
+                key = costs.tobytes()
+                if key not in solved:
+                    start = time.perf_counter()
+                    try:
+                        solution = model.solve(costs, self.time_limit)
+                    except Exception as exc:
+                        # Un fallo del resolutor no debe dejar esperando al cliente
+                        self.counters['errors'] += 1
+                        future.set_exception(exc)
+                        continue
+                    solved[key] = solution, time.perf_counter() - start
+                    self.counters['solves'] += 1
+                solution, seconds = solved[key]
+                try:
+                    response = self._response(model.network, solution, request, seconds,
+                                              len(batch))
+                except Exception as exc:
+                    self.counters['errors'] += 1
+                    future.set_exception(exc)
+                    continue
+                future.set_result(response)
+
+    def _parse(self, request):
+        """
+        Traduce una consulta a arreglos
+
+        Returns:
+            structure: Tupla canónica de los cambios de capacidad, oferta y
+                demanda (vacía para la red original)
+            costs: Vector de costos completo
+        """
+        if not isinstance(request, dict):
+            raise ValueError("La consulta debe ser un objeto JSON")
+        network = self.network
+        costs = request.get('costs')
+        if costs is None:
+            costs = network.cost
+        elif isinstance(costs, dict):
+            unknown = [name for name in costs if name not in network.arc_ids]
+            if unknown:
+                raise ValueError(f"{unknown[0]!r} no pertenece a la red")
+            costs = network.costs_from_dict(costs)
+        else:
+            costs = np.asarray(costs, dtype=float)
+            if costs.shape != (network.n_arcs,):
+                raise ValueError(f"Se esperaban {network.n_arcs} costos y llegaron {costs.size}")
+        if not np.all(np.isfinite(costs)):
+            raise ValueError("Los costos deben ser números finitos")
+        if request.get('flows', 'nonzero') not in FLOW_MODES:
+            raise ValueError(f"flows debe ser uno de: {', '.join(FLOW_MODES)}")
+
+        structure = []
+        for field, ids in (('capacity', network.arc_ids), ('supply', network.node_ids),
+                           ('demand', network.node_ids)):
+            changes = request.get(field) or {}
+            if not isinstance(changes, dict):
+                raise ValueError(f"{field} debe ser un objeto {{nombre: valor}}")
+            for name, amount in sorted(changes.items()):
+                if name not in ids:
+                    raise ValueError(f"{name!r} no pertenece a la red")
+                structure.append((field, ids[name], np.inf if amount is None else float(amount)))
+        return tuple(structure), costs
+
+    def _model(self, structure):
+        """Modelo persistente de una variante de la red (lo crea si no existe)"""
+        if not structure:
+            return self._base
+        model = self._models.get(structure)
+        if model is not None:
+            self._models.move_to_end(structure)
+            return model
+
+        base = self.network
+        arrays = {'capacity': base.capacity.copy(), 'supply': base.supply.copy(),
+                  'demand': base.demand.copy()}
+        for field, index, amount in structure:
+            arrays[field][index] = amount
+        network = TransshipmentNetwork(base.node_names, base.tail, base.head, base.cost,
+                                       arrays['supply'], arrays['demand'], arrays['capacity'],
+                                       base.lower, base._arc_names)
+        model = PersistentModel(network, self.backend)
+        basis = self._base.basis()
+        if basis is not None:
+            model.load_basis(*basis)
+        self._models[structure] = model
+        while len(self._models) > self.max_models:
+            self._models.popitem(last=False)
+        return model
+
+    def _response(self, network, solution, request, seconds, batch_size):
+        """Diccionario de respuesta de una consulta resuelta"""
+        optimal = solution.status == LpStatusOptimal
+        response = {
+            'estado': LpStatus[solution.status],
+            'costo_total': solution.objective if optimal else None,
+            'iteraciones': solution.iterations,
+            'tiempo_ms': seconds * 1000,
+            'lote': batch_size,
+        }
+        mode = request.get('flows', 'nonzero')
+        if optimal and mode != 'none':
+            flows = solution.flows.tolist()
+            names = network.arc_names
+            if mode == 'all':
+                response['flujos'] = dict(zip(names, flows))
+            else:
+                response['flujos'] = {names[k]: flows[k]
+                                      for k in np.flatnonzero(solution.flows > 1e-9).tolist()}
+        if optimal and request.get('duals', True):
+            response['duales'] = dict(zip(network.constraint_names(), solution.duals.tolist()))
+        return response
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """GET /status y POST /solve con cuerpo JSON"""
+
+    service = None
+    # Segundos máximos de espera de una consulta (504 si se vencen)
+    solve_timeout = 60.0
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/status':
+            self._reply(200, self.service.status())
+        else:
+            self._reply(404, {'error': f"Ruta desconocida: {self.path}"})
+
+    def do_POST(self):
+        if self.path.rstrip('/') != '/solve':
+            self._reply(404, {'error': f"Ruta desconocida: {self.path}"})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length) or b'{}')
+            self._reply(200, self.service.solve(request, self.solve_timeout))
+        except ValueError as exc:
+            self._reply(400, {'error': str(exc)})
+        except TimeoutError:
+            self._reply(504, {'error': f"Sin respuesta en {self.solve_timeout:g} s"})
+        except Exception as exc:
+            self._reply(500, {'error': f"{type(exc).__name__}: {exc}"})
+
+    def _reply(self, code, body):
+        data = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self):
+        # Con socket Unix la dirección del cliente es una cadena vacía
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(service, host='127.0.0.1', port=8765, socket_path=None, timeout=60.0):
+    """
+    Servidor HTTP del servicio, por TCP o por socket Unix
+
+    Args:
+        timeout: Segundos máximos de espera de cada consulta
+
+    Returns:
+        Servidor de socketserver listo para serve_forever()
+    """
+    handler = type('Handler', (_Handler,), {'service': service, 'solve_timeout': timeout})
+    if socket_path is not None:
+        return _UnixHTTPServer(socket_path, handler)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path, timeout=None):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+
+
+def query(request=None, host='127.0.0.1', port=8765, socket_path=None, timeout=60):
+    """
+    Envía una consulta a un servicio en ejecución
+
+    Args:
+        request: Consulta (ver SolveService); None pide el estado del servicio
+
+    Returns:
+        Diccionario de respuesta; ValueError si el servicio rechaza la consulta
+    """
+    conn = (_UnixHTTPConnection(socket_path, timeout) if socket_path is not None
+            else http.client.HTTPConnection(host, port, timeout=timeout))
+    try:
+        if request is None:
+            conn.request('GET', '/status')
+        else:
+            conn.request('POST', '/solve', json.dumps(request),
+                         {'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        body = json.loads(response.read())
+    finally:
+        conn.close()
+    if response.status != 200:
+        raise ValueError(body.get('error', f"Error HTTP {response.status}"))
+    return body
@@ -0,0 +1,503 @@
+"""
+SIMPLEX DE REDES - FLUJO DE COSTO MÍNIMO
+Resolutor en proceso para el problema de transbordo sin pasar por CBC
+"""
+
+from pulp import LpStatusOptimal, LpStatusInfeasible, LpStatusUnbounded, LpStatusNotSolved
+import numpy as np
+import time
+
+from metricas import SolveStats
+from red_transbordo import FlowSolution
+
+# Estados de los arcos fuera del árbol: en cota inferior, en el árbol o en capacidad
+AT_LOWER = 1
+IN_TREE = 0
+AT_UPPER = -1
+
+
+class NetworkSimplex:
+    """
+    Método simplex de redes sobre un árbol de expansión fuertemente factible
+
+    La base se representa como un árbol con raíz artificial (padre, arco al
+    padre, profundidad e hijos de cada nodo). Los potenciales de los nodos se
+    mantienen en un arreglo de NumPy para calcular los costos reducidos por
+    bloques al elegir el arco entrante.
+    """
+
+    def __init__(self, network):
+        """
+        Args:
+            network: TransshipmentNetwork a resolver
+        """
+        self.network = network
+        n, m = network.n_nodes, network.n_arcs
+        self.n_nodes = n
+        self.n_arcs = m
+        self.root = n
+
+        # Los arcos reales van primero y luego un arco artificial por nodo
+        self._tail = np.concatenate([network.tail, np.zeros(n, dtype=np.int64)])
+        self._head = np.concatenate([network.head, np.zeros(n, dtype=np.int64)])
+        self._capacity = np.concatenate([network.capacity - network.lower, np.full(n, np.inf)])
+        self._cost = np.zeros(m + n)
+        self._block = max(64, int(np.sqrt(m + n)))
+        self._next_block = 0
+        self.iterations = 0
+        self._has_basis = False
+
+    def solve(self, costs=None, warm_start=False, time_limit=None):
+        """
+        Resuelve la red con el vector de costos dado
+
+        Con warm_start=True se parte del árbol óptimo de la resolución anterior:
+        como solo cambian los costos, los flujos siguen siendo factibles y basta
+        con recalcular los potenciales y pivotear desde ahí.
+
+        Args:
+            costs: Vector de costos (por defecto los de la red)
+            warm_start: Reutilizar la base de la última resolución si existe
+            time_limit: Segundos máximos de pivoteo; si se agotan, el estado
+                es LpStatusNotSolved y la base queda lista para continuar
+
+        Returns:
+            FlowSolution con flujos, objetivo, precios sombra y costos reducidos
+        """
+        costs = self.network.cost if costs is None else np.asarray(costs, dtype=float)
+        stats = SolveStats.for_network(self.network, 'simplex_red')
+        self._cost[:self.n_arcs] = costs
+        self._cost[self.n_arcs:] = self._artificial_cost(costs)
+        if not (warm_start and self._has_basis):
+            with stats.phase('initialize'):
+                self._initialize_tree()
+        with stats.phase('pivots'):
+            self._compute_potentials()
+            self.iterations = 0
+            solution = self._optimize(time_limit)
+        stats.iterations = self.iterations
+        solution.stats = stats
+        return solution
+
+    def reset(self):
+        """Descarta la base guardada; la próxima resolución arranca en frío"""
+        self._has_basis = False
+
+    def cost_curve(self, arc, max_cost, costs=None):
+        """
+        Recorre la base óptima mientras el costo de un arco sube de 0 a max_cost
+
+        Se resuelve con el costo del arco en 0 (arrancando desde la base
+        actual) y luego se pivotea paramétricamente: para la base vigente se
+        calcula cuánto puede subir el costo antes de que algún arco no básico
+        deje de cumplir la condición de optimalidad, y en ese punto de quiebre
+        ese arco entra a la base. Entre dos quiebres los flujos no cambian.
+
+        Args:
+            arc: Arco cuyo costo se recorre
+            max_cost: Costo máximo del recorrido
+            costs: Costos del resto de los arcos (por defecto los de la red)
+
+        Returns:
+            status: Estado de la resolución con el costo del arco en 0
+            segments: Lista de (costo_inicial, costo_final, flujos) de cada tramo
+        """
+        m = self.n_arcs
+        costs = (self.network.cost if costs is None else np.asarray(costs, dtype=float)).copy()
+        costs[arc] = 0.0
+        self._cost[:m] = costs
+        # La penalización de los artificiales debe cubrir todo el recorrido
+        self._cost[m:] = self._artificial_cost(np.append(costs, max_cost))
+        if not self._has_basis:
+            self._initialize_tree()
+        self._compute_potentials()
+        self.iterations = 0
+        solution = self._optimize()
+        if solution.status != LpStatusOptimal:
+            return solution.status, []
+
+        segments = []
+        start, flows = 0.0, solution.flows
+        while True:
+            increase, entering = self._cost_increase_limit(arc)
+            end = min(start + increase, max_cost)
+            if end > start or end >= max_cost:
+                segments.append((start, end, flows))
+            if end >= max_cost:
+                return LpStatusOptimal, segments
+
+            # Punto de quiebre: el arco bloqueante entra a la base
+            start = end
+            self._cost[arc] = start
+            self._compute_potentials()
+            if not self._pivot(entering):
+                return LpStatusUnbounded, segments
+            self.iterations += 1
+            flows = np.asarray(self._flow[:m]) + self.network.lower
+
+    def _cost_increase_limit(self, arc):
+        """
+        Cuánto puede subir el costo de arc sin que la base deje de ser óptima
+
+        Returns:
+            increase: Aumento máximo (np.inf si no hay límite)
+            entering: Arco que entra a la base al llegar al límite (-1 si no hay)
+        """
+        state = self._state
+        y = self._y
+        reduced = self._cost - y[self._tail] + y[self._head]
+        if state[arc] == AT_LOWER:
+            return np.inf, -1
+        if state[arc] == AT_UPPER:
+            return max(-reduced[arc], 0.0), arc
+
+        # Arco básico: su costo desplaza los potenciales del subárbol que cuelga
+        # de él y cambia el costo reducido de los arcos que cruzan el corte
+        q = self._tail_list[arc] if self._pred[self._tail_list[arc]] == arc else self._head_list[arc]
+        shift = 1.0 if self._tail_list[arc] == q else -1.0
+        below = np.zeros(self.n_nodes + 1)
+        below[self._subtree(q)] = 1.0
+        change = state * shift * (below[self._head] - below[self._tail])
+        blocking = np.flatnonzero(change < 0)
+        if not len(blocking):
+            return np.inf, -1
+        ratios = np.maximum(state[blocking] * reduced[blocking], 0.0) / -change[blocking]
+        i = int(np.argmin(ratios))
+        return float(ratios[i]), int(blocking[i])
+
+    def basis(self):
+        """
+        Base actual en términos de los arcos reales
+
+        Returns:
+            tree_arcs: Arcos en el árbol
+            upper_arcs: Arcos fuera del árbol en su capacidad
+        """
+        state = self._state[:self.n_arcs]
+        return np.flatnonzero(state == IN_TREE), np.flatnonzero(state == AT_UPPER)
+
+    def load_basis(self, tree_arcs, upper_arcs=()):
+        """
+        Prepara el arranque en caliente desde una base dada
+
+        La base puede venir de otra red con la misma estructura y distintas
+        ofertas y demandas (por ejemplo, la ventana anterior de un horizonte
+        rodante). Los arcos de tree_arcs que formen ciclos se descartan; los
+        flujos del árbol se recalculan con las ofertas de esta red y cada
+        subárbol cuyo arco al padre quedaría fuera de sus cotas se cuelga de
+        la raíz con su arco artificial, de modo que el árbol resultante es
+        fuertemente factible. La próxima llamada a solve(warm_start=True)
+        parte de esta base.
+
+        Args:
+            tree_arcs: Arcos reales sugeridos para el árbol
+            upper_arcs: Arcos reales que arrancan en su capacidad
+        """
+        self._initialize_tree()
+        n, m, root = self.n_nodes, self.n_arcs, self.root
+        tail, head = self._tail_list, self._head_list
+        capacity, flow = self._capacity_list, self._flow
+        b = np.asarray(flow[m:]) * np.where(self._tail[m:] == root, -1.0, 1.0)
+
+        upper = [a for a in np.asarray(upper_arcs, dtype=np.int64).tolist()
+                 if capacity[a] < np.inf]
+        for a in upper:
+            self._state[a] = AT_UPPER
+            flow[a] = capacity[a]
+        if upper:
+            b -= np.bincount(self._tail[upper], weights=self._capacity[upper], minlength=n)
+            b += np.bincount(self._head[upper], weights=self._capacity[upper], minlength=n)
+
+        # Bosque con los arcos sugeridos (los que cierran ciclos se descartan)
+        group = list(range(n))
+
+        def find(v):
+            while group[v] != v:
+                group[v] = group[group[v]]
+                v = group[v]
+            return v
+
+        neighbors = [[] for _ in range(n)]
+        is_upper = self._state == AT_UPPER
+        for a in np.asarray(tree_arcs, dtype=np.int64).tolist():
+            if is_upper[a]:
+                continue
+            ra, rb = find(tail[a]), find(head[a])
+            if ra != rb:
+                group[ra] = rb
+                neighbors[tail[a]].append(a)
+                neighbors[head[a]].append(a)
+
+        parent, pred = [root] * n + [-1], list(range(m, m + n)) + [-1]
+        seen = [False] * n
+        order = []
+        for r in range(n):
+            if seen[r]:
+                continue
+            seen[r] = True
+            i = len(order)
+            order.append(r)
+            while i < len(order):
+                v = order[i]
+                i += 1
+                for a in neighbors[v]:
+                    w = head[a] if tail[a] == v else tail[a]
+                    if not seen[w]:
+                        seen[w] = True
+                        parent[w], pred[w] = v, a
+                        order.append(w)
+
+        # Flujos del árbol de las hojas hacia arriba: s es lo que el subárbol
+        # de v debe enviar hacia su padre
+        s = b.tolist()
+        for v in reversed(order):
+            a = pred[v]
+            if a < m:
+                f = s[v] if tail[a] == v else -s[v]
+                # Fuertemente factible: debe poder subir flujo de v hacia la raíz
+                if (tail[a] == v and 0 <= f < capacity[a]) or (head[a] == v and 0 < f <= capacity[a]):
+                    flow[a] = f
+                    self._state[a] = IN_TREE
+                    s[parent[v]] += s[v]
+                    continue
+                parent[v], pred[v] = root, m + v
+            # Arco artificial: de v a la raíz si el subárbol tiene excedente
+            flow[m + v] = abs(s[v])
+            tail[m + v], head[m + v] = (v, root) if s[v] >= 0 else (root, v)
+
+        self._tail[m:] = tail[m:]
+        self._head[m:] = head[m:]
+        self._state[m:] = [IN_TREE if pred[v] == m + v else AT_LOWER for v in range(n)]
+        for v in range(n):
+            if pred[v] != m + v:
+                flow[m + v] = 0.0
+
+        self._parent, self._pred = parent, pred
+        self._children = [set() for _ in range(n + 1)]
+        for v in range(n):
+            self._children[parent[v]].add(v)
+        self._depth = [0] * (n + 1)
+        for w in self._subtree(root)[1:]:
+            self._depth[w] = self._depth[parent[w]] + 1
+
+    def _artificial_cost(self, costs):
+        """Costo de penalización de los arcos artificiales (Gran M)"""
+        max_cost = float(np.abs(costs).max()) if len(costs) else 0.0
+        return 1.0 + (self.n_nodes + 1) * max(max_cost, 1.0)
+
+    def _initialize_tree(self):
+        """Árbol inicial: cada nodo conectado a la raíz por su arco artificial"""
+        network = self.network
+        n, m = self.n_nodes, self.n_arcs
+
+        # Las cotas inferiores se trasladan a la oferta neta de los nodos
+        b = network.net_supply.copy()
+        if np.any(network.lower):
+            b -= np.bincount(network.tail, weights=network.lower, minlength=n)
+            b += np.bincount(network.head, weights=network.lower, minlength=n)
+
+        # Los nodos con oferta o sin desbalance apuntan hacia la raíz, lo que
+        # hace al árbol inicial fuertemente factible
+        nodes = np.arange(n)
+        towards_root = b >= 0
+        self._tail[m:] = np.where(towards_root, nodes, self.root)
+        self._head[m:] = np.where(towards_root, self.root, nodes)
+
+        self._flow = [0.0] * m + np.abs(b).tolist()
+        self._state = np.concatenate([np.full(m, AT_LOWER, dtype=np.int8),
+                                      np.full(n, IN_TREE, dtype=np.int8)])
+        self._tail_list = self._tail.tolist()
+        self._head_list = self._head.tolist()
+        self._capacity_list = self._capacity.tolist()
+
+        self._parent = [self.root] * n + [-1]
+        self._pred = list(range(m, m + n)) + [-1]
+        self._depth = [1] * n + [0]
+        self._children = [set() for _ in range(n)] + [set(range(n))]
+        self._next_block = 0
+        self._has_basis = True
+
+    def _compute_potentials(self):
+        """Recalcula todos los potenciales recorriendo el árbol desde la raíz"""
+        y = np.zeros(self.n_nodes + 1)
+        cost = self._cost
+        tail = self._tail_list
+        parent, pred = self._parent, self._pred
+        for w in self._subtree(self.root)[1:]:
+            a = pred[w]
+            if tail[a] == w:
+                y[w] = cost[a] + y[parent[w]]
+            else:
+                y[w] = y[parent[w]] - cost[a]
+        self._y = y
+
+    def _subtree(self, node):
+        """Nodos del subárbol de node, cada padre antes que sus hijos"""
+        children = self._children
+        order = [node]
+        for w in order:
+            order.extend(children[w])
+        return order
+
+    def _select_entering(self):
+        """Elige el arco entrante por bloques (regla de Dantzig dentro del bloque)"""
+        total = self.n_arcs + self.n_nodes
+        y = self._y
+        tol = self._tolerance
+        start = self._next_block
+        for _ in range(-(-total // self._block)):
+            end = min(start + self._block, total)
+            reduced = self._cost[start:end] - y[self._tail[start:end]] + y[self._head[start:end]]
+            violation = -self._state[start:end] * reduced
+            k = int(np.argmax(violation))
+            if violation[k] > tol:
+                self._next_block = end % total
+                return start + k
+            start = end % total
+        return -1
+
+    def _optimize(self, time_limit=None):
+        """Ejecuta pivotes hasta que ningún arco viole la condición de optimalidad"""
+        self._tolerance = 1e-9 * max(1.0, float(np.abs(self._cost[:self.n_arcs]).max(initial=0.0)))
+        deadline = None if time_limit is None else time.perf_counter() + time_limit
+        while True:
+            entering = self._select_entering()
+            if entering < 0:
+                break
+            if not self._pivot(entering):
+                return self._solution(LpStatusUnbounded)
+            self.iterations += 1
+            if deadline is not None and self.iterations % 64 == 0 and time.perf_counter() > deadline:
+                return self._solution(LpStatusNotSolved)
+
+        artificial = np.asarray(self._flow[self.n_arcs:])
+        scale = max(1.0, float(np.abs(self.network.net_supply).max(initial=0.0)))
+        if np.any(artificial > 1e-9 * scale):
+            return self._solution(LpStatusInfeasible)
+        return self._solution(LpStatusOptimal)
+
+    def _pivot(self, e):
+        """
+        Realiza un pivote con el arco entrante e
+
+        Returns:
+            False si el ciclo no tiene arcos que lo bloqueen (problema no acotado)
+        """
+        tail, head = self._tail_list, self._head_list
+        capacity, flow = self._capacity_list, self._flow
+        parent, pred, depth = self._parent, self._pred, self._depth
+
+        # El flujo se envía de s a t por el arco entrante y vuelve por el árbol
+        if self._state[e] == AT_LOWER:
+            s, t = tail[e], head[e]
+            e_residual = capacity[e] - flow[e]
+        else:
+            s, t = head[e], tail[e]
+            e_residual = flow[e]
+
+        # Caminos desde s y desde t hasta el ápice del ciclo
+        s_path, t_path = [], []
+        u, v = s, t
+        while u != v:
+            if depth[u] >= depth[v]:
+                s_path.append(u)
+                u = parent[u]
+            else:
+                t_path.append(v)
+                v = parent[v]
+
+        # Arco saliente: último arco bloqueante al recorrer el ciclo en el
+        # sentido del flujo a partir del ápice (mantiene el árbol fuertemente factible)
+        delta = np.inf
+        leaving, leaving_node, leaving_side, leaving_up = -1, -1, 0, False
+        for w in reversed(s_path):
+            a = pred[w]
+            up = head[a] == w
+            residual = capacity[a] - flow[a] if up else flow[a]
+            if residual <= delta:
+                delta, leaving, leaving_node, leaving_side, leaving_up = residual, a, w, 1, up
+        if e_residual <= delta:
+            delta, leaving, leaving_node, leaving_side, leaving_up = e_residual, e, -1, 0, s == tail[e]
+        for w in t_path:
+            a = pred[w]
+            up = tail[a] == w
+            residual = capacity[a] - flow[a] if up else flow[a]
+            if residual <= delta:
+                delta, leaving, leaving_node, leaving_side, leaving_up = residual, a, w, 2, up
+
+        if delta == np.inf:
+            return False
+
+        # Aumento de flujo a lo largo del ciclo
+        if delta > 0:
+            flow[e] += delta if s == tail[e] else -delta
+            for w in s_path:
+                a = pred[w]
+                flow[a] += delta if head[a] == w else -delta
+            for w in t_path:
+                a = pred[w]
+                flow[a] += delta if tail[a] == w else -delta
+
+        # El arco saliente queda exactamente en la cota que lo bloqueó
+        flow[leaving] = capacity[leaving] if leaving_up else 0.0
+        if leaving == e:
+            self._state[e] = AT_UPPER if leaving_up else AT_LOWER
+            return True
+        self._state[leaving] = AT_UPPER if leaving_up else AT_LOWER
+        self._state[e] = IN_TREE
+
+        if leaving_side == 1:
+            q, p = s, t
+        else:
+            q, p = t, s
+        self._reroot(q, p, e, leaving_node)
+        return True
+
+    def _reroot(self, q, p, e, x):
+        """
+        Cuelga de p el subárbol que se separa al quitar el arco de x a su padre,
+        usando q como nueva raíz del subárbol y e como arco de unión
+        """
+        parent, pred, depth, children = self._parent, self._pred, self._depth, self._children
+
+        path = [q]
+        while path[-1] != x:
+            path.append(parent[path[-1]])
+
+        children[parent[x]].discard(x)
+        old_pred = [pred[w] for w in path]
+        for i in range(len(path) - 1, 0, -1):
+            w, below = path[i], path[i - 1]
+            children[w].discard(below)
+            children[below].add(w)
+            parent[w] = below
+            pred[w] = old_pred[i - 1]
+        parent[q] = p
+        pred[q] = e
+        children[p].add(q)
+
+        # El subárbol se desplaza en bloque: sus arcos internos no cambian
+        y = self._y
+        if self._tail_list[e] == q:
+            shift = self._cost[e] + y[p] - y[q]
+        else:
+            shift = y[p] - self._cost[e] - y[q]
+        nodes = self._subtree(q)
+        y[nodes] += shift
+        for w in nodes:
+            depth[w] = depth[parent[w]] + 1
+
+    def _solution(self, status):
+        """Arma la FlowSolution en términos de la red original"""
+        network = self.network
+        m = self.n_arcs
+        flows = np.asarray(self._flow[:m]) + network.lower
+
+        # Los costos reducidos no dependen de la constante de los potenciales;
+        # los precios sombra se normalizan igual que con los demás backends
+        y = self._y[:self.n_nodes]
+        costs = self._cost[:m]
+        reduced_costs = costs - y[network.tail] + y[network.head]
+        duals = network.normalize_duals(network.row_sign * y)
+        objective = float(costs @ flows)
+        return FlowSolution(status, objective, flows, duals, reduced_costs, self.iterations)
@@ -0,0 +1,243 @@
+"""
+SIMULACIÓN MONTE CARLO - INCERTIDUMBRE EN LOS COSTOS
+Muestreo vectorizado de costos por arco (normal, triangular y correlacionado
+por transbordo) y resolución por lotes con modelos persistentes
+"""
+
+from pulp import LpStatus, LpStatusOptimal
+import numpy as np
+
+from barrido_paralelo import ParallelSweep
+
+DISTRIBUTIONS = ('normal', 'triangular')
+
+
+def hub_groups(network):
+    """
+    Grupo de correlación de cada arco: el nodo de transbordo que toca
+
+    Los arcos que entran a un transbordo se agrupan por su destino y los que
+    salen por su origen. Los arcos sin transbordo en sus extremos devuelven -1
+    (no se correlacionan con ningún otro).
+    """
+    is_hub = network.net_supply == 0
+    return np.where(is_hub[network.tail], network.tail,
+                    np.where(is_hub[network.head], network.head, -1))
+
+
+class CostSampler:
+    """
+    Generador de vectores de costos aleatorios para toda la red
+
+    Cada costo se obtiene multiplicando el costo base por un factor aleatorio.
+    Con hub_correlation = rho los factores de los arcos de un mismo transbordo
+    comparten un componente común: en la normal el ruido es
+    sqrt(rho) * Z_transbordo + sqrt(1 - rho) * Z_arco; en la triangular cada
+    arco toma con probabilidad sqrt(rho) el cuantil de su transbordo y si no
+    el propio, lo que conserva exactamente la distribución marginal y da una
+    correlación de rangos rho entre dos arcos del mismo transbordo.
+    """
+
+    def __init__(self, network, distribution='normal', sigma=0.1, low=0.9, mode=1.0, high=1.2,
+                 hub_correlation=0.0, base_costs=None, seed=None):
+        """
+        Args:
+            network: TransshipmentNetwork cuyos costos se muestrean
+            distribution: 'normal' o 'triangular'
+            sigma: Desviación estándar relativa (normal)
+            low, mode, high: Factores mínimo, más probable y máximo (triangular)
+            hub_correlation: Correlación entre arcos del mismo transbordo (0 a 1)
+            base_costs: Costos base (por defecto los de la red)
+            seed: Semilla del generador aleatorio
+        """
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Distribución desconocida: {distribution!r}. "
+                             f"Opciones: {', '.join(DISTRIBUTIONS)}")
+        if not 0.0 <= hub_correlation <= 1.0:
+            raise ValueError("hub_correlation debe estar entre 0 y 1")
+        if distribution == 'triangular' and not low <= mode <= high:
+            raise ValueError("La triangular requiere low <= mode <= high")
+
+        self.network = network
+        self.distribution = distribution
+        self.sigma = sigma
+        self.low, self.mode, self.high = low, mode, high
+        self.hub_correlation = hub_correlation
+        self.base_costs = network.cost if base_costs is None else np.asarray(base_costs, dtype=float)
+        self.rng = np.random.default_rng(seed)
+
+        # Índice del grupo de cada arco; los arcos sin transbordo tienen su propio grupo
+        groups = hub_groups(network)
+        solo = groups < 0
+        _, self._group = np.unique(np.where(solo, network.n_nodes + np.arange(network.n_arcs), groups),
+                                   return_inverse=True)
+        self._n_groups = int(self._group.max(initial=-1)) + 1
+        self._correlated = ~solo
+
+    def sample(self, n_samples):
+        """
+        Genera n_samples vectores de costos en una sola operación
+
+        Returns:
+            Matriz n_samples x arcos con costos no negativos
+        """
+        n_arcs = self.network.n_arcs
+        rho = self.hub_correlation
+        rng = self.rng
+
+        if self.distribution == 'normal':
+            noise = rng.standard_normal((n_samples, n_arcs))
+            if rho > 0:
+                shared = rng.standard_normal((n_samples, self._n_groups))[:, self._group]
+                mixed = np.sqrt(rho) * shared + np.sqrt(1.0 - rho) * noise
+                noise = np.where(self._correlated, mixed, noise)
+            factors = 1.0 + self.sigma * noise
+        else:
+            quantiles = rng.random((n_samples, n_arcs))
+            if rho > 0:
+                shared = rng.random((n_samples, self._n_groups))[:, self._group]
+                use_shared = self._correlated & (rng.random((n_samples, n_arcs)) < np.sqrt(rho))
+                quantiles = np.where(use_shared, shared, quantiles)
+            factors = self._triangular_quantile(quantiles)
+
+        return np.maximum(factors, 0.0) * self.base_costs
+
+    def _triangular_quantile(self, u):
+        """Inversa de la función de distribución triangular (low, mode, high)"""
+        low, mode, high = self.low, self.mode, self.high
+        width = high - low
+        if width == 0:
+            return np.full_like(u, low)
+        split = (mode - low) / width
+        left = low + np.sqrt(u * width * (mode - low))
+        right = high - np.sqrt((1.0 - u) * width * (high - mode))
+        return np.where(u < split, left, right)
+
+
+class MonteCarloResult:
+    """
+    Resultados acumulados de una simulación Monte Carlo
+
+    Attributes:
+        objectives: Costo total de cada muestra (NaN si no hubo óptimo)
+        statuses: Estado de PuLP de cada muestra
+        usage_frequency: Fracción de muestras óptimas en que cada arco lleva flujo
+        mean_flows: Flujo medio de cada arco sobre las muestras óptimas
+    """
+
+    def __init__(self, network, objectives, statuses, usage_counts, flow_sums):
+        self.network = network
+        self.objectives = objectives
+        self.statuses = statuses
+        optimal = max(1, int(np.sum(statuses == LpStatusOptimal)))
+        self.usage_frequency = usage_counts / optimal
+        self.mean_flows = flow_sums / optimal
+
+    @property
+    def n_samples(self):
+        return len(self.objectives)
+
+    @property
+    def n_optimal(self):
+        return int(np.sum(self.statuses == LpStatusOptimal))
+
+    def percentiles(self, q=(5, 25, 50, 75, 95)):
+        """Percentiles del costo total sobre las muestras óptimas"""
+        return dict(zip(q, np.nanpercentile(self.objectives, q).tolist()))
+
+    def summary(self, q=(5, 25, 50, 75, 95)):
+        """Resumen de la distribución del costo total en un diccionario"""
+        status_counts = {LpStatus[s]: int(c) for s, c in
+                         zip(*np.unique(self.statuses, return_counts=True))}
+        return {
+            'muestras': self.n_samples,
+            'estados': status_counts,
+            'media': float(np.nanmean(self.objectives)),
+            'desviacion': float(np.nanstd(self.objectives)),
+            'minimo': float(np.nanmin(self.objectives)),
+            'maximo': float(np.nanmax(self.objectives)),
+            'percentiles': self.percentiles(q),
+            'uso_arcos': self.network.flows_to_dict(self.usage_frequency),
+        }
+
+
+class MonteCarloSimulation:
+    """
+    Simulación Monte Carlo de costos sobre una red fija
+
+    Las muestras se generan y resuelven por lotes: cada lote es una matriz de
+    costos que se reparte en ParallelSweep, con un modelo persistente por
+    proceso que arranca en caliente entre muestras del mismo bloque. Solo se
+    acumulan el objetivo de cada muestra y los totales por arco, de modo que la
+    memoria no crece con los flujos de cada muestra.
+    """
+
+    def __init__(self, network, backend='simplex_red', workers=1, batch_size=2048, chunk_size=64):
+        """
+        Args:
+            network: TransshipmentNetwork a simular
+            backend: Resolutor (ver resolutores.BACKENDS); por defecto el
+                simplex de redes en proceso
+            workers: Procesos para resolver cada lote
+            batch_size: Muestras generadas y resueltas por lote
+            chunk_size: Muestras por tarea enviada al pool
+        """
+        self.network = network
+        self.batch_size = max(1, int(batch_size))
+        self._sweep = ParallelSweep(network, backend, workers, chunk_size)
+
+    def iter_batches(self, n_samples, sampler):
+        """
+        Resuelve las muestras lote por lote
+
+        Yields:
+            (costs, objectives, statuses, flows) de cada lote; flows es una
+            matriz muestras x arcos con NaN en las muestras sin óptimo
+        """
+        done = 0
+        while done < n_samples:
+            size = min(self.batch_size, n_samples - done)
+            costs = sampler.sample(size)
+            solutions = self._sweep.run(costs, return_flows=True)
+
+            statuses = np.array([s.status for s in solutions])
+            objectives = np.array([s.objective if s.status == LpStatusOptimal else np.nan
+                                   for s in solutions], dtype=float)
+            flows = np.full((size, self.network.n_arcs), np.nan)
+            for i, solution in enumerate(solutions):
+                if solution.status == LpStatusOptimal:
+                    flows[i] = solution.flows
+            done += size
+            yield costs, objectives, statuses, flows
+
+    def run(self, n_samples, sampler, callback=None, tol=1e-9):
+        """
+        Ejecuta la simulación completa
+
+        Args:
+            n_samples: Número total de muestras
+            sampler: CostSampler que genera los costos
+            callback: Función opcional callback(muestras_listas, objetivos_lote)
+                llamada después de cada lote
+            tol: Flujo mínimo para considerar que un arco se usa
+
+        Returns:
+            MonteCarloResult
+        """
+        objectives, statuses = [], []
+        usage_counts = np.zeros(self.network.n_arcs)
+        flow_sums = np.zeros(self.network.n_arcs)
+        done = 0
+        for _, batch_objectives, batch_statuses, flows in self.iter_batches(n_samples, sampler):
+            objectives.append(batch_objectives)
+            statuses.append(batch_statuses)
+            optimal = flows[batch_statuses == LpStatusOptimal]
+            usage_counts += np.sum(optimal > tol, axis=0)
+            flow_sums += optimal.sum(axis=0)
+            done += len(batch_objectives)
+            if callback is not None:
+                callback(done, batch_objectives)
+
+        return MonteCarloResult(self.network, np.concatenate(objectives) if objectives else np.array([]),
+                                np.concatenate(statuses) if statuses else np.array([], dtype=int),
+                                usage_counts, flow_sums)
@@ -0,0 +1,391 @@
+"""
+TRANSBORDO - PUNTO DE ENTRADA ÚNICO POR LÍNEA DE COMANDOS
+Subcomandos solve, sensitivity, scenarios, sweep, compare-capacity, serve y
+verify; cada uno importa solo los módulos que necesita (resolutores, NumPy,
+reportes) para que el arranque no pese más que la resolución
+"""
+
+import time
+
+# El tiempo total se mide desde antes de importar el resto de los módulos
+_START = time.perf_counter()
+
+import argparse
+from contextlib import contextmanager
+import sys
+
+
+class _Timer:
+    """Tiempos por fase de una ejecución de la línea de comandos"""
+
+    def __init__(self):
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def report(self, file=None):
+        file = file or sys.stderr
+        total = time.perf_counter() - _START
+        parts = [f"{name} {seconds * 1000:.1f} ms" for name, seconds in self.phases.items()]
+        print(f"Tiempos: {' | '.join(parts)} | total {total * 1000:.1f} ms", file=file)
+
+
+def _load_network(args, timer, with_capacity=False):
+    """Red pedida en los argumentos: carpeta columnar, CSV o el caso de estudio"""
+    if args.network:
+        with timer.phase('importación'):
+            from carga_datos import load_columnar
+        with timer.phase('carga'):
+            return load_columnar(args.network)
+    if args.arcs:
+        with timer.phase('importación'):
+            from carga_datos import load_network_csv
+        with timer.phase('carga'):
+            return load_network_csv(args.arcs, args.nodes)
+    with timer.phase('importación'):
+        from red_transbordo import default_network
+    with timer.phase('carga'):
+        return default_network(with_capacity=with_capacity or args.capacity)
+
+
+def cmd_solve(args, timer):
+    """Resuelve una vez y muestra el costo y los flujos positivos"""
+    network = _load_network(args, timer)
+    with timer.phase('importación'):
+        from pulp import LpStatus, LpStatusOptimal
+        from resolutores import solve_flow
+    with timer.phase('resolución'):
+        solution = solve_flow(network, backend=args.backend, presolve=args.presolve)
+
+    with timer.phase('reporte'):
+        if args.json:
+            import json
+            flows = solution.flows.tolist()
+            print(json.dumps({
+                'estado': LpStatus[solution.status],
+                'costo_total': solution.objective,
+                'iteraciones': solution.iterations,
+                'flujos': {name: x for name, x in zip(network.arc_names, flows) if x > 1e-9},
+            }))
+        elif args.summary:
+            from reportes import print_summary
+            print_summary(network, solution, args.top)
+        else:
+            print(f"Estado: {LpStatus[solution.status]}")
+            if solution.objective is not None:
+                print(f"Costo total: {solution.objective:,.2f}")
+            if solution.status == LpStatusOptimal:
+                names = network.arc_names
+                used = [k for k, x in enumerate(solution.flows.tolist()) if x > 1e-9]
+                for k in used[:args.top]:
+                    print(f"  {names[k]:20} {solution.flows[k]:12.2f}")
+                if len(used) > args.top:
+                    print(f"  ... {len(used) - args.top:,} arcos más con flujo")
+        if args.export:
+            from reportes import export_solution
+            for path in export_solution(network, solution, args.export, args.format):
+                print(f"Solución exportada a {path}", file=sys.stderr)
+    return 0 if solution.status == LpStatusOptimal else 1
+
+
+def cmd_sensitivity(args, timer):
+    """Rangos de optimalidad de costos y de ofertas y demandas (una resolución)"""
+    network = _load_network(args, timer)
+    with timer.phase('importación'):
+        from pulp import LpStatus, LpStatusOptimal
+        from resolutores import solve_flow
+        from sensibilidad_analitica import cost_ranging, rhs_ranging
+    with timer.phase('resolución'):
+        solution = solve_flow(network, backend=args.backend)
+    if solution.status != LpStatusOptimal:
+        print(f"Estado: {LpStatus[solution.status]}: no hay rangos que calcular")
+        return 1
+    with timer.phase('sensibilidad'):
+        lower, upper = cost_ranging(network, solution.flows, solution.reduced_costs)
+        rhs = rhs_ranging(network, solution.flows, solution.reduced_costs, solution.duals)
+
+    with timer.phase('reporte'):
+        print(f"Costo total: {solution.objective:,.2f}")
+        print("\nRANGOS DE COSTOS:")
+        print("-" * 80)
+        print(f"{'Arco':20} | {'Flujo':>10} | {'Costo':>8} | {'Mínimo':>10} | {'Máximo':>10}")
+        names = network.arc_names
+        for k in range(min(network.n_arcs, args.top)):
+            print(f"{names[k]:20} | {solution.flows[k]:10.2f} | {network.cost[k]:8.2f} | "
+                  f"{lower[k]:10.2f} | {upper[k]:10.2f}")
+        print("\nRANGOS DE OFERTA Y DEMANDA:")
+        print("-" * 80)
+        print(f"{'Restricción':30} | {'Actual':>10} | {'Precio':>8} | {'Mínimo':>10} | {'Máximo':>10}")
+        for name, value, dual, low, high in rhs[:args.top]:
+            print(f"{name:30} | {value:10.2f} | {dual:8.2f} | {low:10.2f} | {high:10.2f}")
+    return 0
+
+
+def cmd_scenarios(args, timer):
+    """Resuelve un lote de escenarios de costos en una sola llamada"""
+    network = _load_network(args, timer)
+    with timer.phase('importación'):
+        import numpy as np
+        from barrido_paralelo import solve_many
+    with timer.phase('carga'):
+        if args.costs:
+            cost_matrix = np.atleast_2d(np.load(args.costs))
+            labels = [f"Escenario {i + 1}" for i in range(len(cost_matrix))]
+        else:
+            factors = np.array([1.0] + args.factors)
+            cost_matrix = factors[:, np.newaxis] * network.cost
+            labels = ["Base"] + [f"Factor {f:.2f}" for f in args.factors]
+    with timer.phase('resolución'):
+        objectives = solve_many(network, cost_matrix, args.backend, args.workers,
+                                presolve=args.presolve)
+
+    with timer.phase('reporte'):
+        base = objectives[0]
+        print(f"{'Escenario':22} | {'Costo Total':>14} | {'Cambio':>12} | {'Cambio %':>9}")
+        print("-" * 80)
+        for label, objective in zip(labels, objectives.tolist()):
+            change = objective - base
+            print(f"{label:22} | {objective:14.2f} | {change:12.2f} | {change / base * 100:8.2f}%")
+    return 0 if np.isfinite(objectives).all() else 1
+
+
+def cmd_sweep(args, timer):
+    """Barrido de perturbaciones arco por arco como trabajo cancelable y reanudable"""
+    network = _load_network(args, timer)
+    with timer.phase('importación'):
+        import asyncio
+        import numpy as np
+        from cola_trabajos import FINISHED, JobRunner, perturbation_costs
+    # La fila 0 es el costo base; luego cada arco con cada factor
+    cost_matrix = np.vstack([network.cost, perturbation_costs(network, args.factors)])
+
+    async def run():
+        async with JobRunner(args.workers) as runner:
+            job = runner.submit(network, cost_matrix, args.backend, args.chunk_size,
+                                timeout=args.timeout, checkpoint=args.checkpoint)
+            if job.restored:
+                print(f"Retomando: {job.restored:,} de {job.total:,} puntos ya resueltos",
+                      file=sys.stderr)
+            step = max(1, job.total // 20)
+            count = 0
+            async for _ in job.stream():
+                count += 1
+                if count % step == 0 or count == job.total:
+                    print(f"  {count:,} / {job.total:,} puntos", file=sys.stderr)
+            return await job.wait()
+
+    with timer.phase('resolución'):
+        try:
+            job = asyncio.run(run())
+        except KeyboardInterrupt:
+            print("Interrumpido: los puntos resueltos quedan en el archivo de control",
+                  file=sys.stderr)
+            return 1
+
+    with timer.phase('reporte'):
+        objectives = job.objectives()
+        base = objectives[0]
+        print(f"Estado del trabajo: {job.state} ({job.done:,} / {job.total:,} puntos)")
+        changes = (objectives[1:] - base).reshape(network.n_arcs, len(args.factors))
+        impact = np.nanmax(np.abs(changes), axis=1, initial=0.0)
+        names = network.arc_names
+        print(f"{'Arco':20} | {'Costo':>8} | " +
+              " | ".join(f"{'x' + format(f, 'g'):>10}" for f in args.factors) + f" | {'Impacto':>10}")
+        print("-" * 80)
+        for k in np.argsort(-impact, kind='stable')[:args.top].tolist():
+            print(f"{names[k]:20} | {network.cost[k]:8.2f} | " +
+                  " | ".join(f"{c:10.2f}" for c in changes[k].tolist()) + f" | {impact[k]:10.2f}")
+    return 0 if job.state == FINISHED else 1
+
+
+def cmd_compare_capacity(args, timer):
+    """Compara el costo óptimo con y sin las capacidades de los arcos"""
+    network = _load_network(args, timer, with_capacity=True)
+    with timer.phase('importación'):
+        import numpy as np
+        from pulp import LpStatus, LpStatusOptimal
+        from red_transbordo import TransshipmentNetwork
+        from reduccion_transporte import TwoStageReduction
+        from resolutores import solve_flow
+        from transshipment_optimization import compare_solutions
+    uncapacitated = TransshipmentNetwork(network.node_names, network.tail, network.head,
+                                         network.cost, network.supply, network.demand,
+                                         None, network.lower, network._arc_names)
+    with timer.phase('resolución'):
+        try:
+            reduction = TwoStageReduction(uncapacitated)
+        except ValueError:
+            reduction = None
+        # La reducción a transporte conviene cuando fuentes x destinos < arcos
+        if reduction is not None and reduction.n_route_arcs < uncapacitated.n_arcs:
+            without = reduction.solve(backend=args.backend)
+        else:
+            without = solve_flow(uncapacitated, backend=args.backend)
+        with_capacity = solve_flow(network, backend=args.backend)
+    for label, solution in (("sin capacidades", without), ("con capacidades", with_capacity)):
+        if solution.status != LpStatusOptimal:
+            print(f"Estado {label}: {LpStatus[solution.status]}")
+            return 1
+
+    with timer.phase('reporte'):
+        compare_solutions(without.objective, with_capacity.objective)
+        saturated = np.flatnonzero(with_capacity.flows >= network.capacity - 1e-9)
+        if len(saturated):
+            names = network.arc_names
+            print(f"\nArcos en su capacidad: {len(saturated):,}")
+            for k in saturated[:args.top].tolist():
+                print(f"  {names[k]:20} {with_capacity.flows[k]:12.2f} / {network.capacity[k]:g}")
+    return 0
+
+
+def cmd_verify(args, timer):
+    """Verifica los backends contra las instancias de referencia"""
+    with timer.phase('importación'):
+        from instancias_referencia import (PATHS, REFERENCE_DIR, load_references,
+                                           run_expansion_checks, run_references)
+        from resolutores import BACKENDS
+    with timer.phase('carga'):
+        references = load_references(args.dir or REFERENCE_DIR)
+    with timer.phase('resolución'):
+        results = run_references(references, args.backends or BACKENDS, args.paths or PATHS,
+                                 verbose=not args.quiet)
+        results += run_expansion_checks(args.backends or BACKENDS, verbose=not args.quiet)
+    failures = [r for r in results if r['state'] == 'FALLA']
+    skipped = sum(r['state'] == 'OMITIDO' for r in results)
+    print(f"OK: {len(results) - len(failures) - skipped}  |  Fallas: {len(failures)}  |  "
+          f"Omitidos: {skipped}")
+    if args.quiet:
+        for r in failures:
+            print(f"  {r['instance']} / {r['backend']} / {r['path']}: {r['errors'][0]}")
+    return 1 if failures else 0
+
+
+def cmd_serve(args, timer):
+    """Servicio local que mantiene la red y sus modelos en memoria"""
+    network = _load_network(args, timer)
+    with timer.phase('importación'):
+        from servicio_resolucion import SolveService, make_server
+    service = SolveService(network, args.backend, args.batch_window / 1000,
+                           args.max_batch).start()
+    server = make_server(service, args.host, args.port, args.socket, args.timeout)
+    where = args.socket or f"http://{args.host}:{args.port}"
+    print(f"Servicio en {where}: {network.n_nodes:,} nodos, {network.n_arcs:,} arcos, "
+          f"backend {args.backend} (POST /solve, GET /status)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+    return 0
+
+
+def build_parser():
+    """Analizador de argumentos con un subcomando por tarea"""
+    parser = argparse.ArgumentParser(
+        prog='transbordo', description="Problema de transbordo: resolución, sensibilidad, "
+                                       "escenarios, capacidades y verificación")
+    parser.add_argument('--timings', action='store_true',
+                        help="Muestra en stderr el tiempo de cada fase (importación, resolución, ...)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    network_args = argparse.ArgumentParser(add_help=False)
+    network_args.add_argument('--backend', default='cbc',
+                              help="cbc, simplex_red o highs (por defecto cbc)")
+    network_args.add_argument('--network', help="Carpeta de una red en formato columnar")
+    network_args.add_argument('--arcs', help="CSV de arcos (ver carga_datos.py)")
+    network_args.add_argument('--nodes', help="CSV de nodos con ofertas y demandas")
+    network_args.add_argument('--capacity', action='store_true',
+                              help="Caso de estudio con capacidades en los arcos")
+    network_args.add_argument('--top', type=int, default=20, help="Filas máximas por tabla")
+
+    solve = subparsers.add_parser('solve', parents=[network_args], help="Resolver una vez")
+    solve.add_argument('--json', action='store_true', help="Salida en JSON (estado, costo y flujos)")
+    solve.add_argument('--presolve', action='store_true',
+                       help="Poda arcos dominados y contrae transbordos de paso antes de resolver")
+    solve.add_argument('--summary', action='store_true', help="Resumen completo (reportes.py)")
+    solve.add_argument('--export', metavar='RUTA', help="Exporta la solución completa")
+    solve.add_argument('--format', default='csv', help="csv, json o npy (con --export)")
+    solve.set_defaults(handler=cmd_solve)
+
+    sensitivity = subparsers.add_parser('sensitivity', parents=[network_args],
+                                        help="Rangos de optimalidad de costos y de ofertas/demandas")
+    sensitivity.set_defaults(handler=cmd_sensitivity)
+
+    scenarios = subparsers.add_parser('scenarios', parents=[network_args],
+                                      help="Lote de escenarios de costos")
+    scenarios.add_argument('--factors', type=float, nargs='+', default=[0.9, 1.1, 1.15],
+                           help="Factores que multiplican todos los costos")
+    scenarios.add_argument('--costs', metavar='NPY',
+                           help="Matriz escenarios x arcos de costos (reemplaza a --factors)")
+    scenarios.add_argument('--workers', type=int, default=1, help="Procesos (1 = sin pool)")
+    scenarios.add_argument('--presolve', action='store_true',
+                           help="Resuelve cada escenario sobre la red reducida (ver solve --presolve)")
+    scenarios.set_defaults(handler=cmd_scenarios)
+
+    sweep = subparsers.add_parser('sweep', parents=[network_args],
+                                  help="Barrido de perturbaciones arco por arco (cancelable, reanudable)")
+    sweep.add_argument('--factors', type=float, nargs='+', default=[0.9, 1.1],
+                       help="Factores que multiplican el costo de cada arco, uno por vez")
+    sweep.add_argument('--checkpoint', metavar='JSONL',
+                       help="Archivo de control: los puntos resueltos no se repiten al retomar")
+    sweep.add_argument('--timeout', type=float, help="Segundos máximos para todo el barrido")
+    sweep.add_argument('--workers', type=int, default=1, help="Procesos (1 = un hilo)")
+    sweep.add_argument('--chunk-size', type=int, default=32, help="Puntos por bloque")
+    sweep.set_defaults(handler=cmd_sweep)
+
+    compare = subparsers.add_parser('compare-capacity', parents=[network_args],
+                                    help="Costo óptimo con y sin capacidades")
+    compare.set_defaults(handler=cmd_compare_capacity)
+
+    serve = subparsers.add_parser('serve', parents=[network_args],
+                                  help="Servicio local con los modelos en memoria")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--socket', metavar='RUTA', help="Socket Unix (reemplaza a --host/--port)")
+    serve.add_argument('--batch-window', type=float, default=2.0,
+                       help="Milisegundos que se esperan consultas para armar un lote")
+    serve.add_argument('--max-batch', type=int, default=64, help="Consultas máximas por lote")
+    serve.add_argument('--timeout', type=float, default=60.0,
+                       help="Segundos máximos de espera de cada consulta")
+    serve.set_defaults(handler=cmd_serve)
+
+    verify = subparsers.add_parser('verify', help="Verificar contra las instancias de referencia")
+    verify.add_argument('--dir', help="Carpeta de las instancias (por defecto referencias/)")
+    verify.add_argument('--backends', nargs='+')
+    verify.add_argument('--paths', nargs='+', help="directo, pulp, persistente, cache, cache_disco, transporte, "
+                                                        "presolve")
+    verify.add_argument('--quiet', action='store_true', help="Solo el resumen y las fallas")
+    verify.set_defaults(handler=cmd_verify)
+    return parser
+
+
+def main(argv=None):
+    """
+    Función principal de la línea de comandos
+
+    Returns:
+        Código de salida: 0 si la resolución es óptima (o la verificación
+        pasa), 1 si no, 2 si los argumentos no son válidos
+    """
+    args = build_parser().parse_args(argv)
+    timer = _Timer()
+    try:
+        code = args.handler(args, timer)
+    except (ValueError, ImportError, OSError) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        code = 2
+    if args.timings:
+        timer.report()
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""
+VERIFICACIÓN - COMPROBACIÓN VECTORIZADA DE UNA SOLUCIÓN
+Balance de nodos como producto de la matriz de incidencia por el vector de
+flujos, y capacidades y flujos mínimos con comparaciones de arreglos
+"""
+
+import sys
+
+import numpy as np
+
+
+class VerificationReport:
+    """
+    Resultado de verificar un vector de flujos contra una red
+
+    Attributes:
+        tol: Tolerancia absoluta usada
+        balance_residual: A x - b de cada nodo, en la orientación de las
+            restricciones del modelo (network.row_sign)
+        capacity_excess: Flujo menos capacidad de cada arco (> 0 es violación)
+        lower_deficit: Flujo mínimo menos flujo de cada arco (> 0 es violación;
+            con mínimo 0 es la no negatividad)
+        non_finite: Arcos con flujo NaN o infinito
+    """
+
+    def __init__(self, tol, balance_residual, capacity_excess, lower_deficit, non_finite):
+        self.tol = tol
+        self.balance_residual = balance_residual
+        self.capacity_excess = capacity_excess
+        self.lower_deficit = lower_deficit
+        self.non_finite = non_finite
+
+    @staticmethod
+    def _offenders(violation, tol):
+        """Índices con violación mayor que tol, de la mayor a la menor"""
+        idx = np.flatnonzero(violation > tol)
+        return idx[np.argsort(-violation[idx], kind='stable')]
+
+    @property
+    def max_balance_violation(self):
+        return float(np.abs(self.balance_residual).max(initial=0.0))
+
+    @property
+    def max_capacity_violation(self):
+        return float(max(self.capacity_excess.max(initial=0.0), 0.0))
+
+    @property
+    def max_lower_violation(self):
+        return float(max(self.lower_deficit.max(initial=0.0), 0.0))
+
+    @property
+    def balance_violations(self):
+        """Nodos que no cumplen su balance, de mayor a menor violación"""
+        return self._offenders(np.abs(self.balance_residual), self.tol)
+
+    @property
+    def capacity_violations(self):
+        """Arcos con flujo sobre su capacidad, de mayor a menor exceso"""
+        return self._offenders(self.capacity_excess, self.tol)
+
+    @property
+    def lower_violations(self):
+        """Arcos con flujo bajo su mínimo (o negativo), de mayor a menor déficit"""
+        return self._offenders(self.lower_deficit, self.tol)
+
+    @property
+    def ok(self):
+        return (len(self.non_finite) == 0 and self.max_balance_violation <= self.tol and
+                self.max_capacity_violation <= self.tol and self.max_lower_violation <= self.tol)
+
+
+def verify_solution(network, flows, tol=1e-6):
+    """
+    Verifica balance, capacidades y flujos mínimos de una solución
+
+    El balance es un único producto disperso A x con la matriz de incidencia
+    de network.incidence(), sin recorrer los nodos uno por uno: como cada
+    columna tiene +1 en el origen y -1 en el destino (por el signo de fila),
+    A x se obtiene con dos np.bincount sin materializar la matriz. El resto
+    son comparaciones de arreglos.
+
+    Args:
+        network: TransshipmentNetwork
+        flows: Flujo de cada arco
+        tol: Tolerancia absoluta
+
+    Returns:
+        VerificationReport
+    """
+    flows = np.asarray(flows, dtype=float)
+    if flows.shape != (network.n_arcs,):
+        raise ValueError(f"Se esperaban {network.n_arcs} flujos y hay {flows.size}")
+    n = network.n_nodes
+    product = network.row_sign * (np.bincount(network.tail, weights=flows, minlength=n) -
+                                  np.bincount(network.head, weights=flows, minlength=n))
+    with np.errstate(invalid='ignore'):
+        # inf - inf (capacidad ilimitada y flujo infinito) se reporta en non_finite
+        capacity_excess = flows - network.capacity
+        capacity_excess[~np.isfinite(network.capacity)] = -np.inf
+    return VerificationReport(tol, product - network.rhs(), capacity_excess,
+                              network.lower - flows, np.flatnonzero(~np.isfinite(flows)))
+
+
+def print_verification(network, flows, report=None, marks=('OK', 'ERROR'), icon='',
+                       max_nodes=50, top=5, file=None):
+    """
+    Imprime la verificación de una solución
+
+    Con hasta max_nodes nodos se muestra una línea por nodo (ofertas,
+    balance en transbordos y demandas) calculada en bloque; siempre se
+    muestran las máximas violaciones y los ids de los top peores nodos y arcos.
+
+    Args:
+        network: TransshipmentNetwork
+        flows: Flujo de cada arco
+        report: VerificationReport ya calculado (por defecto se calcula)
+        marks: Textos para restricción cumplida y no cumplida
+        icon: Prefijo de los títulos de cada bloque
+        max_nodes: Nodos a partir de los cuales se omite el detalle por nodo
+        top: Peores nodos y arcos que se listan cuando hay violaciones
+        file: Destino de la impresión (por defecto sys.stdout)
+
+    Returns:
+        VerificationReport
+    """
+    file = file or sys.stdout
+    flows = np.asarray(flows, dtype=float)
+    report = report or verify_solution(network, flows)
+
+    def out(text=""):
+        print(text, file=file)
+
+    def mark(violation):
+        return marks[0] if violation <= report.tol else marks[1]
+
+    if network.n_nodes <= max_nodes:
+        n = network.n_nodes
+        outflow = np.bincount(network.tail, weights=flows, minlength=n)
+        inflow = np.bincount(network.head, weights=flows, minlength=n)
+        residual = np.abs(report.balance_residual)
+        b = network.net_supply
+        names = network.node_names
+
+        out(f"\n{icon}OFERTA DE FUENTES:")
+        out("-" * 80)
+        for v in np.flatnonzero(b > 0).tolist():
+            out(f"  {names[v]}: {outflow[v] - inflow[v]:.2f} / {b[v]:g} {mark(residual[v])}")
+
+        out(f"\n{icon}BALANCE EN TRANSBORDOS:")
+        out("-" * 80)
+        for v in np.flatnonzero(b == 0).tolist():
+            out(f"  {names[v]}: Entrada={inflow[v]:.2f}, Salida={outflow[v]:.2f}, "
+                f"Balance={inflow[v] - outflow[v]:.2f} {mark(residual[v])}")
+
+        out(f"\n{icon}DEMANDA EN DESTINOS:")
+        out("-" * 80)
+        for v in np.flatnonzero(b < 0).tolist():
+            out(f"  {names[v]}: Recibe={inflow[v] - outflow[v]:.2f}, Necesita={-b[v]:g} "
+                f"{mark(residual[v])}")
+
+    out(f"\n{icon}CAPACIDADES Y NO NEGATIVIDAD:")
+    out("-" * 80)
+    for label, value, offenders, names in (
+            ("Balance de nodos", report.max_balance_violation, report.balance_violations,
+             network.node_names),
+            ("Capacidad de arcos", report.max_capacity_violation, report.capacity_violations,
+             network.arc_names),
+            ("Flujo mínimo de arcos", report.max_lower_violation, report.lower_violations,
+             network.arc_names)):
+        line = f"  {label}: máxima violación {value:.2e} {mark(value)}"
+        if len(offenders):
+            worst = ", ".join(names[i] for i in offenders[:top].tolist())
+            line += f" ({len(offenders):,} con violación; peores: {worst})"
+        out(line)
+    if len(report.non_finite):
+        worst = ", ".join(network.arc_names[k] for k in report.non_finite[:top].tolist())
+        out(f"  Flujos no finitos: {len(report.non_finite):,} {marks[1]} (arcos: {worst})")
+    return report